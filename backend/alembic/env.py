@@ -8,7 +8,7 @@ from alembic import context
 # Import app settings and models
 from app.config import get_settings
 from app.database import Base
-from app.models import User, Category, Expense  # noqa: F401
+from app.models import User, Category, CategoryVersion, Expense, ExpenseMonthlyRollup, CategorizationJob, RefreshToken  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
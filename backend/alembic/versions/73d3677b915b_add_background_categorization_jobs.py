@@ -0,0 +1,42 @@
+"""Add background categorization jobs
+
+Revision ID: 73d3677b915b
+Revises: d7bd5b0fe735
+Create Date: 2026-10-18 10:03:27.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '73d3677b915b'
+down_revision: Union[str, None] = 'd7bd5b0fe735'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('expenses', sa.Column('ai_status', sa.String(), nullable=True))
+    op.create_table('categorization_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('expense_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['expense_id'], ['expenses.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_categorization_jobs_status_created_at', 'categorization_jobs', ['status', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_categorization_jobs_status_created_at', table_name='categorization_jobs')
+    op.drop_table('categorization_jobs')
+    op.drop_column('expenses', 'ai_status')
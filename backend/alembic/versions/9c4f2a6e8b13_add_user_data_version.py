@@ -0,0 +1,26 @@
+"""Add user data version
+
+Revision ID: 9c4f2a6e8b13
+Revises: e41a7c3d2b96
+Create Date: 2026-10-18 14:21:07.318542
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4f2a6e8b13'
+down_revision: Union[str, None] = 'e41a7c3d2b96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('data_version', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'data_version')
@@ -0,0 +1,41 @@
+"""Add indexes for expense listing filters
+
+Revision ID: a6d3e9b17c52
+Revises: f5a19c3e7d48
+Create Date: 2026-10-18 18:04:19.517302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3e9b17c52'
+down_revision: Union[str, None] = 'f5a19c3e7d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently (outside a transaction) so writes aren't locked, see d7bd5b0fe735
+    with op.get_context().autocommit_block():
+        # Expense listing filtered by amount range
+        op.create_index(
+            'ix_expenses_user_id_amount', 'expenses',
+            ['user_id', 'amount'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        # Expense listing filtered by payment method (optionally with a date range)
+        op.create_index(
+            'ix_expenses_user_id_payment_method_expense_date', 'expenses',
+            ['user_id', 'payment_method', 'expense_date'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_expenses_user_id_payment_method_expense_date', table_name='expenses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_user_id_amount', table_name='expenses', postgresql_concurrently=True, if_exists=True)
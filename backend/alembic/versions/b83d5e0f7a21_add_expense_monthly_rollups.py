@@ -0,0 +1,49 @@
+"""Add expense monthly rollups
+
+Revision ID: b83d5e0f7a21
+Revises: 9c4f2a6e8b13
+Create Date: 2026-10-18 15:47:32.904116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83d5e0f7a21'
+down_revision: Union[str, None] = '9c4f2a6e8b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('expense_monthly_rollups',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=True),
+    sa.Column('payment_method', sa.String(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ux_expense_monthly_rollups_key', 'expense_monthly_rollups', ['user_id', 'month', 'category_id', 'payment_method'], unique=True, postgresql_nulls_not_distinct=True)
+    op.create_index('ix_expense_monthly_rollups_category_id', 'expense_monthly_rollups', ['category_id'], unique=False)
+
+    # Backfill from existing expenses (scripts/rebuild_rollups.py does the same on demand)
+    op.execute("""
+        INSERT INTO expense_monthly_rollups (user_id, month, category_id, payment_method, total, count)
+        SELECT user_id, date_trunc('month', expense_date)::date, category_id, payment_method, sum(amount), count(id)
+        FROM expenses
+        GROUP BY user_id, date_trunc('month', expense_date)::date, category_id, payment_method
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_expense_monthly_rollups_category_id', table_name='expense_monthly_rollups')
+    op.drop_index('ux_expense_monthly_rollups_key', table_name='expense_monthly_rollups')
+    op.drop_table('expense_monthly_rollups')
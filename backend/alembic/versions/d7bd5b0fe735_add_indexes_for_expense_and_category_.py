@@ -0,0 +1,65 @@
+"""Add indexes for expense and category access paths
+
+Revision ID: d7bd5b0fe735
+Revises: 1c3aaa78448c
+Create Date: 2026-10-18 09:12:41.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7bd5b0fe735'
+down_revision: Union[str, None] = '1c3aaa78448c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block,
+    # so the indexes are built in an autocommit block and don't lock writes.
+    with op.get_context().autocommit_block():
+        # Expense listing, keyset pagination and summaries: WHERE user_id ORDER BY expense_date, id
+        op.create_index(
+            'ix_expenses_user_id_expense_date_id', 'expenses',
+            ['user_id', 'expense_date', 'id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        # Expense listing filtered by category
+        op.create_index(
+            'ix_expenses_user_id_category_id', 'expenses',
+            ['user_id', 'category_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        # ON DELETE SET NULL lookups when a category is removed
+        op.create_index(
+            'ix_expenses_category_id', 'expenses', ['category_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_expenses_ai_suggested_category_id', 'expenses', ['ai_suggested_category_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        # Category listing: is_default = true OR user_id = :user_id
+        op.create_index(
+            'ix_categories_user_id', 'categories', ['user_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_categories_is_default', 'categories', ['is_default'],
+            postgresql_where=sa.text('is_default'),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_categories_is_default', table_name='categories', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_categories_user_id', table_name='categories', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_ai_suggested_category_id', table_name='expenses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_category_id', table_name='expenses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_user_id_category_id', table_name='expenses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_user_id_expense_date_id', table_name='expenses', postgresql_concurrently=True, if_exists=True)
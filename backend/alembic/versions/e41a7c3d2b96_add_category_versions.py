@@ -0,0 +1,30 @@
+"""Add category versions
+
+Revision ID: e41a7c3d2b96
+Revises: 5b2e8f1c9a47
+Create Date: 2026-10-18 12:02:51.640337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a7c3d2b96'
+down_revision: Union[str, None] = '5b2e8f1c9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('category_versions',
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('category_versions')
@@ -0,0 +1,50 @@
+"""Add expense search indexes
+
+Revision ID: f5a19c3e7d48
+Revises: b83d5e0f7a21
+Create Date: 2026-10-18 17:12:45.226093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a19c3e7d48'
+down_revision: Union[str, None] = 'b83d5e0f7a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Built concurrently (outside a transaction) so writes aren't locked, see d7bd5b0fe735.
+    # The full-text index is on the expression the search queries use (Expense.search_vector)
+    # rather than on a stored generated column, whose ADD COLUMN would rewrite the whole
+    # table under an ACCESS EXCLUSIVE lock.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_expenses_search_vector', 'expenses',
+            [sa.text("to_tsvector('simple', description || ' ' || coalesce(notes, ''))")],
+            postgresql_using='gin',
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_expenses_description_trgm', 'expenses', ['description'],
+            postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_expenses_notes_trgm', 'expenses', ['notes'],
+            postgresql_using='gin', postgresql_ops={'notes': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_expenses_notes_trgm', table_name='expenses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_description_trgm', table_name='expenses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_expenses_search_vector', table_name='expenses', postgresql_concurrently=True, if_exists=True)
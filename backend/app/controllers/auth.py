@@ -1,25 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import DatabaseRunner, get_db_runner
 from app.services.user_service import UserService
 from app.services.auth_service import AuthService
-from app.schemas.auth import Token, LoginRequest
+from app.services.password_hasher import PasswordHasherBusyError
+from app.schemas.auth import Token, LoginRequest, RefreshRequest
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     credentials: LoginRequest,
-    db: Session = Depends(get_db)
+    runner: DatabaseRunner = Depends(get_db_runner)
 ):
     """
     Login endpoint.
-    Returns a JWT access token if credentials are valid.
+    Returns a JWT access token and a refresh token if credentials are valid.
     """
     # Authenticate user
-    user = UserService.authenticate_user(db, credentials.email, credentials.password)
+    try:
+        user = await UserService.authenticate_user(runner, credentials.email, credentials.password)
+    except PasswordHasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
 
     if not user:
         raise HTTPException(
@@ -28,5 +35,35 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Create access token
-    return AuthService.create_user_token(user.id)
+    # Create access and refresh tokens
+    return await runner.run(AuthService.create_user_tokens, user.id)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    request: RefreshRequest,
+    runner: DatabaseRunner = Depends(get_db_runner)
+):
+    """
+    Exchange a refresh token for a new access token (no password check).
+    The refresh token is rotated: use the new one from the response next time.
+    """
+    tokens = await runner.run(AuthService.refresh_user_tokens, request.refresh_token)
+
+    if not tokens:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return tokens
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: RefreshRequest,
+    runner: DatabaseRunner = Depends(get_db_runner)
+):
+    """Revoke a refresh token"""
+    await runner.run(AuthService.revoke_refresh_token, request.refresh_token)
@@ -1,43 +1,64 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
-from app.database import get_db
-from app.dependencies import get_current_user_id
+from app.database import DatabaseRunner, get_db_runner
+from app.dependencies import check_etag, get_token_user_id
+from app.responses import ORJSONResponse
 from app.services.category_service import CategoryService
+from app.services.sparse_fields import CATEGORY_FIELDS, parse_fields
 from app.schemas.category import Category, CategoryCreate, CategoryUpdate
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.post("/", response_model=Category, status_code=status.HTTP_201_CREATED)
-def create_category(
+async def create_category(
     category: CategoryCreate,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
     """Create a new custom category (requires authentication)"""
-    return CategoryService.create_category(db, category, user_id=user_id)
+    return await runner.run(CategoryService.create_category, category, user_id=user_id)
 
 
-@router.get("/", response_model=list[Category])
-def list_categories(
+@router.get("/", response_model=list[Category], dependencies=[Depends(check_etag)])
+async def list_categories(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    fields: str | None = None,
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
-    """List all categories (default + user's custom) (requires authentication)"""
-    return CategoryService.list_categories(db, user_id=user_id, skip=skip, limit=limit)
+    """
+    List all categories (default + user's custom) (requires authentication).
+    fields=name,color,... returns only those fields (plus id).
+    """
+    try:
+        selected = parse_fields(fields, CATEGORY_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    categories = await runner.run(CategoryService.list_categories, user_id=user_id, skip=skip, limit=limit)
+    if selected is not None:
+        # Returned as a Response, so headers set by dependencies (ETag) are passed on explicitly
+        return ORJSONResponse(
+            [category.model_dump(include=set(selected)) for category in categories],
+            headers=response.headers
+        )
+    return categories
 
 
 @router.get("/{category_id}", response_model=Category)
-def get_category(
+async def get_category(
     category_id: UUID,
-    db: Session = Depends(get_db)
+    runner: DatabaseRunner = Depends(get_db_runner)
 ):
     """Get a specific category by ID"""
-    category = CategoryService.get_category(db, category_id)
+    category = await runner.run(CategoryService.get_category, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -47,14 +68,14 @@ def get_category(
 
 
 @router.put("/{category_id}", response_model=Category)
-def update_category(
+async def update_category(
     category_id: UUID,
     category_update: CategoryUpdate,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
     """Update a category (requires authentication)"""
-    category = CategoryService.update_category(db, category_id, category_update, user_id=user_id)
+    category = await runner.run(CategoryService.update_category, category_id, category_update, user_id=user_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -64,14 +85,14 @@ def update_category(
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_category(
+async def delete_category(
     category_id: UUID,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
     """Delete a category (requires authentication)"""
     try:
-        success = CategoryService.delete_category(db, category_id, user_id=user_id)
+        success = await runner.run(CategoryService.delete_category, category_id, user_id=user_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1,56 +1,263 @@
+from datetime import date
+from typing import Literal
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 
-from app.database import get_db
-from app.dependencies import get_current_user_id
+from app.database import DatabaseRunner, get_db_runner
+from app.dependencies import check_etag, get_expense_filters, get_token_user_id
+from app.responses import ORJSONResponse
 from app.services.expense_service import ExpenseService
-from app.schemas.expense import Expense, ExpenseCreate, ExpenseUpdate, ExpenseList
+from app.services.export_service import ExportService, MEDIA_TYPES
+from app.services.import_service import ImportService
+from app.services.sparse_fields import COMPACT_EXPENSE_FIELDS, EXPENSE_FIELDS, parse_fields
+from app.schemas.expense import (
+    Expense, ExpenseCreate, ExpenseUpdate, ExpenseList, ExpenseCursorPage, ExpenseCompactPage, ExpenseFilters, ExpenseSummary,
+    ExpenseCategorizationStatus, ExpenseCategorizeRequest, ExpenseCategorizeResult,
+    ExpenseImportResult, ExpenseBatchRequest, ExpenseBatchResult
+)
 from math import ceil
 
+# Handlers are async in both DATABASE_MODEs: DatabaseRunner runs the service
+# calls on the threadpool (sync) or on the event loop over asyncpg (async)
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
 
 @router.post("/", response_model=Expense, status_code=status.HTTP_201_CREATED)
-def create_expense(
+async def create_expense(
     expense: ExpenseCreate,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
     """Create a new expense (requires authentication)"""
-    return ExpenseService.create_expense(db, expense, user_id)
+    # Inline AI categorization waits on the provider
+    run = runner.run_blocking if ExpenseService.categorizes_inline(expense) else runner.run
+    return await run(ExpenseService.create_expense, expense, user_id)
 
 
-@router.get("/", response_model=ExpenseList)
-def list_expenses(
+@router.post("/categorize", response_model=ExpenseCategorizeResult)
+async def categorize_expenses(
+    request: ExpenseCategorizeRequest,
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
+):
+    """Categorize many expenses (given IDs or all uncategorized) in batched AI requests (requires authentication)"""
+    if not request.expense_ids and not request.all_uncategorized:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide expense_ids or set all_uncategorized"
+        )
+    try:
+        return await runner.run_blocking(
+            ExpenseService.categorize_expenses, user_id, None if request.all_uncategorized else request.expense_ids
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/batch", response_model=ExpenseBatchResult)
+async def batch_expenses(
+    batch: ExpenseBatchRequest,
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
+):
+    """Apply many create/update/delete operations in one transaction (requires authentication)"""
+    try:
+        results = await runner.run(ExpenseService.apply_batch, user_id, batch.operations)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return ExpenseBatchResult(results=results)
+
+
+@router.post("/import", response_model=ExpenseImportResult, status_code=status.HTTP_201_CREATED)
+async def import_expenses(
+    file: UploadFile = File(...),
+    file_format: Literal["csv", "ofx"] | None = Query(None, alias="format"),
+    payment_method: str = Query("bank_transfer", min_length=1, max_length=50),
+    expense_sign: Literal["negative", "positive"] = "negative",
+    date_format: str = "%Y-%m-%d",
+    categorize: bool = True,
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
+):
+    """
+    Import expenses from a CSV or OFX bank statement (requires authentication).
+    expense_sign tells which amounts are expenses (bank exports usually show debits as negative);
+    the other rows are skipped. Invalid rows are reported and don't stop the import.
+    """
+    if file_format is None:
+        file_format = "ofx" if (file.filename or "").lower().endswith((".ofx", ".qfx")) else "csv"
+
+    try:
+        # Reads the upload and may wait on the AI provider
+        return await runner.run_blocking(
+            ImportService.import_expenses, user_id, file.file, file_format,
+            default_payment_method=payment_method,
+            expense_sign=expense_sign,
+            date_format=date_format,
+            categorize=categorize
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/", response_model=ExpenseList | ExpenseCursorPage | ExpenseCompactPage, dependencies=[Depends(check_etag)])
+async def list_expenses(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    category_id: UUID | None = None,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    filters: ExpenseFilters = Depends(get_expense_filters),
+    pagination: Literal["offset", "cursor"] = "offset",
+    cursor: str | None = None,
+    include_total: bool = False,
+    list_format: Literal["full", "compact"] = Query("full", alias="format"),
+    fields: str | None = None,
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
-    """List all expenses with pagination (requires authentication)"""
-    expenses, total = ExpenseService.list_expenses(
-        db, user_id, skip, limit, category_id
-    )
+    """
+    List all expenses with pagination (requires authentication).
+    Passing a cursor (or pagination=cursor) switches to keyset pagination,
+    which returns next_cursor and skips the total count unless include_total is set.
+    format=compact returns category IDs only, with the page's categories side-loaded once.
+    fields=amount,description,... returns only those fields (plus id) and loads only
+    those columns; category objects are only joined when requested.
+    Filters: date_from/date_to, min_amount/max_amount, payment_method and category_id
+    (both repeatable) and uncategorized; all applied in SQL.
+    """
+    compact = list_format == "compact"
+    try:
+        selected = parse_fields(fields, COMPACT_EXPENSE_FIELDS if compact else EXPENSE_FIELDS)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if cursor is not None or pagination == "cursor":
+        try:
+            expenses, next_cursor, total = await runner.run(
+                ExpenseService.list_expenses_page, user_id, limit, cursor, filters, include_total, not compact, selected
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        page_model = ExpenseCursorPage
+        page = {"next_cursor": next_cursor, "page_size": limit, "total": total}
+    else:
+        expenses, total = await runner.run(
+            ExpenseService.list_expenses, user_id, skip, limit, filters, not compact, selected
+        )
+        page_model = ExpenseList
+        page = {
+            "total": total,
+            "page": skip // limit + 1,
+            "page_size": limit,
+            "total_pages": ceil(total / limit) if total > 0 else 0,
+        }
 
-    return ExpenseList(
-        items=expenses,
-        total=total,
-        page=skip // limit + 1,
-        page_size=limit,
-        total_pages=ceil(total / limit) if total > 0 else 0
+    # Compact and sparse pages are returned as a Response, so headers set by dependencies (ETag) are passed on explicitly
+    if compact:
+        body = await runner.run(ExpenseService.compact_page, user_id, expenses, selected)
+        return ORJSONResponse({**body, **page}, headers=response.headers)
+    if selected is not None:
+        items = ExpenseService.sparse_items(expenses, selected)
+        return ORJSONResponse({"items": items, **page}, headers=response.headers)
+
+    return page_model(items=expenses, **page)
+
+
+@router.get("/search", response_model=ExpenseCursorPage, dependencies=[Depends(check_etag)])
+async def search_expenses(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
+):
+    """
+    Search expenses by description and notes (requires authentication).
+    Matches every word of q as a prefix, or q as a fuzzy (typo-tolerant) match;
+    results are ordered by relevance and paged with next_cursor.
+    """
+    try:
+        expenses, next_cursor = await runner.run(ExpenseService.search_expenses, user_id, q, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return ExpenseCursorPage(items=expenses, next_cursor=next_cursor, page_size=limit)
+
+
+@router.get("/summary", response_model=ExpenseSummary)
+async def get_expense_summary(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    granularity: Literal["day", "week", "month"] = "month",
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
+):
+    """Get spending totals by category, payment method and period (requires authentication)"""
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must be before date_to"
+        )
+    return await runner.run(ExpenseService.get_summary, user_id, date_from, date_to, granularity)
+
+
+@router.get("/export")
+async def export_expenses(
+    file_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    user_id: UUID = Depends(get_token_user_id)
+):
+    """
+    Download all expenses as CSV or NDJSON (requires authentication).
+    Rows are streamed from a server-side cursor, so exports of any size use constant memory.
+    """
+    return StreamingResponse(
+        ExportService.stream_expenses(user_id, file_format),
+        media_type=MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="expenses.{file_format}"'}
     )
 
 
-@router.get("/{expense_id}", response_model=Expense)
-def get_expense(
+@router.get("/{expense_id}", response_model=Expense, dependencies=[Depends(check_etag)])
+async def get_expense(
     expense_id: UUID,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
     """Get a specific expense by ID (requires authentication)"""
-    expense = ExpenseService.get_expense(db, expense_id, user_id)
+    expense = await runner.run(ExpenseService.get_expense, expense_id, user_id)
+    if not expense:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expense not found"
+        )
+    return expense
+
+
+@router.get("/{expense_id}/categorization", response_model=ExpenseCategorizationStatus)
+async def get_expense_categorization(
+    expense_id: UUID,
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
+):
+    """Poll the AI categorization status of an expense (requires authentication)"""
+    expense = await runner.run(ExpenseService.get_expense, expense_id, user_id)
     if not expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,14 +267,14 @@ def get_expense(
 
 
 @router.put("/{expense_id}", response_model=Expense)
-def update_expense(
+async def update_expense(
     expense_id: UUID,
     expense_update: ExpenseUpdate,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
     """Update an expense (requires authentication)"""
-    expense = ExpenseService.update_expense(db, expense_id, user_id, expense_update)
+    expense = await runner.run(ExpenseService.update_expense, expense_id, user_id, expense_update)
     if not expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,13 +284,13 @@ def update_expense(
 
 
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_expense(
+async def delete_expense(
     expense_id: UUID,
-    db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user_id)
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
 ):
     """Delete an expense (requires authentication)"""
-    success = ExpenseService.delete_expense(db, expense_id, user_id)
+    success = await runner.run(ExpenseService.delete_expense, expense_id, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,10 +1,10 @@
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import DatabaseRunner, get_db_runner
 from app.dependencies import get_current_user
 from app.services.user_service import UserService
+from app.services.password_hasher import PasswordHasherBusyError
 from app.schemas.user import User, UserCreate
 from app.models.user import User as UserModel
 
@@ -12,22 +12,29 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user: UserCreate,
-    db: Session = Depends(get_db)
+    runner: DatabaseRunner = Depends(get_db_runner)
 ):
     """Register a new user"""
     try:
-        return UserService.create_user(db, user)
+        hashed_password = await UserService.hash_password_async(user.password)
+        return await runner.run(UserService.create_user, user, hashed_password)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except PasswordHasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
 
 
 @router.get("/me", response_model=User)
-def get_my_profile(
+async def get_my_profile(
     current_user: UserModel = Depends(get_current_user)
 ):
     """Get current user profile (requires authentication)"""
@@ -35,12 +42,12 @@ def get_my_profile(
 
 
 @router.get("/{user_id}", response_model=User)
-def get_user(
+async def get_user(
     user_id: UUID,
-    db: Session = Depends(get_db)
+    runner: DatabaseRunner = Depends(get_db_runner)
 ):
     """Get user by ID (admin only)"""
-    user = UserService.get_user(db, user_id)
+    user = await runner.run(UserService.get_user, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,19 +1,134 @@
+from typing import Any, Callable
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.config import get_settings
+from app.pool_metrics import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, PoolMetrics
 
 settings = get_settings()
 
-engine = create_engine(settings.DATABASE_URL)
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+pool_metrics = PoolMetrics()
+pool_metrics.attach(engine, settings.DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+def get_async_database_url(url: str) -> str:
+    """Switch a postgresql:// (psycopg2) URL to the asyncpg driver"""
+    scheme, _, rest = url.partition("://")
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+# Async engine (DATABASE_MODE=async only), used by request handlers through
+# DatabaseRunner. The sync engine above still serves background workers and
+# DatabaseRunner.run_blocking.
+async_engine = None
+async_pool_metrics = None
+AsyncSessionLocal = None
+if settings.DATABASE_MODE == "async":
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **POOL_OPTIONS
+    )
+    async_pool_metrics = PoolMetrics()
+    async_pool_metrics.attach(async_engine.sync_engine, settings.DB_MAX_OVERFLOW)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def commit_detached(db, *instances) -> None:
+    """
+    Commit, keeping the values already loaded on instances (e.g. from RETURNING).
+    They're expunged first, so the commit doesn't expire them and reading them
+    afterwards doesn't reload them with a SELECT.
+    """
+    for instance in {id(instance): instance for instance in instances if instance is not None}.values():
+        if instance in db:
+            db.expunge(instance)
+    db.commit()
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def _run_in_own_session(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+class DatabaseRunner:
+    """
+    Runs service calls (functions taking a Session first) for one request, so the
+    same services and repositories serve both DATABASE_MODEs:
+    - sync: on the threadpool, with a psycopg2 Session
+    - async: on the event loop through AsyncSession.run_sync, with asyncpg, so
+      no thread is held while queries wait on the database
+    Sessions don't expire on commit in either mode: results are serialized
+    after the call returns, where attributes can't be reloaded.
+    """
+
+    def __init__(self):
+        self._db = None
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(db, *args, **kwargs) in the request's session.
+        fn may only block on the database (in async mode it runs on the event loop).
+        """
+        if settings.DATABASE_MODE == "async":
+            if self._db is None:
+                self._db = AsyncSessionLocal()
+            return await self._db.run_sync(fn, *args, **kwargs)
+
+        if self._db is None:
+            self._db = SessionLocal(expire_on_commit=False)
+        return await run_in_threadpool(fn, self._db, *args, **kwargs)
+
+    async def run_blocking(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Like run(), for calls that also block on something else (AI provider requests,
+        reading uploads). In async mode they run on the threadpool with their own
+        sync session, since the request's AsyncSession can't be used from another thread.
+        """
+        if settings.DATABASE_MODE == "async":
+            return await run_in_threadpool(_run_in_own_session, fn, *args, **kwargs)
+        return await self.run(fn, *args, **kwargs)
+
+    async def close(self) -> None:
+        db, self._db = self._db, None
+        if isinstance(db, Session):
+            await run_in_threadpool(db.close)
+        elif db is not None:
+            await db.close()
+
+
+async def get_db_runner():
+    """Per-request DatabaseRunner; the session is only opened if a call uses it"""
+    runner = DatabaseRunner()
+    try:
+        yield runner
+    finally:
+        await runner.close()
@@ -1,3 +1,15 @@
-from app.dependencies.auth import get_current_user, get_current_user_id
+from app.dependencies.auth import (
+    get_current_user,
+    get_current_user_id,
+    get_token_user_id,
+)
+from app.dependencies.etag import check_etag
+from app.dependencies.filters import get_expense_filters
 
-__all__ = ["get_current_user", "get_current_user_id"]
+__all__ = [
+    "get_current_user",
+    "get_current_user_id",
+    "get_token_user_id",
+    "check_etag",
+    "get_expense_filters",
+]
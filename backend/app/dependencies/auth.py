@@ -1,9 +1,9 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.database import get_db
+from app.database import DatabaseRunner, get_db_runner
+from app.services.auth_cache import get_auth_cache
 from app.services.auth_service import AuthService
 from app.services.user_service import UserService
 from app.models.user import User
@@ -12,16 +12,59 @@ from app.models.user import User
 security = HTTPBearer()
 
 
-def get_current_user(
+def _user_id_from_token(token: str) -> UUID:
+    """
+    Verify a JWT and extract the user ID.
+    Verified tokens are cached until they expire, so repeat requests skip the decode.
+
+    Raises:
+        HTTPException: If token is invalid or its user was deleted
+    """
+    cache = get_auth_cache()
+    user_id = cache.get_token_user_id(token)
+
+    if user_id is None:
+        # Verify token and extract user_id
+        claims = AuthService.decode_token(token)
+
+        if claims is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        try:
+            user_id = UUID(claims["sub"])
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token format",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        cache.set_token(token, user_id, claims["exp"])
+
+    if cache.is_revoked(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return user_id
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    runner: DatabaseRunner = Depends(get_db_runner)
 ) -> User:
     """
     Dependency to get the current authenticated user from JWT token.
 
     Args:
         credentials: HTTP Bearer token from Authorization header
-        db: Database session
+        runner: Database runner of the request
 
     Returns:
         Current authenticated user
@@ -29,29 +72,15 @@ def get_current_user(
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    token = credentials.credentials
-
-    # Verify token and extract user_id
-    user_id_str = AuthService.verify_token(token)
-
-    if user_id_str is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    try:
-        user_id = UUID(user_id_str)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token format",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user_id = _user_id_from_token(credentials.credentials)
 
-    # Get user from database
-    user = UserService.get_user(db, user_id)
+    # Get user from the cache, or the database
+    cache = get_auth_cache()
+    user = cache.get_user(user_id)
+    if user is None:
+        user = await runner.run(UserService.get_user, user_id)
+        if user is not None:
+            cache.set_user(user)
 
     if user is None:
         raise HTTPException(
@@ -63,7 +92,7 @@ def get_current_user(
     return user
 
 
-def get_current_user_id(current_user: User = Depends(get_current_user)) -> UUID:
+async def get_current_user_id(current_user: User = Depends(get_current_user)) -> UUID:
     """
     Convenience dependency to get just the user ID.
 
@@ -74,3 +103,15 @@ def get_current_user_id(current_user: User = Depends(get_current_user)) -> UUID:
         User UUID
     """
     return current_user.id
+
+
+async def get_token_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UUID:
+    """
+    Get the user ID from the JWT alone, without touching the database.
+    For routes that only scope data by user ID: a valid, unexpired token is
+    trusted, except for users deleted through this process.
+
+    Raises:
+        HTTPException: If token is invalid
+    """
+    return _user_id_from_token(credentials.credentials)
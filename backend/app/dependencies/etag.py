@@ -0,0 +1,53 @@
+from fastapi import Depends, HTTPException, Request, Response, status
+from uuid import UUID
+
+from app.database import DatabaseRunner, get_db_runner
+from app.dependencies.auth import get_token_user_id
+from app.repositories.user_repository import UserRepository
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def _make_etag(versions) -> str | None:
+    if versions is None:
+        return None
+    data_version, default_categories_version = versions
+    return f'W/"{data_version}.{default_categories_version or 0}"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _check(request: Request, response: Response, etag: str | None) -> None:
+    if etag is None:
+        # Unknown user: let the route produce its own response
+        return
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _matches(request.headers.get("if-none-match"), etag):
+        # Raised from a dependency, so the route (and its queries) never runs
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+async def check_etag(
+    request: Request,
+    response: Response,
+    runner: DatabaseRunner = Depends(get_db_runner),
+    user_id: UUID = Depends(get_token_user_id)
+) -> None:
+    """
+    Conditional GET for reads of the user's expenses and categories.
+    The ETag is the user's data version plus the default categories' version,
+    read in one small query; a matching If-None-Match returns 304 Not Modified
+    before the route runs. The version is read before the route's own queries,
+    so a concurrent write can only make the response newer than its ETag.
+    """
+    _check(request, response, _make_etag(await runner.run(UserRepository.get_data_versions, user_id)))
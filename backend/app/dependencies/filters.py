@@ -0,0 +1,41 @@
+from datetime import date
+from decimal import Decimal
+from fastapi import HTTPException, Query, status
+from uuid import UUID
+
+from app.schemas.expense import ExpenseFilters
+
+
+def get_expense_filters(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    min_amount: Decimal | None = Query(None, ge=0),
+    max_amount: Decimal | None = Query(None, ge=0),
+    payment_method: list[str] | None = Query(None),
+    category_id: list[UUID] | None = Query(None),
+    uncategorized: bool = False
+) -> ExpenseFilters:
+    """
+    Expense listing filters from the query string.
+    payment_method and category_id may be repeated to match any of several values;
+    uncategorized=true also matches expenses without a category.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must be before date_to"
+        )
+    if min_amount is not None and max_amount is not None and min_amount > max_amount:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_amount must not be greater than max_amount"
+        )
+    return ExpenseFilters(
+        date_from=date_from,
+        date_to=date_to,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        payment_methods=payment_method or [],
+        category_ids=category_id or [],
+        uncategorized=uncategorized
+    )
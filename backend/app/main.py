@@ -1,14 +1,55 @@
-from fastapi import FastAPI
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from app.config import get_settings
+from app.database import async_engine, async_pool_metrics, pool_metrics
 from app.controllers import auth_router, categories_router, expenses_router, users_router
+from app.services.ai_gateway import get_ai_gateway
+from app.services.auth_cache import get_auth_cache
+from app.services.categorization_cache import get_categorization_cache
+from app.services.category_cache import get_category_cache
+from app.services.categorization_queue import CategorizationWorkerPool, get_categorization_queue
+from app.services.expense_service import ExpenseService
+from app.services.password_hasher import get_password_hasher
+from app.services.user_service import UserNotFoundError
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background AI categorization workers (only needed in async mode)
+    worker_pool = None
+    if settings.AI_CATEGORIZATION_MODE == "async" and settings.OPENAI_API_KEY:
+        worker_pool = CategorizationWorkerPool(
+            get_categorization_queue(),
+            ExpenseService.categorize_in_background,
+            workers=settings.AI_CATEGORIZATION_WORKERS
+        )
+        worker_pool.start()
+
+    yield
+
+    if worker_pool:
+        worker_pool.stop()
+
+    if settings.OPENAI_API_KEY:
+        get_ai_gateway().close()
+
+    get_password_hasher().shutdown()
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     description="AI-powered expense tracking API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS per permettere richieste da React Native
@@ -20,6 +61,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(UserNotFoundError)
+async def user_not_found_handler(request: Request, exc: UserNotFoundError):
+    """A write for a user deleted since their token was issued: same answer as the auth dependencies"""
+    return JSONResponse(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        content={"detail": str(exc)},
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 # Register routers
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(categories_router, prefix="/api/v1")
@@ -38,4 +90,32 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(HTTPBearer(auto_error=False))
+) -> None:
+    """
+    Only serve /metrics to callers presenting METRICS_TOKEN.
+    The stats help time login bursts or pool exhaustion, so without the token
+    (or with no token configured) the endpoint answers 404 as if it didn't exist.
+    """
+    expected = settings.METRICS_TOKEN
+    presented = credentials.credentials if credentials else ""
+    if not expected or not secrets.compare_digest(presented.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+async def metrics():
+    database_pools = {"sync": pool_metrics.stats()}
+    if async_pool_metrics is not None:
+        database_pools["async"] = async_pool_metrics.stats()
+    return {
+        "categorization_cache": get_categorization_cache().stats(),
+        "auth_cache": get_auth_cache().stats(),
+        "category_cache": get_category_cache().stats(),
+        "password_hasher": get_password_hasher().stats(),
+        "database_pools": database_pools
+    }
@@ -1,5 +1,9 @@
 from app.models.user import User
 from app.models.category import Category
+from app.models.category_version import CategoryVersion
 from app.models.expense import Expense
+from app.models.expense_rollup import ExpenseMonthlyRollup
+from app.models.categorization_job import CategorizationJob
+from app.models.refresh_token import RefreshToken
 
-__all__ = ["User", "Category", "Expense"]
+__all__ = ["User", "Category", "CategoryVersion", "Expense", "ExpenseMonthlyRollup", "CategorizationJob", "RefreshToken"]
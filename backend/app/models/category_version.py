@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, BigInteger
+
+from app.database import Base
+
+
+class CategoryVersion(Base):
+    """
+    Change counter for a set of categories ("default" or a user ID), bumped in the
+    same transaction as every category write so each worker's category cache can
+    tell when its copy is stale.
+    """
+    __tablename__ = "category_versions"
+
+    scope = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Numeric, Date, DateTime, ForeignKey, Float, Text
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Numeric, Date, DateTime, ForeignKey, Float, Text, Index, literal_column, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy.sql import func
 import uuid
 
@@ -9,6 +9,18 @@ from app.database import Base
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_user_id_expense_date_id", "user_id", "expense_date", "id"),
+        Index("ix_expenses_user_id_category_id", "user_id", "category_id"),
+        Index("ix_expenses_user_id_amount", "user_id", "amount"),
+        Index("ix_expenses_user_id_payment_method_expense_date", "user_id", "payment_method", "expense_date"),
+        Index("ix_expenses_category_id", "category_id"),
+        Index("ix_expenses_ai_suggested_category_id", "ai_suggested_category_id"),
+        # Search (pg_trgm extension required for the trigram indexes)
+        Index("ix_expenses_search_vector", text("to_tsvector('simple', description || ' ' || coalesce(notes, ''))"), postgresql_using="gin"),
+        Index("ix_expenses_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        Index("ix_expenses_notes_trgm", "notes", postgresql_using="gin", postgresql_ops={"notes": "gin_trgm_ops"}),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -20,8 +32,19 @@ class Expense(Base):
     notes = Column(Text, nullable=True)
     ai_suggested_category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
     ai_confidence_score = Column(Float, nullable=True)
+    ai_status = Column(String, nullable=True)  # "pending", "completed", "failed" (async categorization only)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Full-text search document. Not stored: queries use this expression, which
+    # ix_expenses_search_vector indexes (constants are inlined so it always matches)
+    search_vector = column_property(
+        func.to_tsvector(
+            literal_column("'simple'"),
+            description.op("||")(literal_column("' '")).op("||")(func.coalesce(notes, literal_column("''"))),
+            type_=TSVECTOR
+        ),
+        deferred=True
+    )
 
     # Relationships
     user = relationship("User", back_populates="expenses")
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Numeric, Date, ForeignKey, Integer, BigInteger, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class ExpenseMonthlyRollup(Base):
+    """
+    Per-user monthly spending totals by category and payment method, kept in
+    step with expenses by ExpenseRepository (see RollupRepository).
+    category_id NULL holds uncategorized spending. A bucket whose expenses were
+    all removed may stay behind with count 0 (until the next rebuild).
+    """
+    __tablename__ = "expense_monthly_rollups"
+    __table_args__ = (
+        Index(
+            "ux_expense_monthly_rollups_key",
+            "user_id", "month", "category_id", "payment_method",
+            unique=True,
+            postgresql_nulls_not_distinct=True
+        ),
+        Index("ix_expense_monthly_rollups_category_id", "category_id"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    month = Column(Date, nullable=False)  # First day of the month
+    category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id", ondelete="CASCADE"), nullable=True)
+    payment_method = Column(String, nullable=False)
+    total = Column(Numeric(14, 2), nullable=False)
+    count = Column(Integer, nullable=False)
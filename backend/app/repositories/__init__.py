@@ -1,5 +1,7 @@
 from app.repositories.category_repository import CategoryRepository
 from app.repositories.expense_repository import ExpenseRepository
+from app.repositories.refresh_token_repository import RefreshTokenRepository
+from app.repositories.rollup_repository import RollupRepository
 from app.repositories.user_repository import UserRepository
 
-__all__ = ["CategoryRepository", "ExpenseRepository", "UserRepository"]
+__all__ = ["CategoryRepository", "ExpenseRepository", "RefreshTokenRepository", "RollupRepository", "UserRepository"]
@@ -1,21 +1,39 @@
-from uuid import UUID
-from sqlalchemy.orm import Session
+from uuid import UUID, uuid4
+from sqlalchemy import CTE, Select, delete, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
+from app.database import commit_detached
 from app.models.category import Category
+from app.models.category_version import CategoryVersion
+from app.repositories.rollup_repository import RollupRepository
+from app.repositories.user_repository import UserRepository
 from app.schemas.category import CategoryCreate, CategoryUpdate
 
 
 class CategoryRepository:
+    @staticmethod
+    def written_statement(written: CTE, user_id: UUID | None) -> Select:
+        """
+        SELECT of the category written by an INSERT/UPDATE ... RETURNING CTE. The
+        versions are bumped by the same statement (see version_bump_ctes), so the
+        write is one round trip.
+        """
+        return select(aliased(Category, written)).add_cte(
+            *CategoryRepository.version_bump_ctes(user_id, written)
+        ).execution_options(populate_existing=True)
+
     @staticmethod
     def create(db: Session, category: CategoryCreate, user_id: UUID | None = None) -> Category:
-        """Create a new category"""
-        db_category = Category(
+        """Create a new category (INSERT ... RETURNING), see written_statement"""
+        # Python-side column defaults aren't applied to an INSERT in a CTE, so the ID is passed explicitly
+        written = insert(Category).values(
+            id=uuid4(),
             **category.model_dump(),
             user_id=user_id,
             is_default=user_id is None
-        )
-        db.add(db_category)
-        db.commit()
-        db.refresh(db_category)
+        ).returning(*Category.__table__.columns).cte("written")
+        db_category = db.scalars(CategoryRepository.written_statement(written, user_id)).one()
+        commit_detached(db, db_category)
         return db_category
 
     @staticmethod
@@ -26,11 +44,18 @@ class CategoryRepository:
     @staticmethod
     def get_all(db: Session, user_id: UUID | None = None, skip: int = 0, limit: int = 100) -> list[Category]:
         """Get all categories (default + user's custom categories)"""
-        query = db.query(Category).filter(
-            (Category.is_default == True) | (Category.user_id == user_id)
-        )
+        query = db.query(Category).filter(CategoryRepository.visible_to(user_id))
         return query.offset(skip).limit(limit).all()
 
+    @staticmethod
+    def get_scope(db: Session, user_id: UUID | None) -> list[Category]:
+        """Get the default categories (user_id None) or only a user's custom categories, oldest first"""
+        if user_id is None:
+            query = db.query(Category).filter(Category.is_default == True)
+        else:
+            query = db.query(Category).filter(Category.user_id == user_id)
+        return query.order_by(Category.created_at, Category.id).all()
+
     @staticmethod
     def get_user_categories(db: Session, user_id: UUID, skip: int = 0, limit: int = 100) -> list[Category]:
         """Get only user's custom categories"""
@@ -39,23 +64,120 @@ class CategoryRepository:
         ).offset(skip).limit(limit).all()
 
     @staticmethod
-    def update(db: Session, category_id: UUID, category_update: CategoryUpdate) -> Category | None:
-        """Update a category"""
-        db_category = CategoryRepository.get_by_id(db, category_id)
-        if db_category:
-            update_data = category_update.model_dump(exclude_unset=True)
-            for field, value in update_data.items():
-                setattr(db_category, field, value)
-            db.commit()
-            db.refresh(db_category)
+    def visible_to(user_id: UUID):
+        """WHERE clause matching the categories a user can assign: default ones and their own"""
+        return (Category.is_default == True) | (Category.user_id == user_id)
+
+    @staticmethod
+    def visible_ids(category_ids, user_id: UUID) -> Select:
+        """
+        SELECT of those of category_ids the user can still assign, locked FOR KEY SHARE.
+        Guards writes of AI suggestions, which come from process-local state and may
+        name a category another worker has deleted since: the lock keeps the category
+        from being deleted before the write's foreign key check.
+        """
+        return select(Category.id).where(
+            Category.id.in_(category_ids),
+            CategoryRepository.visible_to(user_id)
+        ).with_for_update(read=True, key_share=True)
+
+    @staticmethod
+    def owned_by(category_id: UUID, user_id: UUID) -> list:
+        """WHERE clauses matching a category only if it is the user's own (never a default one)"""
+        return [Category.id == category_id, Category.user_id == user_id, Category.is_default == False]
+
+    @staticmethod
+    def update(db: Session, category_id: UUID, category_update: CategoryUpdate, user_id: UUID) -> Category | None:
+        """
+        Update one of the user's own categories (UPDATE ... RETURNING), see written_statement.
+        Returns None if it doesn't exist, is a default category or belongs to someone else.
+        """
+        update_data = category_update.model_dump(exclude_unset=True)
+        if not update_data:
+            return db.scalars(select(Category).where(*CategoryRepository.owned_by(category_id, user_id))).first()
+
+        written = update(Category).where(
+            *CategoryRepository.owned_by(category_id, user_id)
+        ).values(**update_data).returning(*Category.__table__.columns).cte("written")
+        db_category = db.scalars(CategoryRepository.written_statement(written, user_id)).first()
+        if db_category is None:
+            return None
+        commit_detached(db, db_category)
         return db_category
 
     @staticmethod
-    def delete(db: Session, category_id: UUID) -> bool:
-        """Delete a category"""
-        db_category = CategoryRepository.get_by_id(db, category_id)
-        if db_category:
-            db.delete(db_category)
-            db.commit()
-            return True
-        return False
+    def delete(db: Session, category_id: UUID, user_id: UUID) -> bool:
+        """
+        Delete one of the user's own categories.
+        Returns False if it doesn't exist, is a default category or belongs to someone else.
+        """
+        # Lock it first. Expense writes that reference it (their foreign key check takes
+        # FOR KEY SHARE) then wait until it is gone, so none can add to its buckets
+        # between the merge below and the delete
+        locked = db.execute(
+            select(Category.id).where(*CategoryRepository.owned_by(category_id, user_id)).with_for_update()
+        ).first()
+        if locked is None:
+            return False
+
+        # Its expenses become uncategorized (ON DELETE SET NULL), so do their rollup buckets:
+        # moved by the deleting statement, as the buckets would be cascade-deleted with the category
+        deleted = delete(Category).where(Category.id == category_id).returning(Category.id).cte("written")
+        db.execute(select(deleted.c.id).add_cte(
+            RollupRepository.merge_into_uncategorized_cte(category_id),
+            *CategoryRepository.version_bump_ctes(user_id, deleted)
+        ))
+        db.commit()
+        return True
+
+    @staticmethod
+    def version_scope(user_id: UUID | None) -> str:
+        """category_versions key for the default categories or a user's custom ones"""
+        return "default" if user_id is None else str(user_id)
+
+    @staticmethod
+    def get_versions(db: Session, user_ids: list[UUID | None]) -> dict[UUID | None, int]:
+        """Current category version of each scope (0 if it was never written)"""
+        scopes = {CategoryRepository.version_scope(user_id): user_id for user_id in user_ids}
+        rows = db.execute(
+            select(CategoryVersion.scope, CategoryVersion.version).where(CategoryVersion.scope.in_(scopes))
+        ).all()
+        versions = {user_id: 0 for user_id in user_ids}
+        versions.update({scopes[scope]: version for scope, version in rows})
+        return versions
+
+    @staticmethod
+    def bump_version(db: Session, user_id: UUID | None) -> None:
+        """
+        Increment a scope's category version (in the caller's transaction, not committed).
+        A user's custom categories also move that user's data version; the default
+        categories' version is part of every user's ETag instead.
+        """
+        stmt = insert(CategoryVersion).values(scope=CategoryRepository.version_scope(user_id), version=1)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[CategoryVersion.scope],
+            set_={"version": CategoryVersion.version + 1}
+        ))
+        if user_id is not None:
+            UserRepository.bump_data_version(db, user_id)
+
+    @staticmethod
+    def version_bump_ctes(user_id: UUID | None, written: CTE) -> list[CTE]:
+        """
+        bump_version as CTEs, to run in the same statement as a category write:
+        applied only if the write's RETURNING CTE produced a row.
+        """
+        scope_bump = insert(CategoryVersion).from_select(
+            ["scope", "version"],
+            select(literal(CategoryRepository.version_scope(user_id)), literal(1)).where(
+                select(written.c.id).exists()
+            ),
+            include_defaults=False
+        )
+        ctes = [scope_bump.on_conflict_do_update(
+            index_elements=[CategoryVersion.scope],
+            set_={"version": CategoryVersion.version + 1}
+        ).cte("category_version_bump")]
+        if user_id is not None:
+            ctes.append(UserRepository.data_version_bump_cte(user_id, written))
+        return ctes
@@ -1,22 +1,157 @@
-from uuid import UUID
-from sqlalchemy.orm import Session, joinedload
+import re
+from datetime import date
+from decimal import Decimal
+from uuid import UUID, uuid4
+from sqlalchemy import CTE, Date, Float, Row, Select, bindparam, cast, column, delete, desc, func, insert, literal, or_, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, insert as pg_insert
+from sqlalchemy.orm import Session, aliased, contains_eager, joinedload, load_only
+from app.database import commit_detached
+from app.models.categorization_job import CategorizationJob
+from app.models.category import Category
 from app.models.expense import Expense
-from app.schemas.expense import ExpenseCreate, ExpenseUpdate
+from app.repositories.category_repository import CategoryRepository
+from app.repositories.rollup_repository import EXPENSE_FIELDS, RollupDeltas, RollupRepository
+from app.repositories.user_repository import UserRepository
+from app.schemas.expense import ExpenseCreate, ExpenseFilters, ExpenseUpdate
 
 
 class ExpenseRepository:
     @staticmethod
-    def create(db: Session, expense: ExpenseCreate, user_id: UUID) -> Expense:
-        """Create a new expense"""
-        db_expense = Expense(
-            **expense.model_dump(),
-            user_id=user_id
+    def written_statement(written: CTE, user_id: UUID, *rollup_changes: Select) -> Select:
+        """
+        SELECT of the expense written by an INSERT/UPDATE ... RETURNING CTE, with both
+        category relationships joined. The user's data version and (with rollup_changes,
+        see RollupRepository.bucket_change) the rollup buckets are updated by the same
+        statement, so the write is one round trip.
+        """
+        expense = aliased(Expense, written)
+        category, suggested_category = aliased(Category), aliased(Category)
+        stmt = select(expense).outerjoin(
+            category, expense.category
+        ).outerjoin(
+            suggested_category, expense.ai_suggested_category
+        ).options(
+            contains_eager(expense.category.of_type(category)),
+            contains_eager(expense.ai_suggested_category.of_type(suggested_category))
+        ).add_cte(
+            UserRepository.data_version_bump_cte(user_id, written)
+        ).execution_options(populate_existing=True)
+        if rollup_changes:
+            stmt = stmt.add_cte(RollupRepository.delta_cte(*rollup_changes))
+        return stmt
+
+    @staticmethod
+    def create_statement(
+        expense: ExpenseCreate,
+        user_id: UUID,
+        ai_status: str | None = None,
+        queue_job: bool = False
+    ) -> Select:
+        """
+        INSERT ... RETURNING of a new expense, see written_statement.
+        An AI suggestion (also filling category_id if that is the suggested one)
+        is only stored if the user can still assign its category, see
+        CategoryRepository.visible_ids; otherwise the expense is left uncategorized.
+        queue_job also inserts its categorization_jobs row, so the job commits
+        (or rolls back) together with the expense.
+        """
+        data = expense.model_dump()
+        suggested_category_id = data["ai_suggested_category_id"]
+        if suggested_category_id:
+            data["ai_suggested_category_id"] = CategoryRepository.visible_ids(
+                [suggested_category_id], user_id
+            ).scalar_subquery()
+            if data["category_id"] == suggested_category_id:
+                data["category_id"] = data["ai_suggested_category_id"]
+        # Python-side column defaults aren't applied to an INSERT in a CTE, so the ID is passed explicitly
+        written = insert(Expense).values(
+            **data,
+            id=uuid4(),
+            user_id=user_id,
+            ai_status=ai_status
+        ).returning(*Expense.__table__.columns).cte("written")
+        stmt = ExpenseRepository.written_statement(written, user_id, RollupRepository.bucket_change(written.c))
+        if queue_job:
+            # Column defaults can't be rendered into INSERT ... SELECT, so pass them explicitly
+            stmt = stmt.add_cte(insert(CategorizationJob).from_select(
+                ["id", "expense_id", "user_id", "status", "attempts"],
+                select(literal(uuid4(), PGUUID(as_uuid=True)), written.c.id, written.c.user_id, literal("queued"), literal(0)),
+                include_defaults=False
+            ).cte("queued_job"))
+        return stmt
+
+    @staticmethod
+    def update_cte(expense_id: UUID, user_id: UUID, values: dict) -> CTE:
+        """
+        UPDATE ... RETURNING CTE of one of the user's expenses. The row is locked and
+        read in the same statement, so its previous rollup values are returned too,
+        as old_<field> columns.
+        """
+        current = select(*RollupRepository.expense_columns()).where(
+            Expense.id == expense_id,
+            Expense.user_id == user_id
+        ).with_for_update().subquery("current")
+        return update(Expense).where(
+            Expense.id == current.c.id
+        ).values(values).returning(
+            *Expense.__table__.columns,
+            *(current.c[field].label(f"old_{field}") for field in EXPENSE_FIELDS)
+        ).cte("written")
+
+    @staticmethod
+    def moved_buckets(written: CTE) -> tuple[Select, Select]:
+        """Rollup changes of an update_cte: out of the expense's old bucket, into its new one"""
+        return RollupRepository.bucket_change(written.c, -1, prefix="old_"), RollupRepository.bucket_change(written.c)
+
+    @staticmethod
+    def update_statement(expense_id: UUID, user_id: UUID, update_data: dict) -> Select:
+        """UPDATE ... RETURNING of one of the user's expenses (see update_cte and written_statement)"""
+        written = ExpenseRepository.update_cte(expense_id, user_id, update_data)
+        return ExpenseRepository.written_statement(written, user_id, *ExpenseRepository.moved_buckets(written))
+
+    @staticmethod
+    def delete_statement(expense_id: UUID, user_id: UUID) -> Select:
+        """
+        DELETE ... RETURNING of one of the user's expenses (its rollup values),
+        taking it out of its rollup bucket and bumping the data version in the same statement
+        """
+        written = delete(Expense).where(
+            Expense.id == expense_id,
+            Expense.user_id == user_id
+        ).returning(*RollupRepository.expense_columns()).cte("written")
+        return select(written).add_cte(
+            UserRepository.data_version_bump_cte(user_id, written)
+        ).add_cte(
+            RollupRepository.delta_cte(RollupRepository.bucket_change(written.c, -1))
         )
-        db.add(db_expense)
-        db.commit()
-        db.refresh(db_expense)
+
+    @staticmethod
+    def create(
+        db: Session,
+        expense: ExpenseCreate,
+        user_id: UUID,
+        ai_status: str | None = None,
+        queue_job: bool = False
+    ) -> Expense:
+        """Create a new expense (INSERT ... RETURNING, with its categories), see create_statement"""
+        db_expense = db.scalars(ExpenseRepository.create_statement(expense, user_id, ai_status, queue_job)).one()
+        commit_detached(db, db_expense, db_expense.category, db_expense.ai_suggested_category)
         return db_expense
 
+    @staticmethod
+    def bulk_create(db: Session, expenses: list[dict]) -> None:
+        """
+        Insert many expenses (column dicts including id and user_id) in one batched INSERT.
+        Doesn't commit, so a caller can insert several batches in one transaction.
+        """
+        db.execute(insert(Expense), expenses)
+        deltas = RollupDeltas()
+        for expense in expenses:
+            deltas.add(expense)
+        RollupRepository.apply(db, deltas)
+        for user_id in {expense["user_id"] for expense in expenses}:
+            UserRepository.bump_data_version(db, user_id)
+
     @staticmethod
     def get_by_id(db: Session, expense_id: UUID, user_id: UUID) -> Expense | None:
         """Get expense by ID (with category relationships loaded)"""
@@ -28,23 +163,73 @@ class ExpenseRepository:
             Expense.user_id == user_id
         ).first()
 
+    @staticmethod
+    def list_options(with_categories: bool = True, fields: list[str] | None = None) -> list:
+        """
+        Loader options for listed expenses.
+        with_categories joins the category and AI-suggested category. `fields`, if
+        given, loads only those columns (plus the keyset columns) and joins only the
+        category relationships it names; other attributes raise instead of lazy loading.
+        """
+        relationships = ("category", "ai_suggested_category") if with_categories else ()
+        if fields is None:
+            return [joinedload(getattr(Expense, name)) for name in relationships]
+
+        columns = {"id", "expense_date"} | {name for name in fields if name in Expense.__table__.columns}
+        options = [load_only(*(getattr(Expense, name) for name in columns), raiseload=True)]
+        options += [joinedload(getattr(Expense, name)) for name in relationships if name in fields]
+        return options
+
+    @staticmethod
+    def filter_clauses(user_id: UUID, filters: ExpenseFilters | None = None) -> list:
+        """
+        WHERE clauses for a user's expenses matching the listing filters.
+        Each one is served by an index leading with user_id: expense_date by
+        (user_id, expense_date, id), amount by (user_id, amount), payment method by
+        (user_id, payment_method, expense_date), categories by (user_id, category_id).
+        """
+        clauses = [Expense.user_id == user_id]
+        if filters is None:
+            return clauses
+
+        if filters.date_from:
+            clauses.append(Expense.expense_date >= filters.date_from)
+        if filters.date_to:
+            clauses.append(Expense.expense_date <= filters.date_to)
+        if filters.min_amount is not None:
+            clauses.append(Expense.amount >= filters.min_amount)
+        if filters.max_amount is not None:
+            clauses.append(Expense.amount <= filters.max_amount)
+        if filters.payment_methods:
+            clauses.append(Expense.payment_method.in_(filters.payment_methods))
+
+        categories = []
+        if filters.category_ids:
+            categories.append(Expense.category_id.in_(filters.category_ids))
+        if filters.uncategorized:
+            categories.append(Expense.category_id.is_(None))
+        if categories:
+            clauses.append(or_(*categories))
+        return clauses
+
     @staticmethod
     def get_all(
         db: Session,
         user_id: UUID,
         skip: int = 0,
         limit: int = 100,
-        category_id: UUID | None = None
+        filters: ExpenseFilters | None = None,
+        with_categories: bool = True,
+        fields: list[str] | None = None
     ) -> tuple[list[Expense], int]:
-        """Get all expenses for a user with optional filtering"""
-        query = db.query(Expense).options(
-            joinedload(Expense.category),
-            joinedload(Expense.ai_suggested_category)
-        ).filter(Expense.user_id == user_id)
-
-        # Optional category filter
-        if category_id:
-            query = query.filter(Expense.category_id == category_id)
+        """
+        Get all expenses for a user with optional filtering (see filter_clauses).
+        with_categories=False skips the category joins (callers that only need the IDs);
+        `fields` limits the columns and joins (see list_options).
+        """
+        query = db.query(Expense).filter(*ExpenseRepository.filter_clauses(user_id, filters)).options(
+            *ExpenseRepository.list_options(with_categories, fields)
+        )
 
         # Get total count
         total = query.count()
@@ -54,24 +239,466 @@ class ExpenseRepository:
 
         return expenses, total
 
+    @staticmethod
+    def get_page(
+        db: Session,
+        user_id: UUID,
+        limit: int = 20,
+        after: tuple[date, UUID] | None = None,
+        filters: ExpenseFilters | None = None,
+        include_total: bool = False,
+        with_categories: bool = True,
+        fields: list[str] | None = None
+    ) -> tuple[list[Expense], tuple[date, UUID] | None, int | None]:
+        """
+        Get a page of expenses using keyset pagination on (expense_date, id).
+        Seeks past the `after` key instead of using OFFSET, so every page costs the same.
+        Returns (expenses, next_key, total) where next_key is None on the last page
+        and total is only counted when include_total is set.
+        """
+        clauses = ExpenseRepository.filter_clauses(user_id, filters)
+
+        query = db.query(Expense).filter(*clauses).options(
+            *ExpenseRepository.list_options(with_categories, fields)
+        )
+
+        if after:
+            query = query.filter(tuple_(Expense.expense_date, Expense.id) < tuple_(*after))
+
+        # Fetch one extra row to know whether another page exists
+        expenses = query.order_by(
+            Expense.expense_date.desc(), Expense.id.desc()
+        ).limit(limit + 1).all()
+
+        next_key = None
+        if len(expenses) > limit:
+            expenses = expenses[:limit]
+            next_key = (expenses[-1].expense_date, expenses[-1].id)
+
+        total = None
+        if include_total:
+            total = db.query(func.count(Expense.id)).filter(*clauses).scalar()
+
+        return expenses, next_key, total
+
+    @staticmethod
+    def search_statement(
+        user_id: UUID,
+        q: str,
+        limit: int = 20,
+        after: tuple[float, UUID] | None = None
+    ) -> Select:
+        """
+        Ranked search over description and notes, selecting (Expense, score).
+        Matches are expenses containing every word of q as a prefix (the search_vector
+        GIN index) or fuzzy matches of q in description/notes (the trigram GIN indexes).
+        Ordered by score, then id, with keyset paging past the `after` key; fetches
+        limit + 1 rows so callers can tell whether another page exists.
+        Raises ValueError if q has no searchable words.
+        """
+        words = re.findall(r"[^\W_]+", q.lower())
+        if not words:
+            raise ValueError("Search query must contain letters or digits")
+
+        query = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+        # Cast to double precision so scores round-trip exactly through the cursor
+        score = cast(
+            func.ts_rank_cd(Expense.search_vector, query)
+            + func.greatest(
+                func.word_similarity(q, Expense.description),
+                func.word_similarity(q, func.coalesce(Expense.notes, ""))
+            ),
+            Float
+        ).label("score")
+
+        stmt = select(Expense, score).where(
+            Expense.user_id == user_id,
+            or_(
+                Expense.search_vector.op("@@")(query),
+                Expense.description.op("%>")(q),
+                Expense.notes.op("%>")(q)
+            )
+        ).options(*ExpenseRepository.list_options())
+
+        if after:
+            stmt = stmt.where(tuple_(score, Expense.id) < tuple_(*after))
+
+        return stmt.order_by(score.desc(), Expense.id.desc()).limit(limit + 1)
+
+    @staticmethod
+    def search_page(rows: list[Row], limit: int) -> tuple[list[Expense], tuple[float, UUID] | None]:
+        """Split the rows of search_statement into (expenses, next_key)"""
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1].score, rows[-1].Expense.id)
+        return [row.Expense for row in rows], next_key
+
+    @staticmethod
+    def search(
+        db: Session,
+        user_id: UUID,
+        q: str,
+        limit: int = 20,
+        after: tuple[float, UUID] | None = None
+    ) -> tuple[list[Expense], tuple[float, UUID] | None]:
+        """
+        Search a user's expenses, most relevant first (see search_statement).
+        Returns (expenses, next_key) where next_key is None on the last page.
+        """
+        rows = db.execute(ExpenseRepository.search_statement(user_id, q, limit, after)).all()
+        return ExpenseRepository.search_page(rows, limit)
+
+    @staticmethod
+    def get_training_examples(db: Session, user_id: UUID, limit: int = 2000) -> list[tuple[UUID, str, Decimal, UUID]]:
+        """Get (id, description, amount, category_id) of the user's most recent categorized expenses"""
+        return db.query(
+            Expense.id,
+            Expense.description,
+            Expense.amount,
+            Expense.category_id
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.category_id.isnot(None)
+        ).order_by(Expense.expense_date.desc()).limit(limit).all()
+
+    @staticmethod
+    def export_statement(user_id: UUID, batch_size: int = 1000) -> Select:
+        """
+        SELECT of all of a user's expenses as plain rows (with the category name),
+        newest first. Executed (or streamed) with a server-side cursor fetching
+        batch_size rows at a time, so no ORM objects are built and memory use
+        doesn't grow with the row count.
+        """
+        return select(
+            Expense.id,
+            Expense.expense_date,
+            Expense.description,
+            Expense.amount,
+            Category.name.label("category"),
+            Expense.payment_method,
+            Expense.notes,
+            Expense.created_at
+        ).outerjoin(
+            Category, Category.id == Expense.category_id
+        ).where(
+            Expense.user_id == user_id
+        ).order_by(
+            Expense.expense_date.desc(), Expense.id.desc()
+        ).execution_options(yield_per=batch_size)
+
+    @staticmethod
+    def get_summary(
+        db: Session,
+        user_id: UUID,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        granularity: str = "month"
+    ) -> dict:
+        """
+        Aggregate a user's spending with SQL GROUP BY.
+        Returns overall totals plus totals by category, payment method and
+        day/week/month bucket for the (inclusive) date range.
+        Monthly summaries over whole months are read from the monthly rollups.
+        """
+        totals, by_category, by_payment_method, by_period = ExpenseRepository.summary_statements(
+            user_id, date_from, date_to, granularity
+        )
+        return ExpenseRepository.summary_from_rows(
+            db.execute(totals).one(),
+            db.execute(by_category).all(),
+            db.execute(by_payment_method).all(),
+            db.execute(by_period).all()
+        )
+
+    @staticmethod
+    def summary_statements(
+        user_id: UUID,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        granularity: str = "month"
+    ) -> tuple[Select, Select, Select, Select]:
+        """Build the (totals, by category, by payment method, by period) summary queries"""
+        if RollupRepository.covers(date_from, date_to, granularity):
+            return RollupRepository.summary_statements(user_id, date_from, date_to)
+
+        filters = [Expense.user_id == user_id]
+        if date_from:
+            filters.append(Expense.expense_date >= date_from)
+        if date_to:
+            filters.append(Expense.expense_date <= date_to)
+
+        total_sum = func.coalesce(func.sum(Expense.amount), 0)
+        row_count = func.count(Expense.id)
+
+        totals = select(total_sum, row_count).where(*filters)
+
+        by_category = select(
+            Expense.category_id,
+            Category.name,
+            Category.color,
+            total_sum.label("total"),
+            row_count.label("count")
+        ).outerjoin(
+            Category, Category.id == Expense.category_id
+        ).where(*filters).group_by(
+            Expense.category_id, Category.name, Category.color
+        ).order_by(desc("total"))
+
+        by_payment_method = select(
+            Expense.payment_method,
+            total_sum.label("total"),
+            row_count.label("count")
+        ).where(*filters).group_by(
+            Expense.payment_method
+        ).order_by(desc("total"))
+
+        period = cast(func.date_trunc(granularity, Expense.expense_date), Date)
+        by_period = select(
+            period.label("period_start"),
+            total_sum.label("total"),
+            row_count.label("count")
+        ).where(*filters).group_by("period_start").order_by("period_start")
+
+        return totals, by_category, by_payment_method, by_period
+
+    @staticmethod
+    def summary_from_rows(totals: Row, by_category: list[Row], by_payment_method: list[Row], by_period: list[Row]) -> dict:
+        """Shape the summary query results"""
+        total, count = totals
+        return {
+            "total": total,
+            "count": count,
+            "by_category": [
+                {"category_id": r.category_id, "name": r.name, "color": r.color, "total": r.total, "count": r.count}
+                for r in by_category
+            ],
+            "by_payment_method": [
+                {"payment_method": r.payment_method, "total": r.total, "count": r.count}
+                for r in by_payment_method
+            ],
+            "by_period": [
+                {"period_start": r.period_start, "total": r.total, "count": r.count}
+                for r in by_period
+            ],
+        }
+
     @staticmethod
     def update(db: Session, expense_id: UUID, user_id: UUID, expense_update: ExpenseUpdate) -> Expense | None:
-        """Update an expense"""
-        db_expense = ExpenseRepository.get_by_id(db, expense_id, user_id)
-        if db_expense:
-            update_data = expense_update.model_dump(exclude_unset=True)
-            for field, value in update_data.items():
-                setattr(db_expense, field, value)
-            db.commit()
-            db.refresh(db_expense)
+        """Update an expense (UPDATE ... RETURNING, only if it belongs to the user)"""
+        update_data = expense_update.model_dump(exclude_unset=True)
+        if not update_data:
+            return ExpenseRepository.get_by_id(db, expense_id, user_id)
+
+        db_expense = db.scalars(ExpenseRepository.update_statement(expense_id, user_id, update_data)).first()
+        if db_expense is None:
+            return None
+        commit_detached(db, db_expense, db_expense.category, db_expense.ai_suggested_category)
         return db_expense
 
     @staticmethod
-    def delete(db: Session, expense_id: UUID, user_id: UUID) -> bool:
-        """Delete an expense"""
-        db_expense = ExpenseRepository.get_by_id(db, expense_id, user_id)
-        if db_expense:
-            db.delete(db_expense)
+    def set_ai_categorization(
+        db: Session,
+        expense_id: UUID,
+        user_id: UUID,
+        ai_status: str,
+        suggested_category_id: UUID | None = None,
+        confidence: float | None = None
+    ) -> Row | None:
+        """
+        Write a background categorization result back to an expense.
+        The suggestion only fills category_id if the user hasn't set one in the meantime,
+        and is dropped if its category can no longer be assigned (see CategoryRepository.visible_ids).
+        Returns the expense's written (category_id, ai_suggested_category_id), None if it no longer exists.
+        """
+        values = {"ai_status": ai_status}
+        if suggested_category_id:
+            suggestion = CategoryRepository.visible_ids([suggested_category_id], user_id).scalar_subquery()
+            values.update(
+                ai_suggested_category_id=suggestion,
+                ai_confidence_score=confidence,
+                category_id=func.coalesce(Expense.category_id, suggestion)
+            )
+
+        # One statement: a suggestion filling the category also moves the expense's rollup bucket
+        written = ExpenseRepository.update_cte(expense_id, user_id, values)
+        row = db.execute(
+            select(written.c.category_id, written.c.ai_suggested_category_id).add_cte(
+                UserRepository.data_version_bump_cte(user_id, written)
+            ).add_cte(
+                RollupRepository.delta_cte(*ExpenseRepository.moved_buckets(written))
+            )
+        ).first()
+        db.commit()
+        return row
+
+    @staticmethod
+    def get_categorization_targets(
+        db: Session,
+        user_id: UUID,
+        expense_ids: list[UUID] | None = None,
+        limit: int = 1000
+    ) -> list[tuple[UUID, str, Decimal]]:
+        """
+        Get (id, description, amount) of expenses to categorize:
+        the given IDs (owned by the user), or all uncategorized expenses if none are given.
+        """
+        query = db.query(Expense.id, Expense.description, Expense.amount).filter(Expense.user_id == user_id)
+        if expense_ids is not None:
+            query = query.filter(Expense.id.in_(expense_ids))
+        else:
+            query = query.filter(Expense.category_id.is_(None))
+        return query.order_by(Expense.expense_date.desc()).limit(limit).all()
+
+    @staticmethod
+    def bulk_set_ai_categorization(
+        db: Session,
+        user_id: UUID,
+        results: list[tuple[UUID, UUID, float]]
+    ) -> dict[UUID, UUID]:
+        """
+        Write many (expense_id, suggested_category_id, confidence) results in one
+        UPDATE ... FROM (VALUES ...) statement.
+        Like set_ai_categorization, category_id is only filled where it is still empty,
+        and suggestions of categories the user can no longer assign are skipped.
+        Returns the written expenses' resulting category_id by expense ID.
+        """
+        if not results:
+            return {}
+
+        # Lock the rows to know which suggestions fill an empty category (moving their rollup buckets)
+        suggested = {expense_id: category_id for expense_id, category_id, _ in results}
+        current = db.execute(
+            select(*RollupRepository.expense_columns()).where(
+                Expense.user_id == user_id,
+                Expense.id.in_(suggested)
+            ).with_for_update()
+        ).all()
+
+        suggestions = values(
+            column("id", PGUUID(as_uuid=True)),
+            column("category_id", PGUUID(as_uuid=True)),
+            column("confidence", Float),
+            name="suggestions"
+        ).data(results)
+
+        written = dict(db.execute(
+            update(Expense).where(
+                Expense.id == suggestions.c.id,
+                Expense.user_id == user_id,
+                suggestions.c.category_id.in_(CategoryRepository.visible_ids(set(suggested.values()), user_id))
+            ).values(
+                ai_suggested_category_id=suggestions.c.category_id,
+                ai_confidence_score=suggestions.c.confidence,
+                ai_status="completed",
+                category_id=func.coalesce(Expense.category_id, suggestions.c.category_id)
+            ).returning(Expense.id, Expense.category_id).execution_options(synchronize_session=False)
+        ).all())
+        deltas = RollupDeltas()
+        for row in current:
+            if row.category_id is None and row.id in written:
+                before = RollupDeltas.snapshot(row)
+                deltas.move(before, {**before, "category_id": written[row.id]})
+        RollupRepository.apply(db, deltas)
+        if written:
+            UserRepository.bump_data_version(db, user_id)
+        db.commit()
+        return written
+
+    @staticmethod
+    def apply_batch(
+        db: Session,
+        user_id: UUID,
+        creates: list[dict],
+        updates: dict[UUID, dict],
+        deletes: set[UUID]
+    ) -> tuple[set[UUID], set[UUID], set[UUID]]:
+        """
+        Apply many writes in one transaction with set-based statements:
+        one multi-row INSERT, one executemany UPDATE per distinct set of updated
+        fields and one DELETE ... WHERE id IN (...), all scoped to the user.
+        Updates and deletes may target expenses created in the same batch.
+        Creates whose ID already exists are skipped (ON CONFLICT DO NOTHING), so a
+        replayed batch doesn't fail on them.
+        Returns the (created, updated, deleted) IDs; updated and deleted ones are
+        those that existed, the rest were not found.
+        Raises ValueError if a create reuses the ID of another user's expense.
+        Rolls back and re-raises on any database error.
+        """
+        try:
+            deltas = RollupDeltas()
+            created = set()
+            if creates:
+                rows = [{**row, "user_id": user_id} for row in creates]
+                created = set(db.scalars(
+                    pg_insert(Expense).on_conflict_do_nothing(index_elements=[Expense.id]).returning(Expense.id),
+                    rows
+                ))
+                for row in rows:
+                    if row["id"] in created:
+                        deltas.add(row)
+                replayed = {row["id"] for row in rows} - created
+                if replayed and db.scalar(
+                    select(func.count()).select_from(Expense).where(
+                        Expense.id.in_(replayed),
+                        Expense.user_id == user_id
+                    )
+                ) != len(replayed):
+                    raise ValueError("A created expense's id is already taken")
+
+            targets = set(updates) | deletes
+            current = {}
+            if targets:
+                # Locked, so the rollup deltas below are computed from the values being replaced
+                current = {row.id: row for row in db.execute(
+                    select(*RollupRepository.expense_columns()).where(
+                        Expense.user_id == user_id,
+                        Expense.id.in_(targets)
+                    ).with_for_update()
+                )}
+            existing = set(current)
+
+            # Group updates by the fields they set so each group is one executemany statement
+            groups: dict[tuple[str, ...], list[dict]] = {}
+            for expense_id, fields in updates.items():
+                if expense_id in existing and fields:
+                    if expense_id not in deletes:
+                        before = RollupDeltas.snapshot(current[expense_id])
+                        deltas.move(before, {**before, **fields})
+                    key = tuple(sorted(fields))
+                    groups.setdefault(key, []).append(
+                        {"b_id": expense_id, **{f"b_{name}": value for name, value in fields.items()}}
+                    )
+            for fields, rows in groups.items():
+                # Core executemany (not ORM bulk-by-primary-key) so the owner check stays in the WHERE
+                db.connection().execute(
+                    update(Expense).where(
+                        Expense.id == bindparam("b_id"),
+                        Expense.user_id == user_id
+                    ).values({name: bindparam(f"b_{name}") for name in fields}),
+                    rows
+                )
+
+            deleted = deletes & existing
+            if deleted:
+                db.execute(delete(Expense).where(Expense.user_id == user_id, Expense.id.in_(deleted)))
+                for expense_id in deleted:
+                    deltas.add(current[expense_id], -1)
+
+            RollupRepository.apply(db, deltas)
+
+            if created or existing:
+                UserRepository.bump_data_version(db, user_id)
             db.commit()
-            return True
-        return False
+        except Exception:
+            db.rollback()
+            raise
+
+        return created, set(updates) & existing, deleted
+
+    @staticmethod
+    def delete(db: Session, expense_id: UUID, user_id: UUID) -> bool:
+        """Delete an expense (DELETE ... RETURNING, only if it belongs to the user), see delete_statement"""
+        deleted = db.execute(ExpenseRepository.delete_statement(expense_id, user_id)).first()
+        db.commit()
+        return deleted is not None
@@ -0,0 +1,70 @@
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from app.models.refresh_token import RefreshToken
+
+
+class RefreshTokenRepository:
+    @staticmethod
+    def create(db: Session, user_id: UUID, token_hash: str, expires_at: datetime) -> RefreshToken:
+        """Store a new refresh token"""
+        db_token = RefreshToken(user_id=user_id, token_hash=token_hash, expires_at=expires_at)
+        db.add(db_token)
+        db.commit()
+        return db_token
+
+    @staticmethod
+    def get_by_hash(db: Session, token_hash: str) -> RefreshToken | None:
+        """Get a refresh token (live or not) by its hash"""
+        return db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).first()
+
+    @staticmethod
+    def rotate(db: Session, token_hash: str, new_token_hash: str, expires_at: datetime) -> UUID | None:
+        """
+        Revoke a live (unrevoked, unexpired) refresh token and store its replacement
+        in one transaction. The conditional UPDATE makes a token usable only once,
+        even under concurrent requests.
+        Returns the owner's user ID, or None if the token isn't live.
+        """
+        user_id = db.execute(
+            update(RefreshToken).where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > func.now()
+            ).values(revoked_at=func.now()).returning(RefreshToken.user_id),
+            execution_options={"synchronize_session": False}
+        ).scalar()
+        if user_id is None:
+            db.rollback()
+            return None
+
+        db.add(RefreshToken(user_id=user_id, token_hash=new_token_hash, expires_at=expires_at))
+        db.commit()
+        return user_id
+
+    @staticmethod
+    def revoke(db: Session, token_hash: str) -> bool:
+        """Revoke a live refresh token"""
+        result = db.execute(
+            update(RefreshToken).where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.revoked_at.is_(None)
+            ).values(revoked_at=func.now()),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    def revoke_all_for_user(db: Session, user_id: UUID) -> int:
+        """Revoke every live refresh token of a user"""
+        result = db.execute(
+            update(RefreshToken).where(
+                RefreshToken.user_id == user_id,
+                RefreshToken.revoked_at.is_(None)
+            ).values(revoked_at=func.now()),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+        return result.rowcount
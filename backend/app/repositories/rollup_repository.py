@@ -0,0 +1,296 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from uuid import UUID
+from sqlalchemy import CTE, Date, Row, Select, and_, cast, delete, desc, func, literal, null, or_, select, text, union_all
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import Session
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.expense_rollup import ExpenseMonthlyRollup
+
+ROLLUP_KEY = ("user_id", "month", "category_id", "payment_method")
+# Expense columns that determine which rollup bucket it counts towards, and how much
+EXPENSE_FIELDS = ("user_id", "expense_date", "category_id", "payment_method", "amount")
+
+
+class RollupDeltas:
+    """
+    Net changes to the monthly rollups made by one write. Expenses are added
+    (sign=1) or removed (sign=-1); an edit is removing the old values and adding
+    the new ones. Applied as a single upsert by RollupRepository.apply.
+    """
+
+    def __init__(self):
+        self.changes: defaultdict[tuple, list] = defaultdict(lambda: [Decimal(0), 0])
+
+    @staticmethod
+    def snapshot(expense) -> dict:
+        """The rollup-relevant values of an Expense or row (e.g. before it is modified)"""
+        return {field: getattr(expense, field) for field in EXPENSE_FIELDS}
+
+    def add(self, expense, sign: int = 1) -> "RollupDeltas":
+        """Count an expense (Expense, row or column dict) in (sign=1) or out of (sign=-1) its bucket"""
+        values = expense if isinstance(expense, dict) else RollupDeltas.snapshot(expense)
+        key = (
+            values["user_id"],
+            values["expense_date"].replace(day=1),
+            values.get("category_id"),
+            values["payment_method"]
+        )
+        change = self.changes[key]
+        change[0] += sign * Decimal(values["amount"])
+        change[1] += sign
+        return self
+
+    def move(self, before: dict, after) -> "RollupDeltas":
+        """Record an edit from a snapshot to the expense's new values"""
+        return self.add(before, -1).add(after)
+
+
+class RollupRepository:
+    @staticmethod
+    def expense_columns() -> tuple:
+        """Expense.id plus the rollup-relevant columns, for reading rows about to change"""
+        return (Expense.id,) + tuple(getattr(Expense, field) for field in EXPENSE_FIELDS)
+
+    @staticmethod
+    def month_of(expense_date):
+        """The rollup month (first day) of an expense date column"""
+        return cast(func.date_trunc("month", expense_date), Date)
+
+    @staticmethod
+    def add_to_buckets(stmt: Insert) -> Insert:
+        """ON CONFLICT clause of a rollup INSERT: add its total and count to existing buckets"""
+        return stmt.on_conflict_do_update(
+            index_elements=[getattr(ExpenseMonthlyRollup, column) for column in ROLLUP_KEY],
+            set_={
+                "total": ExpenseMonthlyRollup.total + stmt.excluded.total,
+                "count": ExpenseMonthlyRollup.count + stmt.excluded.count,
+            }
+        )
+
+    @staticmethod
+    def statements(deltas: RollupDeltas) -> list:
+        """
+        Statements applying the deltas: one multi-row INSERT ... ON CONFLICT DO UPDATE
+        adding to existing buckets, then (if anything was removed) dropping buckets
+        that became empty.
+        """
+        rows = [
+            {**dict(zip(ROLLUP_KEY, key)), "total": total, "count": count}
+            for key, (total, count) in deltas.changes.items()
+            if total or count
+        ]
+        if not rows:
+            return []
+
+        statements = [RollupRepository.add_to_buckets(insert(ExpenseMonthlyRollup).values(rows))]
+
+        emptied_users = {row["user_id"] for row in rows if row["count"] < 0}
+        if emptied_users:
+            statements.append(delete(ExpenseMonthlyRollup).where(
+                ExpenseMonthlyRollup.user_id.in_(emptied_users),
+                ExpenseMonthlyRollup.count <= 0
+            ))
+        return statements
+
+    @staticmethod
+    def bucket_change(columns, sign: int = 1, prefix: str = "") -> Select:
+        """
+        SELECT of the change counting one written expense in (sign=1) or out of (sign=-1)
+        its bucket, from the columns of a RETURNING CTE (prefix="old_" for its previous values)
+        """
+        user_id, expense_date, category_id, payment_method, amount = (
+            columns[prefix + field] for field in EXPENSE_FIELDS
+        )
+        return select(
+            user_id.label("user_id"),
+            RollupRepository.month_of(expense_date).label("month"),
+            category_id.label("category_id"),
+            payment_method.label("payment_method"),
+            (amount if sign > 0 else -amount).label("total"),
+            literal(sign).label("count")
+        )
+
+    @staticmethod
+    def delta_cte(*changes: Select) -> CTE:
+        """
+        The rollup upsert as a CTE, to apply bucket_change()s in the same statement as
+        the expense write they come from. Changes to one bucket are summed first (one
+        statement can't update a row twice) and dropped if they cancel out.
+        A bucket whose last expense is removed is kept with count 0.
+        """
+        changed = union_all(*changes).subquery("changes") if len(changes) > 1 else changes[0].subquery("changes")
+        total, count = func.sum(changed.c.total), func.sum(changed.c.count)
+        key = [changed.c[column] for column in ROLLUP_KEY]
+        source = select(*key, total, count).group_by(*key).having(or_(total != 0, count != 0))
+        return RollupRepository.add_to_buckets(
+            insert(ExpenseMonthlyRollup).from_select([*ROLLUP_KEY, "total", "count"], source)
+        ).cte("rollup_delta")
+
+    @staticmethod
+    def apply(db: Session, deltas: RollupDeltas) -> None:
+        """Apply rollup deltas (in the caller's transaction, not committed)"""
+        for stmt in RollupRepository.statements(deltas):
+            db.execute(stmt)
+
+    @staticmethod
+    def merge_into_uncategorized_cte(category_id: UUID) -> CTE:
+        """
+        Move a category's buckets to uncategorized, as a CTE to run in the statement
+        that deletes the category (its expenses' category_id is set to NULL), with the
+        category row already locked so no expense can be added to it in between.
+        The buckets are deleted and their (latest) totals added to the uncategorized
+        ones together, so concurrent changes to them can't be lost in between.
+        """
+        moved = delete(ExpenseMonthlyRollup).where(
+            ExpenseMonthlyRollup.category_id == category_id
+        ).returning(
+            ExpenseMonthlyRollup.user_id,
+            ExpenseMonthlyRollup.month,
+            ExpenseMonthlyRollup.payment_method,
+            ExpenseMonthlyRollup.total,
+            ExpenseMonthlyRollup.count
+        ).cte("moved")
+
+        source = select(moved.c.user_id, moved.c.month, null(), moved.c.payment_method, moved.c.total, moved.c.count)
+        return RollupRepository.add_to_buckets(
+            insert(ExpenseMonthlyRollup).from_select([*ROLLUP_KEY, "total", "count"], source)
+        ).cte("merged")
+
+    @staticmethod
+    def aggregate_expenses(user_id: UUID | None = None) -> Select:
+        """The rollup rows computed from scratch from expenses (all users, or one)"""
+        month = RollupRepository.month_of(Expense.expense_date)
+        stmt = select(
+            Expense.user_id,
+            month.label("month"),
+            Expense.category_id,
+            Expense.payment_method,
+            func.sum(Expense.amount).label("total"),
+            func.count(Expense.id).label("count")
+        ).group_by(Expense.user_id, "month", Expense.category_id, Expense.payment_method)
+        if user_id:
+            stmt = stmt.where(Expense.user_id == user_id)
+        return stmt
+
+    @staticmethod
+    def rebuild(db: Session, user_id: UUID | None = None) -> int:
+        """
+        Recompute the rollups from expenses (all users, or one) and commit.
+        The table is locked against concurrent rollup writes for the duration,
+        so expense writes wait and then apply their deltas on top of the result.
+        Returns the number of buckets written.
+        """
+        try:
+            db.execute(text(f"LOCK TABLE {ExpenseMonthlyRollup.__tablename__} IN EXCLUSIVE MODE"))
+            clear = delete(ExpenseMonthlyRollup)
+            if user_id:
+                clear = clear.where(ExpenseMonthlyRollup.user_id == user_id)
+            db.execute(clear)
+            result = db.execute(insert(ExpenseMonthlyRollup).from_select(
+                [*ROLLUP_KEY, "total", "count"], RollupRepository.aggregate_expenses(user_id)
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return result.rowcount
+
+    @staticmethod
+    def find_mismatches(db: Session, user_id: UUID | None = None) -> list[Row]:
+        """
+        Buckets where the stored rollup differs from a fresh aggregation of expenses
+        (missing on either side, or a different total/count).
+        Rows: user_id, month, category_id, payment_method, stored_total, stored_count,
+        expected_total, expected_count.
+        """
+        expected = RollupRepository.aggregate_expenses(user_id).subquery()
+        # Emptied buckets (count 0, total 0) are kept on purpose and aren't mismatches
+        stored = select(ExpenseMonthlyRollup).where(
+            or_(ExpenseMonthlyRollup.count != 0, ExpenseMonthlyRollup.total != 0)
+        )
+        if user_id:
+            stored = stored.where(ExpenseMonthlyRollup.user_id == user_id)
+        stored = stored.subquery()
+
+        same_bucket = and_(
+            stored.c.user_id == expected.c.user_id,
+            stored.c.month == expected.c.month,
+            stored.c.category_id.is_not_distinct_from(expected.c.category_id),
+            stored.c.payment_method == expected.c.payment_method
+        )
+        return db.execute(
+            select(
+                *(func.coalesce(stored.c[column], expected.c[column]).label(column) for column in ROLLUP_KEY),
+                stored.c.total.label("stored_total"),
+                stored.c.count.label("stored_count"),
+                expected.c.total.label("expected_total"),
+                expected.c.count.label("expected_count")
+            ).select_from(
+                stored.join(expected, same_bucket, full=True)
+            ).where(or_(
+                stored.c.total.is_distinct_from(expected.c.total),
+                stored.c.count.is_distinct_from(expected.c.count)
+            ))
+        ).all()
+
+    @staticmethod
+    def covers(date_from: date | None, date_to: date | None, granularity: str) -> bool:
+        """Whether a summary can be answered from the rollups: monthly buckets over whole months"""
+        return (
+            granularity == "month"
+            and (date_from is None or date_from.day == 1)
+            and (date_to is None or (date_to + timedelta(days=1)).day == 1)
+        )
+
+    @staticmethod
+    def summary_statements(
+        user_id: UUID,
+        date_from: date | None = None,
+        date_to: date | None = None
+    ) -> tuple[Select, Select, Select, Select]:
+        """
+        The (totals, by category, by payment method, by month) summary queries over
+        the rollups, with the same result shapes as ExpenseRepository.summary_statements.
+        """
+        # Buckets whose expenses were all removed stay behind with count 0
+        filters = [ExpenseMonthlyRollup.user_id == user_id, ExpenseMonthlyRollup.count != 0]
+        if date_from:
+            filters.append(ExpenseMonthlyRollup.month >= date_from)
+        if date_to:
+            filters.append(ExpenseMonthlyRollup.month <= date_to.replace(day=1))
+
+        total_sum = func.coalesce(func.sum(ExpenseMonthlyRollup.total), 0)
+        row_count = func.coalesce(func.sum(ExpenseMonthlyRollup.count), 0)
+
+        totals = select(total_sum, row_count).where(*filters)
+
+        by_category = select(
+            ExpenseMonthlyRollup.category_id,
+            Category.name,
+            Category.color,
+            total_sum.label("total"),
+            row_count.label("count")
+        ).outerjoin(
+            Category, Category.id == ExpenseMonthlyRollup.category_id
+        ).where(*filters).group_by(
+            ExpenseMonthlyRollup.category_id, Category.name, Category.color
+        ).order_by(desc("total"))
+
+        by_payment_method = select(
+            ExpenseMonthlyRollup.payment_method,
+            total_sum.label("total"),
+            row_count.label("count")
+        ).where(*filters).group_by(
+            ExpenseMonthlyRollup.payment_method
+        ).order_by(desc("total"))
+
+        by_period = select(
+            ExpenseMonthlyRollup.month.label("period_start"),
+            total_sum.label("total"),
+            row_count.label("count")
+        ).where(*filters).group_by(ExpenseMonthlyRollup.month).order_by(ExpenseMonthlyRollup.month)
+
+        return totals, by_category, by_payment_method, by_period
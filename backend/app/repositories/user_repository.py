@@ -1,21 +1,25 @@
 from uuid import UUID
+from sqlalchemy import CTE, Update, delete, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
+from app.database import commit_detached
+from app.models.category_version import CategoryVersion
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
 
 class UserRepository:
     @staticmethod
-    def create(db: Session, user: UserCreate, hashed_password: str) -> User:
-        """Create a new user"""
-        db_user = User(
-            email=user.email,
-            full_name=user.full_name,
-            hashed_password=hashed_password
-        )
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+    def create(db: Session, user: UserCreate, hashed_password: str) -> User | None:
+        """Create a new user in one INSERT ... RETURNING; None if the email is already registered"""
+        db_user = db.scalars(
+            insert(User).values(
+                email=user.email,
+                full_name=user.full_name,
+                hashed_password=hashed_password
+            ).on_conflict_do_nothing(index_elements=[User.email]).returning(User)
+        ).first()
+        commit_detached(db, db_user)
         return db_user
 
     @staticmethod
@@ -30,26 +34,65 @@ class UserRepository:
 
     @staticmethod
     def update(db: Session, user_id: UUID, user_update: UserUpdate, hashed_password: str | None = None) -> User | None:
-        """Update a user"""
-        db_user = UserRepository.get_by_id(db, user_id)
-        if db_user:
-            update_data = user_update.model_dump(exclude_unset=True, exclude={"password"})
-            for field, value in update_data.items():
-                setattr(db_user, field, value)
-
-            if hashed_password:
-                db_user.hashed_password = hashed_password
-
-            db.commit()
-            db.refresh(db_user)
+        """Update a user in one UPDATE ... RETURNING"""
+        update_data = user_update.model_dump(exclude_unset=True, exclude={"password"})
+        if hashed_password:
+            update_data["hashed_password"] = hashed_password
+        if not update_data:
+            return UserRepository.get_by_id(db, user_id)
+
+        db_user = db.scalars(
+            update(User).where(User.id == user_id).values(**update_data).returning(User),
+            execution_options={"populate_existing": True}
+        ).first()
+        commit_detached(db, db_user)
         return db_user
 
     @staticmethod
     def delete(db: Session, user_id: UUID) -> bool:
-        """Delete a user"""
-        db_user = UserRepository.get_by_id(db, user_id)
-        if db_user:
-            db.delete(db_user)
-            db.commit()
-            return True
-        return False
+        """Delete a user in one DELETE (their categories, expenses and tokens go with it via ON DELETE CASCADE)"""
+        deleted = db.execute(
+            delete(User).where(User.id == user_id).returning(User.id)
+        ).first()
+        db.commit()
+        return deleted is not None
+
+    @staticmethod
+    def data_version_bump(user_id: UUID) -> Update:
+        """
+        UPDATE statement that moves a user's data version forward.
+        updated_at is pinned to its current value: the bump records a change to the
+        user's expenses/categories, not to the user row (whose onupdate would fire otherwise).
+        """
+        return update(User).where(User.id == user_id).values(
+            data_version=User.data_version + 1,
+            updated_at=User.updated_at
+        ).execution_options(synchronize_session=False)
+
+    @staticmethod
+    def data_version_bump_cte(user_id: UUID, written: CTE) -> CTE:
+        """
+        The data version bump as a CTE, to run in the same statement as a write:
+        applied only if the write's RETURNING CTE produced a row.
+        """
+        return UserRepository.data_version_bump(user_id).where(
+            select(written.c.id).exists()
+        ).cte("version_bump")
+
+    @staticmethod
+    def bump_data_version(db: Session, user_id: UUID) -> None:
+        """Mark a user's expenses/categories as changed (in the caller's transaction, not committed)"""
+        db.execute(UserRepository.data_version_bump(user_id))
+
+    @staticmethod
+    def data_versions_query(user_id: UUID):
+        """SELECT of (user data version, default categories version) for one user"""
+        default_version = select(CategoryVersion.version).where(
+            CategoryVersion.scope == "default"
+        ).scalar_subquery()
+        return select(User.data_version, default_version).where(User.id == user_id)
+
+    @staticmethod
+    def get_data_versions(db: Session, user_id: UUID) -> tuple[int, int | None] | None:
+        """(user data version, default categories version), or None if the user doesn't exist"""
+        return db.execute(UserRepository.data_versions_query(user_id)).first()
@@ -0,0 +1,26 @@
+from decimal import Decimal
+from uuid import UUID
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value):
+    # Same wire format as the Pydantic responses: decimals as strings
+    if isinstance(value, Decimal):
+        return str(value)
+    # orjson only encodes uuid.UUID itself, not subclasses like asyncpg's UUID
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson, which natively handles UUID, date and
+    datetime values. Routes return it with plain dicts to skip response_model
+    validation and jsonable_encoder entirely.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
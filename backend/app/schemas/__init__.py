@@ -1,6 +1,11 @@
 from app.schemas.user import UserCreate, UserUpdate, UserInDB, User
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryInDB, Category
-from app.schemas.expense import ExpenseCreate, ExpenseUpdate, ExpenseInDB, Expense, ExpenseList
+from app.schemas.expense import (
+    ExpenseCreate, ExpenseUpdate, ExpenseInDB, Expense, ExpenseList, ExpenseCursorPage, ExpenseSummary,
+    ExpenseCategorizationStatus, ExpenseCategorizeRequest, ExpenseCategorizeItem, ExpenseCategorizeResult,
+    ExpenseImportError, ExpenseImportResult, ExpenseBatchCreate, ExpenseBatchUpdate, ExpenseBatchDelete,
+    ExpenseBatchRequest, ExpenseBatchItemResult, ExpenseBatchResult
+)
 
 __all__ = [
     "UserCreate",
@@ -16,4 +21,18 @@ __all__ = [
     "ExpenseInDB",
     "Expense",
     "ExpenseList",
+    "ExpenseCursorPage",
+    "ExpenseSummary",
+    "ExpenseCategorizationStatus",
+    "ExpenseCategorizeRequest",
+    "ExpenseCategorizeItem",
+    "ExpenseCategorizeResult",
+    "ExpenseImportError",
+    "ExpenseImportResult",
+    "ExpenseBatchCreate",
+    "ExpenseBatchUpdate",
+    "ExpenseBatchDelete",
+    "ExpenseBatchRequest",
+    "ExpenseBatchItemResult",
+    "ExpenseBatchResult",
 ]
@@ -5,6 +5,7 @@ class Token(BaseModel):
     """JWT token response"""
     access_token: str
     token_type: str
+    refresh_token: str | None = None
 
 
 class TokenData(BaseModel):
@@ -16,3 +17,8 @@ class LoginRequest(BaseModel):
     """Login credentials"""
     email: str
     password: str
+
+
+class RefreshRequest(BaseModel):
+    """Refresh token to exchange (or revoke)"""
+    refresh_token: str
@@ -1,5 +1,6 @@
 from datetime import date, datetime
 from decimal import Decimal
+from typing import Annotated, Literal
 from uuid import UUID
 from pydantic import BaseModel, Field, ConfigDict
 from app.schemas.category import Category
@@ -39,6 +40,7 @@ class ExpenseInDB(ExpenseBase):
     category_id: UUID | None
     ai_suggested_category_id: UUID | None
     ai_confidence_score: float | None
+    ai_status: str | None = None
     created_at: datetime
     updated_at: datetime
 
@@ -53,10 +55,125 @@ class Expense(ExpenseBase):
     ai_suggested_category_id: UUID | None
     ai_suggested_category: Category | None = None
     ai_confidence_score: float | None
+    ai_status: str | None = None
     created_at: datetime
     updated_at: datetime
 
 
+class ExpenseFilters(BaseModel):
+    """Filters for expense listings (all optional, combined with AND)"""
+    date_from: date | None = None
+    date_to: date | None = None
+    min_amount: Decimal | None = None
+    max_amount: Decimal | None = None
+    payment_methods: list[str] = []
+    category_ids: list[UUID] = []
+    uncategorized: bool = False  # Matches expenses without a category (OR'ed with category_ids)
+
+
+class ExpenseCategorizationStatus(BaseModel):
+    """Schema for polling the background AI categorization of an expense"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    ai_status: str | None
+    category_id: UUID | None
+    ai_suggested_category_id: UUID | None
+    ai_confidence_score: float | None
+
+
+class ExpenseCategorizeRequest(BaseModel):
+    """Schema for batch categorization: explicit IDs, or every uncategorized expense"""
+    expense_ids: list[UUID] | None = Field(None, max_length=1000)
+    all_uncategorized: bool = False
+
+
+class ExpenseCategorizeItem(BaseModel):
+    """Categorization result for a single expense"""
+    expense_id: UUID
+    category_id: UUID | None
+    confidence: float
+    source: Literal["local", "llm", "none"]
+
+
+class ExpenseCategorizeResult(BaseModel):
+    """Schema for batch categorization results and throughput"""
+    requested: int
+    categorized: int
+    items: list[ExpenseCategorizeItem]
+    llm_requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    elapsed_seconds: float
+    expenses_per_second: float
+    expenses_per_1k_tokens: float | None
+
+
+class ExpenseImportError(BaseModel):
+    """A row that could not be imported"""
+    row: int
+    error: str
+
+
+class ExpenseImportResult(BaseModel):
+    """Schema for a bank statement import report"""
+    imported: int
+    skipped: int
+    error_count: int
+    errors: list[ExpenseImportError]
+    categorized: int | None = None
+
+
+class ExpenseBatchCreate(BaseModel):
+    """
+    Batch operation: create an expense. The id may be client-generated for
+    idempotent sync: replaying the create of an existing expense reports "exists".
+    """
+    op: Literal["create"]
+    id: UUID | None = None
+    data: ExpenseCreate
+
+
+class ExpenseBatchUpdate(BaseModel):
+    """Batch operation: update an expense"""
+    op: Literal["update"]
+    id: UUID
+    data: ExpenseUpdate
+
+
+class ExpenseBatchDelete(BaseModel):
+    """Batch operation: delete an expense"""
+    op: Literal["delete"]
+    id: UUID
+
+
+ExpenseBatchOperation = Annotated[
+    ExpenseBatchCreate | ExpenseBatchUpdate | ExpenseBatchDelete,
+    Field(discriminator="op")
+]
+
+
+class ExpenseBatchRequest(BaseModel):
+    """
+    Schema for a batch of expense writes applied in a single transaction.
+    Operations on one expense must be a create, then updates, then a delete.
+    """
+    operations: list[ExpenseBatchOperation] = Field(..., min_length=1, max_length=500)
+
+
+class ExpenseBatchItemResult(BaseModel):
+    """Result of a single batch operation"""
+    index: int
+    op: Literal["create", "update", "delete"]
+    id: UUID
+    status: Literal["created", "exists", "updated", "deleted", "not_found"]
+
+
+class ExpenseBatchResult(BaseModel):
+    """Schema for batch results (same order as the request)"""
+    results: list[ExpenseBatchItemResult]
+
+
 class ExpenseList(BaseModel):
     """Schema for paginated expense list"""
     items: list[Expense]
@@ -64,3 +181,72 @@ class ExpenseList(BaseModel):
     page: int
     page_size: int
     total_pages: int
+
+
+class ExpenseCursorPage(BaseModel):
+    """Schema for a keyset-paginated expense list"""
+    items: list[Expense]
+    next_cursor: str | None = None
+    page_size: int
+    total: int | None = None
+
+
+class ExpenseCompact(ExpenseBase):
+    """Expense in the compact list format: categories are referenced by ID only"""
+    id: UUID
+    category_id: UUID | None
+    ai_suggested_category_id: UUID | None
+    ai_confidence_score: float | None
+    ai_status: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class ExpenseCompactPage(BaseModel):
+    """
+    Schema for an expense list in the compact format (format=compact).
+    Each category referenced on the page is included once in `categories`, keyed by ID.
+    Offset pages set total/page/total_pages, cursor pages set next_cursor.
+    """
+    items: list[ExpenseCompact]
+    categories: dict[UUID, Category]
+    page_size: int
+    total: int | None = None
+    page: int | None = None
+    total_pages: int | None = None
+    next_cursor: str | None = None
+
+
+class CategoryTotal(BaseModel):
+    """Spending total for a single category (category_id is None for uncategorized)"""
+    category_id: UUID | None
+    name: str | None = None
+    color: str | None = None
+    total: Decimal
+    count: int
+
+
+class PaymentMethodTotal(BaseModel):
+    """Spending total for a single payment method"""
+    payment_method: str
+    total: Decimal
+    count: int
+
+
+class PeriodTotal(BaseModel):
+    """Spending total for a day/week/month bucket"""
+    period_start: date
+    total: Decimal
+    count: int
+
+
+class ExpenseSummary(BaseModel):
+    """Schema for aggregated spending over a date range"""
+    date_from: date | None = None
+    date_to: date | None = None
+    granularity: Literal["day", "week", "month"]
+    total: Decimal
+    count: int
+    by_category: list[CategoryTotal]
+    by_payment_method: list[PaymentMethodTotal]
+    by_period: list[PeriodTotal]
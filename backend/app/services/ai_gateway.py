@@ -0,0 +1,174 @@
+from functools import lru_cache
+import threading
+import time
+
+import httpx
+from openai import (
+    OpenAI,
+    DefaultHttpxClient,
+    APIConnectionError,
+    RateLimitError,
+    InternalServerError,
+)
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Errors that indicate the provider is degraded (timeouts are APIConnectionErrors too)
+PROVIDER_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+class AIProviderError(RuntimeError):
+    """Raised when the AI provider is unavailable (circuit open, timeout, connection error, 429 or 5xx)"""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half_open" """
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to the provider"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: only one trial call at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class AIGateway:
+    """
+    Process-wide gateway to the OpenAI API.
+    Holds a pooled HTTP client (created lazily), applies per-call timeouts and
+    a bounded retry budget, and fails fast with AIProviderError while the
+    circuit breaker is open. Provider calls are blocking; async code runs them
+    on the threadpool.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None = None,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_retries: int = 2,
+        max_connections: int = 20,
+        breaker: CircuitBreaker | None = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.breaker = breaker or CircuitBreaker()
+        self._client: OpenAI | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> OpenAI:
+        """Shared sync client (connection pool reused across requests and threads)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = OpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        timeout=self.timeout,
+                        max_retries=self.max_retries,
+                        http_client=DefaultHttpxClient(limits=self.limits, timeout=self.timeout)
+                    )
+        return self._client
+
+    def complete(self, messages: list[dict], model: str = "gpt-4o-mini", **kwargs) -> str | None:
+        """
+        Run a chat completion and return the response text.
+        Raises AIProviderError if the circuit is open or the provider call failed.
+        """
+        text, _ = self.complete_with_usage(messages, model, **kwargs)
+        return text
+
+    def complete_with_usage(self, messages: list[dict], model: str = "gpt-4o-mini", **kwargs) -> tuple[str | None, dict]:
+        """Like complete(), but also return token usage ({"prompt_tokens": ..., "completion_tokens": ...})"""
+        if not self.breaker.allow_request():
+            raise AIProviderError("AI provider circuit is open")
+        try:
+            response = self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+        except PROVIDER_ERRORS as e:
+            self.breaker.record_failure()
+            raise AIProviderError(f"AI provider error (circuit {self.breaker.state}): {e}") from e
+        except Exception:
+            # The provider answered (e.g. a 4xx), so it is not degraded
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        usage = {}
+        if response.usage:
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+            }
+        return response.choices[0].message.content, usage
+
+    def close(self) -> None:
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+@lru_cache()
+def get_ai_gateway() -> AIGateway:
+    """Process-wide AI gateway configured from settings"""
+    if not settings.OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY not configured")
+    return AIGateway(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        timeout=settings.AI_TIMEOUT_SECONDS,
+        connect_timeout=settings.AI_CONNECT_TIMEOUT_SECONDS,
+        max_retries=settings.AI_MAX_RETRIES,
+        max_connections=settings.AI_MAX_CONNECTIONS,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.AI_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.AI_CIRCUIT_RESET_SECONDS
+        )
+    )
@@ -1,22 +1,52 @@
-from openai import OpenAI
 from uuid import UUID
 from sqlalchemy.orm import Session
 from decimal import Decimal
 import json
 
+from app.services.ai_gateway import get_ai_gateway
+from app.services.categorization_cache import get_categorization_cache
+from app.services.category_cache import get_category_cache
+from app.services.local_classifier import get_local_classifier
+from app.services.prompt_context import get_prompt_context_store
 from app.config import get_settings
-from app.repositories.category_repository import CategoryRepository
-from app.repositories.expense_repository import ExpenseRepository
 
 settings = get_settings()
 
+SYSTEM_PROMPT = """You are a helpful assistant that categorizes expenses. Always respond with valid JSON.
+
+You are categorizing an expense for a user. Learn from their past categorization patterns.
+Based on the user's past categorization patterns and the expense details, decide which category fits best.
+
+Respond ONLY with a JSON object in this exact format:
+{"category": "exact category name", "confidence": 0.95}
+
+The category must be one from the available categories list. Confidence should be 0.0-1.0."""
+
+BATCH_SYSTEM_PROMPT = """You are a helpful assistant that categorizes expenses. Always respond with valid JSON.
+
+You are categorizing a numbered list of expenses for a user. Learn from their past categorization patterns.
+For every expense, decide which of the available categories fits best.
+
+Respond ONLY with a JSON object in this exact format, with one result per expense number:
+{"results": [{"n": 1, "category": "exact category name", "confidence": 0.95}]}
+
+Categories must be from the available categories list. Confidence should be 0.0-1.0."""
+
+
+def _extract_json(response_text: str) -> dict:
+    """Parse a JSON object from a model response, tolerating ```json fences"""
+    response_text = response_text.strip()
+    if "```json" in response_text:
+        response_text = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        response_text = response_text.split("```")[1].split("```")[0].strip()
+    return json.loads(response_text)
+
 
 class AIService:
     def __init__(self):
-        """Initialize OpenAI client"""
-        if not settings.OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY not configured")
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        """Use the process-wide AI gateway (pooled client, timeouts, circuit breaker)"""
+        self.gateway = get_ai_gateway()
 
     def categorize_expense(
         self,
@@ -36,94 +66,145 @@ class AIService:
 
         Returns:
             Tuple of (suggested_category_id, confidence_score)
+
+        Raises:
+            AIProviderError: If the provider is unavailable, so callers can retry later
         """
-        # Get available categories
-        categories = CategoryRepository.get_all(db, user_id=user_id, skip=0, limit=100)
-        if not categories:
+        # Most expenses are predictable from the user's own history: only ask the LLM when unsure
+        if settings.AI_LOCAL_CLASSIFIER_ENABLED:
+            category_id, confidence = get_local_classifier().predict(db, user_id, description, amount)
+            if category_id and confidence >= settings.AI_LOCAL_CLASSIFIER_MIN_CONFIDENCE:
+                return category_id, confidence
+
+        # Repeated descriptions ("Starbucks", "Uber") are answered from the cache,
+        # and concurrent identical requests share one LLM call
+        cache = get_categorization_cache()
+        return cache.get_or_compute(
+            cache.make_key(user_id, get_category_cache().versions(db, user_id), description, amount),
+            lambda: self._categorize_uncached(db, description, amount, user_id),
+            # Provider failures raise and are never cached; don't cache "no suggestion" either
+            # (e.g. an answer that didn't parse), so the next identical expense asks again
+            cacheable=lambda result: result[0] is not None
+        )
+
+    def _categorize_uncached(
+        self,
+        db: Session,
+        description: str,
+        amount: Decimal,
+        user_id: UUID
+    ) -> tuple[UUID | None, float]:
+        """Ask the LLM for a category (see categorize_expense)"""
+        # Category and example blocks are precomputed per user and kept up to date on writes
+        context = get_prompt_context_store().get(db, user_id)
+        if not context.categories:
             return None, 0.0
 
-        # Get user's recent expenses to learn from their patterns
-        recent_expenses, _ = ExpenseRepository.get_all(db, user_id=user_id, skip=0, limit=50)
-
-        # Build examples from user's past expenses
-        examples = []
-        for expense in recent_expenses:
-            if expense.category:
-                examples.append({
-                    "description": expense.description,
-                    "amount": float(expense.amount),
-                    "category": expense.category.name
-                })
-
-        # Build category list
-        category_names = [cat.name for cat in categories]
-        category_details = {
-            cat.name: cat.description or "No description"
-            for cat in categories
-        }
-
-        # Create enriched prompt with learning examples
         examples_text = ""
-        if examples:
-            examples_text = "\n\nPast expenses from this user:\n" + "\n".join([
-                f"- \"{ex['description']}\" (${ex['amount']:.2f}) → {ex['category']}"
-                for ex in examples[:20]  # Limit to 20 most recent
-            ])
-
-        categories_text = "\n".join([
-            f"- {name}: {category_details[name]}"
-            for name in category_names
-        ])
+        if context.examples_text:
+            examples_text = "\n\nPast expenses from this user:\n" + context.examples_text
 
-        prompt = f"""You are categorizing an expense for a user. Learn from their past categorization patterns.
-
-Available categories:
-{categories_text}
+        # Stable parts first (instructions, then the user's categories and examples) so
+        # provider-side prompt caching can reuse the prefix; the new expense goes last
+        prompt = f"""Available categories:
+{context.categories_text}
 {examples_text}
 
 New expense to categorize:
 - Description: {description}
-- Amount: ${float(amount):.2f}
+- Amount: ${float(amount):.2f}"""
+
+        # Provider failures (AIProviderError) propagate: they are not "no suggestion"
+        response_text = self.gateway.complete(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=150
+        )
+        if not response_text:
+            return None, 0.0
 
-Based on the user's past categorization patterns and the expense details, which category fits best?
+        try:
+            result = _extract_json(response_text)
+            suggested_name = str(result.get("category", "")).strip()
+            confidence = float(result.get("confidence", 0.0))
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"AI categorization error: unexpected response {response_text!r}: {e}")
+            return None, 0.0
 
-Respond ONLY with a JSON object in this exact format:
-{{"category": "exact category name", "confidence": 0.95}}
+        # Find matching category
+        category_id = context.match_category(suggested_name)
+        if category_id:
+            return category_id, confidence
 
-The category must be one from the available categories list. Confidence should be 0.0-1.0."""
+        return None, 0.0
+
+    def categorize_batch(
+        self,
+        db: Session,
+        expenses: list[tuple[UUID, str, Decimal]],
+        user_id: UUID
+    ) -> tuple[dict[UUID, tuple[UUID, float]], dict]:
+        """
+        Categorize many expenses with a single LLM request.
+
+        Args:
+            db: Database session
+            expenses: List of (expense_id, description, amount)
+            user_id: User ID
+
+        Returns:
+            Tuple of ({expense_id: (category_id, confidence)}, token usage)
+        """
+        context = get_prompt_context_store().get(db, user_id)
+        if not context.categories or not expenses:
+            return {}, {}
+
+        examples_text = ""
+        if context.examples_text:
+            examples_text = "\n\nPast expenses from this user:\n" + context.examples_text
+
+        # Expenses are numbered instead of sending UUIDs to keep the prompt small
+        expenses_text = "\n".join(
+            f"{n}. {description} (${float(amount):.2f})"
+            for n, (_, description, amount) in enumerate(expenses, start=1)
+        )
+        prompt = f"""Available categories:
+{context.categories_text}
+{examples_text}
+
+Expenses to categorize:
+{expenses_text}"""
 
         try:
-            response = self.client.chat.completions.create(
+            response_text, usage = self.gateway.complete_with_usage(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "You are a helpful assistant that categorizes expenses. Always respond with valid JSON."},
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=150
+                max_tokens=40 * len(expenses) + 50,
+                response_format={"type": "json_object"}
             )
-
-            response_text = response.choices[0].message.content.strip()
-
-            # Extract JSON from response
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(response_text)
-            suggested_name = result.get("category", "").strip()
-            confidence = float(result.get("confidence", 0.0))
-
-            # Find matching category
-            for category in categories:
-                if category.name.lower() == suggested_name.lower():
-                    return category.id, confidence
-
-            return None, 0.0
+            if not response_text:
+                return {}, usage
+
+            results = {}
+            for item in _extract_json(response_text).get("results", []):
+                n = int(item.get("n", 0))
+                if not 1 <= n <= len(expenses):
+                    continue
+                category_id = context.match_category(str(item.get("category", "")))
+                if category_id:
+                    results[expenses[n - 1][0]] = (category_id, float(item.get("confidence", 0.0)))
+            return results, usage
 
         except Exception as e:
-            print(f"AI categorization error: {e}")
+            print(f"AI batch categorization error: {e}")
             import traceback
             traceback.print_exc()
-            return None, 0.0
+            return {}, {}
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from functools import lru_cache
+from uuid import UUID
+import threading
+import time
+
+from app.config import get_settings
+from app.models.user import User
+
+settings = get_settings()
+
+
+class AuthCache:
+    """
+    Thread-safe LRU/TTL caches used by the auth dependencies:
+    verified token -> user ID (never kept past the token's own expiry) and
+    user ID -> user row (a detached instance, column attributes only).
+    Deleted users are remembered until any token issued to them has expired,
+    so token-only checks keep rejecting them.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0, token_lifetime: float = 1800.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.token_lifetime = token_lifetime
+        self.token_hits = 0
+        self.token_misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self._tokens: OrderedDict[str, tuple[float, UUID]] = OrderedDict()
+        self._users: OrderedDict[UUID, tuple[float, User]] = OrderedDict()
+        self._revoked: dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, entries: OrderedDict, key):
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return entry[1]
+
+    def _set(self, entries: OrderedDict, key, value, ttl: float) -> None:
+        entries[key] = (time.monotonic() + ttl, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def get_token_user_id(self, token: str) -> UUID | None:
+        """User ID of an already verified, unexpired token, or None"""
+        with self._lock:
+            user_id = self._get(self._tokens, token)
+            if user_id is None:
+                self.token_misses += 1
+            else:
+                self.token_hits += 1
+            return user_id
+
+    def set_token(self, token: str, user_id: UUID, expires_at: float) -> None:
+        """Remember a verified token until min(ttl, its exp claim as a UNIX timestamp)"""
+        ttl = min(self.ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._set(self._tokens, token, user_id, ttl)
+
+    def get_user(self, user_id: UUID) -> User | None:
+        with self._lock:
+            user = self._get(self._users, user_id)
+            if user is None:
+                self.user_misses += 1
+            else:
+                self.user_hits += 1
+            return user
+
+    def set_user(self, user: User) -> None:
+        with self._lock:
+            self._set(self._users, user.id, user, self.ttl)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop a cached user row (e.g. after the user is updated)"""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def revoke_user(self, user_id: UUID) -> None:
+        """Forget a deleted user and reject their tokens until they have expired"""
+        now = time.monotonic()
+        with self._lock:
+            self._users.pop(user_id, None)
+            for token in [token for token, (_, uid) in self._tokens.items() if uid == user_id]:
+                del self._tokens[token]
+            self._revoked = {uid: until for uid, until in self._revoked.items() if until > now}
+            self._revoked[user_id] = now + self.token_lifetime
+
+    def is_revoked(self, user_id: UUID) -> bool:
+        with self._lock:
+            until = self._revoked.get(user_id)
+            return until is not None and until > time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tokens": len(self._tokens),
+                "users": len(self._users),
+                "token_hits": self.token_hits,
+                "token_misses": self.token_misses,
+                "user_hits": self.user_hits,
+                "user_misses": self.user_misses,
+            }
+
+
+@lru_cache()
+def get_auth_cache() -> AuthCache:
+    """Process-wide auth cache"""
+    return AuthCache(
+        max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+        ttl=settings.AUTH_CACHE_TTL_SECONDS,
+        token_lifetime=settings.JWT_EXPIRE_MINUTES * 60
+    )
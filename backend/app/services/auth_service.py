@@ -1,8 +1,12 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from uuid import UUID
+import hashlib
+import secrets
+from sqlalchemy.orm import Session
 from app.config import get_settings
+from app.repositories.refresh_token_repository import RefreshTokenRepository
 
 settings = get_settings()
 
@@ -43,14 +47,29 @@ class AuthService:
         Returns:
             User ID (sub claim) if valid, None otherwise
         """
+        payload = AuthService.decode_token(token)
+        if payload is None:
+            return None
+        return payload["sub"]
+
+    @staticmethod
+    def decode_token(token: str) -> Optional[dict]:
+        """
+        Verify a JWT token and return its claims.
+
+        Args:
+            token: JWT token to verify
+
+        Returns:
+            Claims (including sub and exp) if valid, None otherwise
+        """
         try:
             payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-            user_id: str = payload.get("sub")
-            if user_id is None:
-                return None
-            return user_id
         except JWTError:
             return None
+        if payload.get("sub") is None:
+            return None
+        return payload
 
     @staticmethod
     def create_user_token(user_id: UUID) -> dict:
@@ -70,3 +89,63 @@ class AuthService:
             "access_token": access_token,
             "token_type": "bearer"
         }
+
+    @staticmethod
+    def hash_refresh_token(refresh_token: str) -> str:
+        """
+        SHA-256 of a refresh token.
+        Tokens are 256-bit random values, so a fast hash is enough (no bcrypt).
+        """
+        return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+    @staticmethod
+    def _new_refresh_token() -> tuple[str, str, datetime]:
+        """Generate (token, token_hash, expires_at) for a new refresh token"""
+        refresh_token = secrets.token_urlsafe(32)
+        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        return refresh_token, AuthService.hash_refresh_token(refresh_token), expires_at
+
+    @staticmethod
+    def create_user_tokens(db: Session, user_id: UUID) -> dict:
+        """
+        Create an access token and a refresh token for a user (on login).
+
+        Returns:
+            Dictionary with access_token, refresh_token and token_type
+        """
+        refresh_token, token_hash, expires_at = AuthService._new_refresh_token()
+        RefreshTokenRepository.create(db, user_id, token_hash, expires_at)
+        return {
+            **AuthService.create_user_token(user_id),
+            "refresh_token": refresh_token
+        }
+
+    @staticmethod
+    def refresh_user_tokens(db: Session, refresh_token: str) -> Optional[dict]:
+        """
+        Exchange a refresh token for a new access token and a new refresh token.
+        The presented token is revoked (rotation). Presenting an already rotated
+        token again means it was leaked, so all of the user's refresh tokens are revoked.
+
+        Returns:
+            Dictionary with access_token, refresh_token and token_type, or None if the token is not valid
+        """
+        token_hash = AuthService.hash_refresh_token(refresh_token)
+        new_refresh_token, new_token_hash, expires_at = AuthService._new_refresh_token()
+
+        user_id = RefreshTokenRepository.rotate(db, token_hash, new_token_hash, expires_at)
+        if user_id is None:
+            db_token = RefreshTokenRepository.get_by_hash(db, token_hash)
+            if db_token is not None and db_token.revoked_at is not None:
+                RefreshTokenRepository.revoke_all_for_user(db, db_token.user_id)
+            return None
+
+        return {
+            **AuthService.create_user_token(user_id),
+            "refresh_token": new_refresh_token
+        }
+
+    @staticmethod
+    def revoke_refresh_token(db: Session, refresh_token: str) -> bool:
+        """Revoke a refresh token (on logout)"""
+        return RefreshTokenRepository.revoke(db, AuthService.hash_refresh_token(refresh_token))
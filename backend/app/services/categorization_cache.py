@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from decimal import Decimal
+from functools import lru_cache
+from typing import Callable
+from uuid import UUID
+import math
+import re
+import threading
+import time
+
+from app.config import get_settings
+
+settings = get_settings()
+
+CacheKey = tuple[UUID, int, int, str, int]
+CategorizationResult = tuple[UUID | None, float]
+
+
+def normalize_description(description: str) -> str:
+    """Lowercase, drop digits/punctuation and collapse whitespace ("UBER *Trip 8841" -> "uber trip")"""
+    text = re.sub(r"[^a-z]+", " ", description.lower())
+    # Fall back to the raw text for descriptions made only of digits/symbols
+    return " ".join(text.split()) or description.strip().lower()
+
+
+def amount_bucket(amount: Decimal | float) -> int:
+    """Log-scale amount bucket, so 4.50 and 5.20 share a bucket but 5 and 500 don't"""
+    value = float(amount)
+    if value <= 1:
+        return 0
+    return int(math.log2(value) * 2)
+
+
+class CategorizationCache:
+    """
+    Thread-safe LRU/TTL cache of AI categorization results with request coalescing.
+    Keys are (user_id, default categories version, user's categories version,
+    normalized description, amount bucket), so any category change (by this or
+    another worker) makes the old entries unreachable at once.
+    Concurrent misses for the same key share a single in-flight computation.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[CacheKey, tuple[float, CategorizationResult]] = OrderedDict()
+        self._in_flight: dict[CacheKey, Future] = {}
+        self._lock = threading.Lock()
+
+    def make_key(self, user_id: UUID, versions: tuple[int, int], description: str, amount: Decimal | float) -> CacheKey:
+        """Key for an expense, given CategoryCache.versions() for the user"""
+        return (user_id, *versions, normalize_description(description), amount_bucket(amount))
+
+    def get_or_compute(
+        self,
+        key: CacheKey,
+        compute: Callable[[], CategorizationResult],
+        cacheable: Callable[[CategorizationResult], bool] = lambda result: True
+    ) -> CategorizationResult:
+        """
+        Return the cached result for key, or run compute() once for all concurrent callers.
+        Results for which cacheable(result) is False are shared with waiters but not stored.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                self._in_flight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if cacheable(result):
+                self._entries[key] = (time.monotonic() + self.ttl, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop all cached results for a user (e.g. after many of their expenses changed)"""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop every cached result (e.g. after a default category changes)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters; hits + coalesced is the number of LLM calls saved"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "llm_calls_saved": self.hits + self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+
+@lru_cache()
+def get_categorization_cache() -> CategorizationCache:
+    """Process-wide categorization cache"""
+    return CategorizationCache(
+        max_entries=settings.AI_CACHE_MAX_ENTRIES,
+        ttl=settings.AI_CACHE_TTL_SECONDS
+    )
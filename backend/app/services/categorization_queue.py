@@ -0,0 +1,248 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+from uuid import UUID
+import queue
+import threading
+import time
+import traceback
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.categorization_job import CategorizationJob
+
+settings = get_settings()
+
+
+@dataclass
+class CategorizationTask:
+    """A unit of background categorization work"""
+    expense_id: UUID
+    user_id: UUID
+    attempts: int = 0
+    job_id: UUID | None = None
+
+
+class CategorizationQueue(ABC):
+    """Interface for queues feeding the categorization worker pool"""
+
+    max_attempts: int = 1
+    # True if jobs are categorization_jobs rows, inserted by the expense write itself
+    # (ExpenseRepository.create(..., queue_job=True)) so they commit or roll back with it
+    persistent: bool = False
+
+    @abstractmethod
+    def enqueue(self, expense_id: UUID, user_id: UUID) -> None:
+        """Hand a committed expense to the workers"""
+
+    @abstractmethod
+    def dequeue(self, timeout: float) -> CategorizationTask | None:
+        """Take the next task, waiting up to `timeout` seconds. Returns None if there is none."""
+
+    @abstractmethod
+    def ack(self, task: CategorizationTask, error: str | None = None) -> bool:
+        """
+        Mark a task as done.
+        If error is given the task is retried (after a delay growing with its attempts)
+        until it runs out of attempts.
+        Returns True if the task is finished (succeeded or gave up), False if it was requeued.
+        """
+
+
+class InMemoryCategorizationQueue(CategorizationQueue):
+    """Process-local queue. Fast, but pending tasks are lost on restart."""
+
+    def __init__(self, max_attempts: int = 3, retry_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._queue: queue.Queue[CategorizationTask] = queue.Queue()
+
+    def enqueue(self, expense_id: UUID, user_id: UUID) -> None:
+        self._queue.put(CategorizationTask(expense_id=expense_id, user_id=user_id))
+
+    def dequeue(self, timeout: float) -> CategorizationTask | None:
+        try:
+            task = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        task.attempts += 1
+        return task
+
+    def ack(self, task: CategorizationTask, error: str | None = None) -> bool:
+        if error and task.attempts < self.max_attempts:
+            # Not right away: the provider is likely still unavailable
+            timer = threading.Timer(self.retry_delay * task.attempts, self._queue.put, args=(task,))
+            timer.daemon = True
+            timer.start()
+            return False
+        return True
+
+
+class DatabaseCategorizationQueue(CategorizationQueue):
+    """
+    Persistent queue backed by the categorization_jobs table.
+    Workers (in this or other processes) claim jobs with FOR UPDATE SKIP LOCKED.
+    A claimed job is leased for `lease` seconds: if its worker dies without
+    acking it, another worker takes it over (or fails it, if that was its last attempt).
+    """
+
+    persistent = True
+
+    def __init__(self, max_attempts: int = 3, retry_delay: float = 30.0, lease: float = 300.0):
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease = lease
+
+    def enqueue(self, expense_id: UUID, user_id: UUID) -> None:
+        # Nothing to do: the job row was committed with the expense, and workers poll for it
+        pass
+
+    def dequeue(self, timeout: float) -> CategorizationTask | None:
+        db = SessionLocal()
+        try:
+            row = db.execute(text(
+                """
+                WITH abandoned AS (
+                    -- Leases that expired during the last attempt: give up on those jobs
+                    UPDATE categorization_jobs
+                    SET status = 'failed', last_error = 'Worker lease expired', updated_at = now()
+                    WHERE status = 'running'
+                      AND updated_at < now() - make_interval(secs => :lease)
+                      AND attempts >= :max_attempts
+                    RETURNING expense_id
+                ), failed_expenses AS (
+                    UPDATE expenses SET ai_status = 'failed'
+                    WHERE id IN (SELECT expense_id FROM abandoned)
+                    RETURNING user_id
+                ), version_bump AS (
+                    UPDATE users SET data_version = data_version + 1
+                    WHERE id IN (SELECT user_id FROM failed_expenses)
+                )
+                UPDATE categorization_jobs
+                SET status = 'running', attempts = attempts + 1, updated_at = now()
+                WHERE id = (
+                    SELECT id FROM categorization_jobs
+                    WHERE (
+                        status = 'queued'
+                        AND updated_at <= now() - make_interval(secs => :retry_delay * attempts)
+                    ) OR (
+                        status = 'running'
+                        AND updated_at < now() - make_interval(secs => :lease)
+                        AND attempts < :max_attempts
+                    )
+                    ORDER BY created_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING id, expense_id, user_id, attempts
+                """
+            ), {"lease": self.lease, "retry_delay": self.retry_delay, "max_attempts": self.max_attempts}).first()
+            db.commit()
+        finally:
+            db.close()
+
+        if row is None:
+            # Nothing to do: poll again after the timeout
+            time.sleep(timeout)
+            return None
+
+        return CategorizationTask(
+            expense_id=row.expense_id,
+            user_id=row.user_id,
+            attempts=row.attempts,
+            job_id=row.id
+        )
+
+    def ack(self, task: CategorizationTask, error: str | None = None) -> bool:
+        db = SessionLocal()
+        try:
+            job = db.query(CategorizationJob).filter(CategorizationJob.id == task.job_id).first()
+            if job is None:
+                return True
+
+            if not error:
+                db.delete(job)
+                db.commit()
+                return True
+
+            # updated_at moves to now(), which the retry delay in dequeue() counts from
+            job.last_error = error
+            job.status = "queued" if task.attempts < self.max_attempts else "failed"
+            db.commit()
+            return job.status == "failed"
+        finally:
+            db.close()
+
+
+class CategorizationWorkerPool:
+    """
+    In-process pool of worker threads that drain a CategorizationQueue.
+    The handler receives a fresh database session for every task.
+    """
+
+    def __init__(
+        self,
+        task_queue: CategorizationQueue,
+        handler: Callable[[Session, CategorizationTask, bool], None],
+        workers: int = 4,
+        poll_interval: float = 1.0
+    ):
+        self.queue = task_queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"categorization-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Signal the workers to stop and wait for them to finish their current task"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            task = self.queue.dequeue(timeout=self.poll_interval)
+            if task is None:
+                continue
+
+            db = SessionLocal()
+            try:
+                # Let the handler know whether this is the last try so it can record a failure
+                self.handler(db, task, task.attempts >= self.queue.max_attempts)
+                self.queue.ack(task)
+            except Exception as e:
+                db.rollback()
+                print(f"Background categorization failed for expense {task.expense_id}: {e}")
+                traceback.print_exc()
+                self.queue.ack(task, error=str(e))
+            finally:
+                db.close()
+
+
+@lru_cache()
+def get_categorization_queue() -> CategorizationQueue:
+    """Process-wide categorization queue selected by AI_CATEGORIZATION_QUEUE"""
+    if settings.AI_CATEGORIZATION_QUEUE == "database":
+        return DatabaseCategorizationQueue(
+            max_attempts=settings.AI_CATEGORIZATION_MAX_ATTEMPTS,
+            retry_delay=settings.AI_CATEGORIZATION_RETRY_SECONDS,
+            lease=settings.AI_CATEGORIZATION_LEASE_SECONDS
+        )
+    return InMemoryCategorizationQueue(
+        max_attempts=settings.AI_CATEGORIZATION_MAX_ATTEMPTS,
+        retry_delay=settings.AI_CATEGORIZATION_RETRY_SECONDS
+    )
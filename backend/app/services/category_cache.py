@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from uuid import UUID
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.repositories.category_repository import CategoryRepository
+from app.schemas.category import Category
+
+settings = get_settings()
+
+
+@dataclass
+class _Entry:
+    version: int
+    checked_at: float
+    categories: list[Category]
+
+
+class CategoryCache:
+    """
+    Versioned cache of category lists: one shared entry for the default
+    categories and one overlay entry per user (LRU) for their custom ones.
+    Entries record the category_versions version they were loaded at and are
+    revalidated against it at most every `check_interval` seconds, so writes
+    made by other workers show up within that interval. Writes made by this
+    process invalidate the affected entry immediately.
+    """
+
+    def __init__(self, max_users: int = 1000, check_interval: float = 5.0):
+        self.max_users = max_users
+        self.check_interval = check_interval
+        self.hits = 0
+        self.version_checks = 0
+        self.reloads = 0
+        self._defaults: _Entry | None = None
+        self._users: OrderedDict[UUID, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, user_id: UUID | None) -> _Entry | None:
+        if user_id is None:
+            return self._defaults
+        entry = self._users.get(user_id)
+        if entry is not None:
+            self._users.move_to_end(user_id)
+        return entry
+
+    def _store(self, user_id: UUID | None, entry: _Entry) -> None:
+        if user_id is None:
+            self._defaults = entry
+            return
+        self._users[user_id] = entry
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def _current(self, db: Session, user_id: UUID | None) -> list[_Entry]:
+        """The default entry and the user's overlay, revalidated if their check interval has passed"""
+        scopes = [None] if user_id is None else [None, user_id]
+        now = time.monotonic()
+
+        with self._lock:
+            entries = {scope: self._entry(scope) for scope in scopes}
+        stale = [
+            scope for scope, entry in entries.items()
+            if entry is None or now - entry.checked_at >= self.check_interval
+        ]
+
+        if stale:
+            # Read versions before rows: a concurrent write then at worst
+            # causes one extra reload, never a stale entry marked current
+            versions = CategoryRepository.get_versions(db, stale)
+            for scope in stale:
+                entry = entries[scope]
+                if entry is not None and entry.version == versions[scope]:
+                    entry.checked_at = now
+                    with self._lock:
+                        self.version_checks += 1
+                    continue
+
+                categories = [Category.model_validate(c) for c in CategoryRepository.get_scope(db, scope)]
+                entries[scope] = _Entry(versions[scope], now, categories)
+                with self._lock:
+                    self._store(scope, entries[scope])
+                    self.reloads += 1
+        else:
+            with self._lock:
+                self.hits += 1
+
+        return [entries[scope] for scope in scopes]
+
+    def get_all(self, db: Session, user_id: UUID | None = None) -> list[Category]:
+        """Default categories followed by the user's custom categories"""
+        return [category for entry in self._current(db, user_id) for category in entry.categories]
+
+    def versions(self, db: Session, user_id: UUID) -> tuple[int, int]:
+        """
+        (default categories version, user's categories version), as of the last revalidation.
+        Process-local state derived from the user's categories (cached categorizations,
+        classifiers, prompt contexts) is keyed on these, so a category changed by another
+        worker invalidates it here too.
+        """
+        defaults, overlay = self._current(db, user_id)
+        return defaults.version, overlay.version
+
+    def invalidate(self, user_id: UUID | None) -> None:
+        """Drop the default entry (user_id None) or a user's overlay after a local write"""
+        with self._lock:
+            if user_id is None:
+                self._defaults = None
+            else:
+                self._users.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "hits": self.hits,
+                "version_checks": self.version_checks,
+                "reloads": self.reloads,
+            }
+
+
+@lru_cache()
+def get_category_cache() -> CategoryCache:
+    """Process-wide category cache"""
+    return CategoryCache(
+        max_users=settings.CATEGORY_CACHE_MAX_USERS,
+        check_interval=settings.CATEGORY_CACHE_CHECK_SECONDS
+    )
@@ -1,8 +1,13 @@
 from uuid import UUID
 from sqlalchemy.orm import Session
 from app.repositories.category_repository import CategoryRepository
-from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.schemas.category import Category as CategorySchema, CategoryCreate, CategoryUpdate
 from app.models.category import Category
+from app.services.categorization_cache import get_categorization_cache
+from app.services.category_cache import get_category_cache
+from app.services.local_classifier import get_local_classifier
+from app.services.prompt_context import get_prompt_context_store
+from app.services.user_service import UserService
 
 
 class CategoryService:
@@ -12,7 +17,13 @@ class CategoryService:
         Create a new category.
         If user_id is None, creates a default (system) category.
         """
-        return CategoryRepository.create(db, category, user_id)
+        if user_id is None:
+            db_category = CategoryRepository.create(db, category, user_id)
+        else:
+            with UserService.existing_user(db, user_id):
+                db_category = CategoryRepository.create(db, category, user_id)
+        CategoryService._invalidate_categorizations(user_id)
+        return db_category
 
     @staticmethod
     def get_category(db: Session, category_id: UUID) -> Category | None:
@@ -20,12 +31,12 @@ class CategoryService:
         return CategoryRepository.get_by_id(db, category_id)
 
     @staticmethod
-    def list_categories(db: Session, user_id: UUID | None = None, skip: int = 0, limit: int = 100) -> list[Category]:
+    def list_categories(db: Session, user_id: UUID | None = None, skip: int = 0, limit: int = 100) -> list[CategorySchema]:
         """
         List all available categories for a user.
-        Returns default categories + user's custom categories.
+        Returns default categories + user's custom categories (served from the category cache).
         """
-        return CategoryRepository.get_all(db, user_id, skip, limit)
+        return get_category_cache().get_all(db, user_id)[skip:skip + limit]
 
     @staticmethod
     def update_category(db: Session, category_id: UUID, category_update: CategoryUpdate, user_id: UUID | None = None) -> Category | None:
@@ -33,19 +44,13 @@ class CategoryService:
         Update a category.
         Users can only update their own categories, not default ones.
         """
-        category = CategoryRepository.get_by_id(db, category_id)
-        if not category:
+        db_category = CategoryRepository.update(db, category_id, category_update, user_id)
+        if not db_category:
+            CategoryService._check_writable(db, category_id, "update")
             return None
 
-        # Don't allow updating default categories
-        if category.is_default:
-            raise ValueError("Cannot update default categories")
-
-        # Check if user owns this category
-        if category.user_id and category.user_id != user_id:
-            raise PermissionError("Cannot update another user's category")
-
-        return CategoryRepository.update(db, category_id, category_update)
+        CategoryService._invalidate_categorizations(user_id)
+        return db_category
 
     @staticmethod
     def delete_category(db: Session, category_id: UUID, user_id: UUID | None = None) -> bool:
@@ -54,16 +59,47 @@ class CategoryService:
         Users can only delete their own categories.
         Note: Expenses referencing this category will have category_id set to NULL (handled by DB with ON DELETE SET NULL).
         """
+        deleted = CategoryRepository.delete(db, category_id, user_id)
+        if not deleted:
+            CategoryService._check_writable(db, category_id, "delete")
+            return False
+
+        CategoryService._invalidate_categorizations(user_id)
+        return deleted
+
+    @staticmethod
+    def _check_writable(db: Session, category_id: UUID, action: str) -> None:
+        """
+        After a write matched no row: raise the reason if the category exists
+        (ValueError for default categories, PermissionError for another user's).
+        Only this failure path reads the category, successful writes are a single statement.
+        """
         category = CategoryRepository.get_by_id(db, category_id)
         if not category:
-            return False
+            return
 
-        # Don't allow deleting default categories
+        # Don't allow changing default categories
         if category.is_default:
-            raise ValueError("Cannot delete default categories")
+            raise ValueError(f"Cannot {action} default categories")
 
-        # Check if user owns this category
-        if category.user_id and category.user_id != user_id:
-            raise PermissionError("Cannot delete another user's category")
+        raise PermissionError(f"Cannot {action} another user's category")
 
-        return CategoryRepository.delete(db, category_id)
+    @staticmethod
+    def _invalidate_categorizations(user_id: UUID | None) -> None:
+        """
+        Drop this process's cached category lists and AI state that may reference a changed category.
+        Other workers notice the change through the category versions these caches are keyed on.
+        """
+        get_category_cache().invalidate(user_id)
+        cache = get_categorization_cache()
+        classifier = get_local_classifier()
+        prompt_contexts = get_prompt_context_store()
+        if user_id is None:
+            # Default categories are shared by every user
+            cache.clear()
+            classifier.clear()
+            prompt_contexts.clear()
+        else:
+            cache.invalidate_user(user_id)
+            classifier.invalidate_user(user_id)
+            prompt_contexts.invalidate_user(user_id)
@@ -1,13 +1,28 @@
+from datetime import date
 from uuid import UUID
+import base64
+import time
+import uuid
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.repositories.expense_repository import ExpenseRepository
-from app.schemas.expense import ExpenseCreate, ExpenseUpdate
+from app.schemas.category import Category
+from app.schemas.expense import ExpenseCompact, ExpenseCreate, ExpenseFilters, ExpenseUpdate, ExpenseBatchOperation
 from app.models.expense import Expense
 from app.services.ai_service import AIService
+from app.services.categorization_cache import get_categorization_cache
+from app.services.category_cache import get_category_cache
+from app.services.categorization_queue import CategorizationTask, get_categorization_queue
+from app.services.local_classifier import get_local_classifier
+from app.services.prompt_context import get_prompt_context_store
+from app.services.user_service import UserService
 from app.config import get_settings
 
 settings = get_settings()
 
+# Batches run their creates, then their updates, then their deletes
+BATCH_OP_ORDER = {"create": 0, "update": 1, "delete": 2}
+
 
 class ExpenseService:
     @staticmethod
@@ -16,23 +31,34 @@ class ExpenseService:
         Create a new expense.
         If category_id is not provided and AI is configured, use AI to suggest category.
         """
-        expense_data = expense.model_dump()
+        # In async mode, save right away and let a background worker categorize it
+        if not expense.category_id and settings.OPENAI_API_KEY \
+                and settings.AI_CATEGORIZATION_MODE == "async":
+            queue = get_categorization_queue()
+            # A persistent queue's job is inserted by the same statement as the expense
+            with UserService.existing_user(db, user_id):
+                db_expense = ExpenseRepository.create(db, expense, user_id, ai_status="pending", queue_job=queue.persistent)
+            queue.enqueue(db_expense.id, user_id)
+            return db_expense
 
         # If no category provided and AI is available, use AI to suggest
-        if not expense_data.get("category_id") and settings.OPENAI_API_KEY:
+        if ExpenseService.categorizes_inline(expense):
             try:
                 ai_service = AIService()
                 suggested_category_id, confidence = ai_service.categorize_expense(
                     db=db,
-                    description=expense_data["description"],
-                    amount=expense_data["amount"],
+                    description=expense.description,
+                    amount=expense.amount,
                     user_id=user_id
                 )
 
                 if suggested_category_id and confidence > 0.5:
-                    expense_data["ai_suggested_category_id"] = suggested_category_id
-                    expense_data["ai_confidence_score"] = confidence
-                    expense_data["category_id"] = suggested_category_id
+                    # model_copy: the payload was already validated, don't validate it again
+                    expense = expense.model_copy(update={
+                        "ai_suggested_category_id": suggested_category_id,
+                        "ai_confidence_score": confidence,
+                        "category_id": suggested_category_id,
+                    })
 
             except Exception as e:
                 print(f"AI categorization failed: {e}")
@@ -40,8 +66,142 @@ class ExpenseService:
                 traceback.print_exc()
 
         # Create expense with original or AI-suggested category
-        expense_create = ExpenseCreate(**expense_data)
-        return ExpenseRepository.create(db, expense_create, user_id)
+        with UserService.existing_user(db, user_id):
+            db_expense = ExpenseRepository.create(db, expense, user_id)
+        if db_expense.category_id:
+            ExpenseService._learn_from_expense(user_id, db_expense)
+            get_prompt_context_store().add_example(
+                user_id, db_expense.id, db_expense.description, db_expense.amount, db_expense.category_id
+            )
+        return db_expense
+
+    @staticmethod
+    def categorizes_inline(expense: ExpenseCreate) -> bool:
+        """Whether create_expense asks the AI for a category before saving (so it waits on the provider)"""
+        return not expense.category_id and bool(settings.OPENAI_API_KEY) \
+            and settings.AI_CATEGORIZATION_MODE != "async"
+
+    @staticmethod
+    def categorize_in_background(db: Session, task: CategorizationTask, last_attempt: bool = True) -> None:
+        """
+        Worker handler for queued categorization jobs.
+        Writes the AI suggestion back to the expense, marks it completed and
+        feeds the result to the local classifier and prompt context.
+        Provider failures raise so the queue retries the job; the expense is
+        marked failed once the job has run out of attempts.
+        """
+        expense = ExpenseRepository.get_by_id(db, task.expense_id, task.user_id)
+        if not expense:
+            return
+
+        try:
+            suggested_category_id, confidence = AIService().categorize_expense(
+                db=db,
+                description=expense.description,
+                amount=expense.amount,
+                user_id=task.user_id
+            )
+        except Exception:
+            if last_attempt:
+                db.rollback()
+                ExpenseRepository.set_ai_categorization(db, task.expense_id, task.user_id, "failed")
+            raise
+
+        if suggested_category_id and confidence > 0.5:
+            written = ExpenseRepository.set_ai_categorization(
+                db, task.expense_id, task.user_id, "completed", suggested_category_id, confidence
+            )
+        else:
+            written = ExpenseRepository.set_ai_categorization(db, task.expense_id, task.user_id, "completed")
+
+        # Learn from the result like from an inline categorization
+        if written is not None and written.ai_suggested_category_id and written.category_id:
+            get_local_classifier().learn(
+                task.user_id, task.expense_id, expense.description, expense.amount, written.category_id
+            )
+            get_prompt_context_store().add_example(
+                task.user_id, task.expense_id, expense.description, expense.amount, written.category_id
+            )
+
+    @staticmethod
+    def categorize_expenses(
+        db: Session,
+        user_id: UUID,
+        expense_ids: list[UUID] | None = None
+    ) -> dict:
+        """
+        Categorize many expenses at once: the given IDs, or all uncategorized ones.
+        The local classifier answers what it can; the rest is packed into batched
+        LLM requests, and all results are written back with one set-based UPDATE.
+        Returns per-expense results and throughput figures.
+        Raises ValueError if the LLM is needed but not configured.
+        """
+        started = time.perf_counter()
+        targets = ExpenseRepository.get_categorization_targets(
+            db, user_id, expense_ids, limit=settings.AI_BATCH_MAX_EXPENSES
+        )
+
+        results: dict[UUID, tuple[UUID, float, str]] = {}
+        remaining = []
+        classifier = get_local_classifier()
+        for expense_id, description, amount in targets:
+            category_id, confidence = classifier.predict(db, user_id, description, amount) \
+                if settings.AI_LOCAL_CLASSIFIER_ENABLED else (None, 0.0)
+            if category_id and confidence >= settings.AI_LOCAL_CLASSIFIER_MIN_CONFIDENCE:
+                results[expense_id] = (category_id, confidence, "local")
+            else:
+                remaining.append((expense_id, description, amount))
+
+        llm_requests = prompt_tokens = completion_tokens = 0
+        ai_service = AIService() if remaining else None
+        for i in range(0, len(remaining), settings.AI_BATCH_SIZE):
+            batch_results, usage = ai_service.categorize_batch(db, remaining[i:i + settings.AI_BATCH_SIZE], user_id)
+            llm_requests += 1
+            prompt_tokens += usage.get("prompt_tokens", 0)
+            completion_tokens += usage.get("completion_tokens", 0)
+            for expense_id, (category_id, confidence) in batch_results.items():
+                results[expense_id] = (category_id, confidence, "llm")
+
+        # Same threshold as single-expense categorization
+        accepted = [
+            (expense_id, category_id, confidence)
+            for expense_id, (category_id, confidence, _) in results.items()
+            if confidence > 0.5
+        ]
+        written = ExpenseRepository.bulk_set_ai_categorization(db, user_id, accepted)
+        # Suggestions of categories deleted meanwhile (e.g. by another worker) were skipped
+        for expense_id, _, _ in accepted:
+            if expense_id not in written:
+                results.pop(expense_id)
+        if written:
+            get_categorization_cache().invalidate_user(user_id)
+            get_prompt_context_store().invalidate_user(user_id)
+            # The classifier only learns categories that were actually written
+            for expense_id, description, amount in targets:
+                if expense_id in written:
+                    classifier.learn(user_id, expense_id, description, amount, written[expense_id])
+
+        elapsed = time.perf_counter() - started
+        total_tokens = prompt_tokens + completion_tokens
+        return {
+            "requested": len(targets),
+            "categorized": len(written),
+            "items": [
+                {
+                    "expense_id": expense_id,
+                    "category_id": results[expense_id][0] if expense_id in results else None,
+                    "confidence": results[expense_id][1] if expense_id in results else 0.0,
+                    "source": results[expense_id][2] if expense_id in results else "none",
+                }
+                for expense_id, _, _ in targets
+            ],
+            "llm_requests": llm_requests,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "elapsed_seconds": elapsed,
+            "expenses_per_second": len(targets) / elapsed if elapsed > 0 else 0.0,
+            "expenses_per_1k_tokens": len(remaining) / total_tokens * 1000 if total_tokens else None,
+        }
 
     @staticmethod
     def get_expense(db: Session, expense_id: UUID, user_id: UUID) -> Expense | None:
@@ -54,20 +214,264 @@ class ExpenseService:
         user_id: UUID,
         skip: int = 0,
         limit: int = 100,
-        category_id: UUID | None = None
+        filters: ExpenseFilters | None = None,
+        with_categories: bool = True,
+        fields: list[str] | None = None
     ) -> tuple[list[Expense], int]:
         """
-        List all expenses for a user with pagination.
+        List all expenses for a user with pagination and optional filters.
         Returns (expenses, total_count).
         """
-        return ExpenseRepository.get_all(db, user_id, skip, limit, category_id)
+        return ExpenseRepository.get_all(db, user_id, skip, limit, filters, with_categories, fields)
+
+    @staticmethod
+    def encode_cursor(key: tuple[date, UUID]) -> str:
+        """Encode an (expense_date, id) keyset position as an opaque cursor"""
+        expense_date, expense_id = key
+        raw = f"{expense_date.isoformat()}|{expense_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[date, UUID]:
+        """
+        Decode an opaque cursor back into an (expense_date, id) keyset position.
+        Raises ValueError if the cursor is malformed.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+            date_part, id_part = raw.split("|")
+            return date.fromisoformat(date_part), UUID(id_part)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def list_expenses_page(
+        db: Session,
+        user_id: UUID,
+        limit: int = 20,
+        cursor: str | None = None,
+        filters: ExpenseFilters | None = None,
+        include_total: bool = False,
+        with_categories: bool = True,
+        fields: list[str] | None = None
+    ) -> tuple[list[Expense], str | None, int | None]:
+        """
+        List expenses for a user with cursor (keyset) pagination.
+        Returns (expenses, next_cursor, total_count or None).
+        Raises ValueError if the cursor is malformed.
+        """
+        after = ExpenseService.decode_cursor(cursor) if cursor else None
+        expenses, next_key, total = ExpenseRepository.get_page(
+            db, user_id, limit, after, filters, include_total, with_categories, fields
+        )
+        next_cursor = ExpenseService.encode_cursor(next_key) if next_key else None
+        return expenses, next_cursor, total
+
+    @staticmethod
+    def encode_search_cursor(key: tuple[float, UUID]) -> str:
+        """Encode a (score, id) search keyset position as an opaque cursor"""
+        score, expense_id = key
+        raw = f"{score!r}|{expense_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_search_cursor(cursor: str) -> tuple[float, UUID]:
+        """
+        Decode an opaque search cursor back into a (score, id) keyset position.
+        Raises ValueError if the cursor is malformed.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+            score_part, id_part = raw.split("|")
+            return float(score_part), UUID(id_part)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def search_expenses(
+        db: Session,
+        user_id: UUID,
+        q: str,
+        limit: int = 20,
+        cursor: str | None = None
+    ) -> tuple[list[Expense], str | None]:
+        """
+        Search a user's expenses by description and notes, most relevant first,
+        with cursor (keyset) pagination. Returns (expenses, next_cursor).
+        Raises ValueError if the cursor is malformed or q has no searchable words.
+        """
+        after = ExpenseService.decode_search_cursor(cursor) if cursor else None
+        expenses, next_key = ExpenseRepository.search(db, user_id, q, limit, after)
+        next_cursor = ExpenseService.encode_search_cursor(next_key) if next_key else None
+        return expenses, next_cursor
+
+    @staticmethod
+    def sparse_items(expenses: list[Expense], fields: list[str]) -> list[dict]:
+        """List items holding only the requested fields, as plain values for ORJSONResponse"""
+        categories: dict[UUID, dict] = {}
+
+        def category(db_category) -> dict | None:
+            if db_category is None:
+                return None
+            if db_category.id not in categories:
+                categories[db_category.id] = Category.model_validate(db_category).model_dump()
+            return categories[db_category.id]
+
+        return [
+            {
+                field: category(getattr(expense, field)) if field in ("category", "ai_suggested_category")
+                else getattr(expense, field)
+                for field in fields
+            }
+            for expense in expenses
+        ]
+
+    @staticmethod
+    def used_category_ids(expenses: list[Expense], fields: list[str] | None = None) -> set[UUID]:
+        """IDs of the categories referenced by the (loaded) category ID fields of a page"""
+        used = set()
+        for field in ("category_id", "ai_suggested_category_id"):
+            if fields is None or field in fields:
+                used.update(getattr(expense, field) for expense in expenses)
+        used.discard(None)
+        return used
+
+    @staticmethod
+    def compact_body(expenses: list[Expense], categories: list[Category], fields: list[str] | None = None) -> dict:
+        """
+        Items and side-loaded categories of a compact list page, as plain values
+        for ORJSONResponse: no per-item Pydantic validation, and each category
+        used on the page appears once instead of up to twice per item.
+        """
+        items = ExpenseService.sparse_items(expenses, fields or list(ExpenseCompact.model_fields))
+        used = ExpenseService.used_category_ids(expenses, fields)
+        return {
+            "items": items,
+            "categories": {str(category.id): category.model_dump() for category in categories if category.id in used},
+        }
+
+    @staticmethod
+    def compact_page(db: Session, user_id: UUID, expenses: list[Expense], fields: list[str] | None = None) -> dict:
+        """Compact list body, with the categories taken from the category cache"""
+        return ExpenseService.compact_body(expenses, get_category_cache().get_all(db, user_id), fields)
+
+    @staticmethod
+    def get_summary(
+        db: Session,
+        user_id: UUID,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        granularity: str = "month"
+    ) -> dict:
+        """
+        Get aggregated spending for a user over a date range.
+        Totals are computed in the database, so they are exact regardless of pagination.
+        """
+        summary = ExpenseRepository.get_summary(db, user_id, date_from, date_to, granularity)
+        summary.update(date_from=date_from, date_to=date_to, granularity=granularity)
+        return summary
 
     @staticmethod
     def update_expense(db: Session, expense_id: UUID, user_id: UUID, expense_update: ExpenseUpdate) -> Expense | None:
         """Update an expense (only if it belongs to the user)"""
-        return ExpenseRepository.update(db, expense_id, user_id, expense_update)
+        db_expense = ExpenseRepository.update(db, expense_id, user_id, expense_update)
+        if not db_expense:
+            return None
+
+        # A user correction changes the examples the AI learns from
+        changed = expense_update.model_fields_set
+        if "category_id" in changed:
+            get_categorization_cache().invalidate_user(user_id)
+        if changed & {"category_id", "expense_date"}:
+            # The expense may move in or out of the recent-examples window
+            get_prompt_context_store().invalidate_user(user_id)
+        elif changed & {"description", "amount"}:
+            get_prompt_context_store().expense_changed(user_id, expense_id)
+        if changed & {"category_id", "description", "amount"}:
+            ExpenseService._learn_from_expense(user_id, db_expense)
+        return db_expense
 
     @staticmethod
     def delete_expense(db: Session, expense_id: UUID, user_id: UUID) -> bool:
         """Delete an expense (only if it belongs to the user)"""
-        return ExpenseRepository.delete(db, expense_id, user_id)
+        deleted = ExpenseRepository.delete(db, expense_id, user_id)
+        if deleted:
+            get_local_classifier().forget(user_id, expense_id)
+            get_prompt_context_store().expense_changed(user_id, expense_id)
+        return deleted
+
+    @staticmethod
+    def apply_batch(db: Session, user_id: UUID, operations: list[ExpenseBatchOperation]) -> list[dict]:
+        """
+        Apply a batch of create/update/delete operations in a single transaction.
+        Creates run first, then updates (several updates to one expense are merged
+        in order), then deletes. Created expenses are not AI-categorized here.
+        Operations on one expense must therefore come in that order too (at most one
+        create, then any updates, then at most one delete), so the grouped execution
+        has the same effect as applying the batch in request order.
+        A create with a client-generated id that already exists for the user is
+        reported as "exists" instead of failing, so a batch can be safely replayed.
+        Returns one result per operation, in request order.
+        Raises ValueError (and applies nothing) if the batch violates a constraint
+        or operates on an expense out of that order.
+        """
+        creates: list[dict] = []
+        updates: dict[UUID, dict] = {}
+        deletes: set[UUID] = set()
+        results = []
+        last_ops: dict[UUID, str] = {}
+
+        for index, operation in enumerate(operations):
+            expense_id = operation.id
+            if expense_id is not None:
+                last_op = last_ops.get(expense_id)
+                if last_op is not None and (
+                    BATCH_OP_ORDER[operation.op] < BATCH_OP_ORDER[last_op]
+                    or (operation.op == last_op and operation.op != "update")
+                ):
+                    raise ValueError(
+                        f"Operation {index} ({operation.op}) on expense {expense_id} can't follow its {last_op}: "
+                        "operations on one expense must be a create, then updates, then a delete"
+                    )
+                last_ops[expense_id] = operation.op
+
+            if operation.op == "create":
+                expense_id = expense_id or uuid.uuid4()
+                creates.append({**operation.data.model_dump(), "id": expense_id})
+            elif operation.op == "update":
+                updates.setdefault(expense_id, {}).update(operation.data.model_dump(exclude_unset=True))
+            else:
+                deletes.add(expense_id)
+            results.append({"index": index, "op": operation.op, "id": expense_id})
+
+        try:
+            with UserService.existing_user(db, user_id):
+                created, updated, deleted = ExpenseRepository.apply_batch(db, user_id, creates, updates, deletes)
+        except IntegrityError:
+            # Most likely an unknown category_id; the driver's message isn't meant for clients
+            raise ValueError("Batch rejected, no changes were applied: an operation violates a database constraint")
+        except ValueError as e:
+            raise ValueError(f"Batch rejected, no changes were applied: {e}")
+
+        for result in results:
+            if result["op"] == "create":
+                result["status"] = "created" if result["id"] in created else "exists"
+            elif result["op"] == "update":
+                result["status"] = "updated" if result["id"] in updated else "not_found"
+            else:
+                result["status"] = "deleted" if result["id"] in deleted else "not_found"
+
+        # Many examples may have changed at once: rebuild learned state lazily
+        get_categorization_cache().invalidate_user(user_id)
+        get_local_classifier().invalidate_user(user_id)
+        get_prompt_context_store().invalidate_user(user_id)
+        return results
+
+    @staticmethod
+    def _learn_from_expense(user_id: UUID, db_expense: Expense) -> None:
+        """Feed an expense's current category into the user's local classifier"""
+        get_local_classifier().learn(
+            user_id, db_expense.id, db_expense.description, db_expense.amount, db_expense.category_id
+        )
@@ -0,0 +1,91 @@
+from typing import AsyncIterator, Iterator
+from uuid import UUID
+import csv
+import io
+import json
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.repositories.expense_repository import ExpenseRepository
+
+settings = get_settings()
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    "id", "expense_date", "description", "amount", "category",
+    "payment_method", "notes", "created_at",
+)
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _serialize(value):
+    """Convert a column value to a JSON/CSV-friendly scalar"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    # UUID and Decimal (amounts keep their exact textual form)
+    return str(value)
+
+
+def _encode(rows, file_format: str, header: bool = False) -> str:
+    """Encode a batch of export rows as CSV (optionally with its header row) or NDJSON"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if file_format == "csv" else None
+    if writer and header:
+        writer.writerow(EXPORT_COLUMNS)
+
+    for row in rows:
+        values = [_serialize(value) for value in row]
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values))))
+            buffer.write("\n")
+    return buffer.getvalue()
+
+
+class ExportService:
+    @staticmethod
+    def stream_expenses(user_id: UUID, file_format: str) -> Iterator[str] | AsyncIterator[str]:
+        """
+        Yield a user's expenses as CSV or NDJSON text chunks (one chunk per batch of rows).
+        Opens its own session, since the response body is sent after the request's
+        dependencies have been cleaned up, and closes it when the stream ends.
+        In DATABASE_MODE=async the rows are streamed over asyncpg.
+        """
+        if settings.DATABASE_MODE == "async":
+            return ExportService._stream_expenses_async(user_id, file_format)
+        return ExportService._stream_expenses_sync(user_id, file_format)
+
+    @staticmethod
+    def _stream_expenses_sync(user_id: UUID, file_format: str) -> Iterator[str]:
+        db = SessionLocal()
+        try:
+            result = db.execute(ExpenseRepository.export_statement(user_id, batch_size=EXPORT_BATCH_SIZE))
+            header = file_format == "csv"
+            for rows in result.partitions():
+                yield _encode(rows, file_format, header)
+                header = False
+            if header:
+                # No rows: still send the CSV header
+                yield _encode([], file_format, header)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def _stream_expenses_async(user_id: UUID, file_format: str) -> AsyncIterator[str]:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(ExpenseRepository.export_statement(user_id, batch_size=EXPORT_BATCH_SIZE))
+            header = file_format == "csv"
+            async for rows in result.partitions():
+                yield _encode(rows, file_format, header)
+                header = False
+            if header:
+                # No rows: still send the CSV header
+                yield _encode([], file_format, header)
@@ -0,0 +1,233 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Iterator
+from uuid import UUID
+import codecs
+import csv
+import io
+import re
+import uuid
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.repositories.expense_repository import ExpenseRepository
+from app.schemas.expense import ExpenseCreate
+from app.services.expense_service import ExpenseService
+from app.services.user_service import UserService
+
+settings = get_settings()
+
+CHUNK_SIZE = 64 * 1024
+INSERT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+# Accepted CSV header names for each expense field (case-insensitive)
+CSV_COLUMNS = {
+    "expense_date": ("expense_date", "date", "transaction date", "posted date", "booking date"),
+    "description": ("description", "name", "payee", "merchant", "memo"),
+    "amount": ("amount", "value", "debit"),
+    "payment_method": ("payment_method", "payment method", "method"),
+    "notes": ("notes", "note", "reference"),
+}
+
+
+# Only thousands separators, e.g. "1,234" or "1.234.567" (never "0,125")
+GROUPED_INTEGER = re.compile(r"[+-]?[1-9]\d{0,2}(?:(?:,\d{3})+|(?:\.\d{3})+)")
+
+
+def parse_amount(raw: str) -> Decimal:
+    """
+    Parse "1,234.56", "1.234,56", "-12,50" or "€ 9.99" into a Decimal.
+    The last of "," and "." is the decimal separator and the other one groups
+    thousands, except that an amount like "1,234" (one kind of separator, always
+    followed by three digits) only has thousands separators.
+    """
+    text = re.sub(r"[^\d,.\-+]", "", raw)
+    if GROUPED_INTEGER.fullmatch(text):
+        text = text.replace(",", "").replace(".", "")
+    else:
+        point = max(text.rfind(","), text.rfind("."))
+        if point >= 0:
+            text = text[:point].replace(",", "").replace(".", "") + "." + text[point + 1:]
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {raw!r}")
+
+
+class ImportService:
+    @staticmethod
+    def iter_csv_rows(stream: BinaryIO, date_format: str = "%Y-%m-%d") -> Iterator[tuple[int, dict]]:
+        """
+        Lazily parse a CSV bank statement into (row_number, raw expense fields).
+        The file is decoded and read incrementally, never loaded whole.
+        """
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        headers = {name.strip().lower(): name for name in reader.fieldnames or []}
+        mapping = {}
+        for field, aliases in CSV_COLUMNS.items():
+            for alias in aliases:
+                if alias in headers:
+                    mapping[field] = headers[alias]
+                    break
+        missing = {"expense_date", "description", "amount"} - mapping.keys()
+        if missing:
+            raise ValueError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+
+        for row_number, row in enumerate(reader, start=2):
+            fields = {field: (row.get(column) or "").strip() for field, column in mapping.items()}
+            try:
+                fields["expense_date"] = datetime.strptime(fields["expense_date"], date_format).date()
+                fields["amount"] = parse_amount(fields["amount"])
+            except ValueError as e:
+                yield row_number, {"error": str(e)}
+                continue
+            yield row_number, fields
+
+    @staticmethod
+    def iter_ofx_rows(stream: BinaryIO) -> Iterator[tuple[int, dict]]:
+        """
+        Lazily parse the <STMTTRN> transactions of an OFX statement (SGML or XML flavour)
+        into (transaction_number, raw expense fields), reading the file in chunks.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        buffer = ""
+        transaction: dict | None = None
+        number = 0
+
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            buffer += decoder.decode(chunk, final=not chunk)
+            # Keep the trailing (possibly incomplete) tag for the next chunk
+            tokens = buffer.split("<")
+            buffer = "" if not chunk else tokens.pop()
+
+            for token in tokens:
+                tag, _, value = token.partition(">")
+                tag, value = tag.strip().upper(), value.strip()
+                if tag == "STMTTRN":
+                    transaction = {}
+                elif tag == "/STMTTRN" and transaction is not None:
+                    number += 1
+                    yield number, ImportService._ofx_transaction_fields(transaction)
+                    transaction = None
+                elif transaction is not None and tag and not tag.startswith("/"):
+                    transaction[tag] = value
+
+            if not chunk:
+                break
+
+    @staticmethod
+    def _ofx_transaction_fields(transaction: dict) -> dict:
+        try:
+            posted = transaction.get("DTPOSTED", "")
+            expense_date = date(int(posted[0:4]), int(posted[4:6]), int(posted[6:8]))
+            amount = parse_amount(transaction.get("TRNAMT", ""))
+        except ValueError as e:
+            return {"error": str(e)}
+        return {
+            "expense_date": expense_date,
+            "description": transaction.get("NAME") or transaction.get("MEMO") or "",
+            "amount": amount,
+            "notes": transaction.get("MEMO") if transaction.get("NAME") else None,
+            "payment_method": transaction.get("TRNTYPE", "").lower() or None,
+        }
+
+    @staticmethod
+    def import_expenses(
+        db: Session,
+        user_id: UUID,
+        stream: BinaryIO,
+        file_format: str,
+        default_payment_method: str = "bank_transfer",
+        expense_sign: str = "negative",
+        date_format: str = "%Y-%m-%d",
+        categorize: bool = True
+    ) -> dict:
+        """
+        Stream-parse a CSV or OFX statement, validate each row against ExpenseCreate
+        and insert valid rows in bulk (multi-row INSERTs of INSERT_BATCH_SIZE rows).
+        All batches are one transaction, committed once the whole file has been read,
+        so a file that fails partway (e.g. an undecodable byte) imports nothing and
+        can simply be retried.
+        Rows whose amount has the other sign (e.g. incoming transfers) are skipped.
+        Categorization is deferred to one batched pass over the imported expenses.
+        Returns an import report with per-row errors.
+        Raises ValueError if the file cannot be parsed at all.
+        """
+        if file_format == "ofx":
+            rows = ImportService.iter_ofx_rows(stream)
+        else:
+            rows = ImportService.iter_csv_rows(stream, date_format)
+
+        imported_ids: list[UUID] = []
+        pending: list[dict] = []
+        skipped = 0
+        error_count = 0
+        errors: list[dict] = []
+
+        def record_error(row_number: int, message: str) -> None:
+            nonlocal error_count
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": row_number, "error": message})
+
+        try:
+            for row_number, fields in rows:
+                if "error" in fields:
+                    record_error(row_number, fields["error"])
+                    continue
+
+                amount = fields["amount"]
+                if amount == 0 or (amount < 0) != (expense_sign == "negative"):
+                    skipped += 1
+                    continue
+
+                try:
+                    expense = ExpenseCreate(
+                        amount=abs(amount),
+                        description=fields["description"],
+                        expense_date=fields["expense_date"],
+                        payment_method=fields.get("payment_method") or default_payment_method,
+                        notes=fields.get("notes") or None
+                    )
+                except ValidationError as e:
+                    record_error(row_number, "; ".join(
+                        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                    ))
+                    continue
+
+                expense_id = uuid.uuid4()
+                pending.append({**expense.model_dump(), "id": expense_id, "user_id": user_id})
+                imported_ids.append(expense_id)
+                if len(pending) >= INSERT_BATCH_SIZE:
+                    with UserService.existing_user(db, user_id):
+                        ExpenseRepository.bulk_create(db, pending)
+                    pending = []
+
+            if pending:
+                with UserService.existing_user(db, user_id):
+                    ExpenseRepository.bulk_create(db, pending)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        categorized = None
+        if categorize and imported_ids and settings.OPENAI_API_KEY:
+            categorized = 0
+            for i in range(0, len(imported_ids), settings.AI_BATCH_MAX_EXPENSES):
+                result = ExpenseService.categorize_expenses(
+                    db, user_id, imported_ids[i:i + settings.AI_BATCH_MAX_EXPENSES]
+                )
+                categorized += result["categorized"]
+
+        return {
+            "imported": len(imported_ids),
+            "skipped": skipped,
+            "error_count": error_count,
+            "errors": errors,
+            "categorized": categorized,
+        }
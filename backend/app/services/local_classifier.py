@@ -0,0 +1,184 @@
+from collections import Counter, OrderedDict, defaultdict
+from decimal import Decimal
+from functools import lru_cache
+from uuid import UUID
+import math
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.repositories.expense_repository import ExpenseRepository
+from app.services.categorization_cache import amount_bucket, normalize_description
+from app.services.category_cache import get_category_cache
+
+settings = get_settings()
+
+
+def extract_features(description: str, amount: Decimal | float) -> Counter:
+    """Word tokens, character trigrams and an amount bucket for a single expense"""
+    text = normalize_description(description)
+    features = Counter()
+    for word in text.split():
+        features[f"w:{word}"] += 1
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            features[f"t:{padded[i:i + 3]}"] += 1
+    features[f"a:{amount_bucket(amount)}"] += 1
+    return features
+
+
+class NaiveBayesClassifier:
+    """
+    Multinomial naive Bayes over description tokens/trigrams and amount bucket.
+    Examples are tracked per expense so they can be replaced or removed incrementally.
+    `versions` are the CategoryCache.versions() the model was trained at.
+    """
+
+    def __init__(self, versions: tuple[int, int] = (0, 0)):
+        self.versions = versions
+        self.examples: dict[UUID, tuple[UUID, Counter]] = {}
+        self.class_counts: Counter = Counter()
+        self.feature_counts: dict[UUID, Counter] = defaultdict(Counter)
+        self.feature_totals: Counter = Counter()
+        self.vocabulary: Counter = Counter()
+
+    def add(self, expense_id: UUID, category_id: UUID, features: Counter) -> None:
+        """Add (or replace) the training example for an expense"""
+        self.remove(expense_id)
+        self.examples[expense_id] = (category_id, features)
+        self.class_counts[category_id] += 1
+        self.feature_counts[category_id].update(features)
+        self.feature_totals[category_id] += sum(features.values())
+        self.vocabulary.update(features)
+
+    def remove(self, expense_id: UUID) -> None:
+        """Remove the training example for an expense, if any"""
+        example = self.examples.pop(expense_id, None)
+        if example is None:
+            return
+        category_id, features = example
+        self.class_counts[category_id] -= 1
+        self.feature_counts[category_id].subtract(features)
+        self.feature_totals[category_id] -= sum(features.values())
+        self.vocabulary.subtract(features)
+        for feature in features:
+            if self.vocabulary[feature] <= 0:
+                del self.vocabulary[feature]
+        if self.class_counts[category_id] <= 0:
+            del self.class_counts[category_id]
+            del self.feature_counts[category_id]
+            del self.feature_totals[category_id]
+
+    def predict(self, features: Counter) -> tuple[UUID | None, float]:
+        """Return (most likely category, posterior probability)"""
+        if not self.class_counts:
+            return None, 0.0
+
+        total_examples = sum(self.class_counts.values())
+        vocabulary_size = len(self.vocabulary) + 1
+        scores = {}
+        for category_id, class_count in self.class_counts.items():
+            counts = self.feature_counts[category_id]
+            denominator = self.feature_totals[category_id] + vocabulary_size
+            score = math.log(class_count / total_examples)
+            for feature, n in features.items():
+                score += n * math.log((counts.get(feature, 0) + 1) / denominator)
+            scores[category_id] = score
+
+        best = max(scores, key=scores.get)
+        # Without a single shared word the prior would decide: leave it to the LLM
+        if not any(self.feature_counts[best].get(f, 0) > 0 for f in features if f.startswith("w:")):
+            return None, 0.0
+
+        top = scores[best]
+        normalizer = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / normalizer
+
+
+class LocalClassifierRegistry:
+    """
+    Per-user local classifiers, trained lazily from the user's categorized
+    expenses and kept up to date incrementally on expense writes.
+    A model is retrained when the user's category versions change, so it never
+    predicts a category deleted by another worker.
+    Only the most recently used users' models are kept in memory.
+    """
+
+    def __init__(self, max_users: int = 1000, max_examples: int = 2000, min_examples: int = 20):
+        self.max_users = max_users
+        self.max_examples = max_examples
+        self.min_examples = min_examples
+        self._models: OrderedDict[UUID, NaiveBayesClassifier] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_model(self, db: Session, user_id: UUID) -> NaiveBayesClassifier:
+        versions = get_category_cache().versions(db, user_id)
+        with self._lock:
+            model = self._models.get(user_id)
+            if model is not None and model.versions == versions:
+                self._models.move_to_end(user_id)
+                return model
+
+        model = NaiveBayesClassifier(versions)
+        for expense_id, description, amount, category_id in ExpenseRepository.get_training_examples(
+            db, user_id, limit=self.max_examples
+        ):
+            model.add(expense_id, category_id, extract_features(description, amount))
+
+        with self._lock:
+            # Another thread may have trained it meanwhile
+            current = self._models.get(user_id)
+            if current is not None and current.versions == versions:
+                model = current
+            self._models[user_id] = model
+            self._models.move_to_end(user_id)
+            while len(self._models) > self.max_users:
+                self._models.popitem(last=False)
+        return model
+
+    def predict(self, db: Session, user_id: UUID, description: str, amount: Decimal | float) -> tuple[UUID | None, float]:
+        """Predict a category from the user's own history. Returns (None, 0.0) without enough data."""
+        model = self._get_model(db, user_id)
+        with self._lock:
+            if len(model.examples) < self.min_examples:
+                return None, 0.0
+            return model.predict(extract_features(description, amount))
+
+    def learn(self, user_id: UUID, expense_id: UUID, description: str, amount: Decimal | float, category_id: UUID | None) -> None:
+        """Record an expense's (new) category. No-op if the user's model isn't loaded."""
+        with self._lock:
+            model = self._models.get(user_id)
+            if model is None:
+                return
+            if category_id is None:
+                model.remove(expense_id)
+            else:
+                model.add(expense_id, category_id, extract_features(description, amount))
+
+    def forget(self, user_id: UUID, expense_id: UUID) -> None:
+        """Remove a deleted expense from the user's model"""
+        with self._lock:
+            model = self._models.get(user_id)
+            if model is not None:
+                model.remove(expense_id)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop a user's model so it is retrained on next use"""
+        with self._lock:
+            self._models.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop every model"""
+        with self._lock:
+            self._models.clear()
+
+
+@lru_cache()
+def get_local_classifier() -> LocalClassifierRegistry:
+    """Process-wide registry of per-user local classifiers"""
+    return LocalClassifierRegistry(
+        max_users=settings.AI_LOCAL_CLASSIFIER_MAX_USERS,
+        max_examples=settings.AI_LOCAL_CLASSIFIER_MAX_EXAMPLES,
+        min_examples=settings.AI_LOCAL_CLASSIFIER_MIN_EXAMPLES
+    )
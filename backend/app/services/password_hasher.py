@@ -0,0 +1,156 @@
+import asyncio
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+import multiprocessing
+import threading
+import time
+
+from passlib.context import CryptContext
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasherBusyError(RuntimeError):
+    """Raised when too many password operations are already waiting"""
+
+
+def _hash(password: str) -> tuple[float, str]:
+    # Runs in a worker process; returns when it started so the caller can measure queue wait
+    return time.time(), pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> tuple[float, bool]:
+    return time.time(), pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so it neither holds the GIL nor
+    competes with request handlers for CPU. At most `max_pending` operations
+    may be queued or running; beyond that callers are rejected immediately
+    with PasswordHasherBusyError, which caps how many request threads a burst
+    of logins can tie up.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a multi-threaded server process is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    def hash(self, password: str) -> str:
+        """Hash a password in the worker pool"""
+        return self._run(_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash in the worker pool"""
+        return self._run(_verify, plain_password, hashed_password)
+
+    async def ahash(self, password: str) -> str:
+        """Like hash(), but awaits the worker instead of blocking the calling thread"""
+        return await self._arun(_hash, password)
+
+    async def averify(self, plain_password: str, hashed_password: str) -> bool:
+        """Like verify(), but awaits the worker instead of blocking the calling thread"""
+        return await self._arun(_verify, plain_password, hashed_password)
+
+    def _run(self, fn, *args):
+        future, submitted = self._submit(fn, *args)
+        try:
+            started, result = future.result()
+        finally:
+            self._release()
+        self._record(submitted, started)
+        return result
+
+    async def _arun(self, fn, *args):
+        future, submitted = self._submit(fn, *args)
+        try:
+            started, result = await asyncio.wrap_future(future)
+        finally:
+            self._release()
+        self._record(submitted, started)
+        return result
+
+    def _submit(self, fn, *args) -> tuple[Future, float]:
+        with self._lock:
+            if self.in_flight >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusyError("Too many concurrent password operations, try again shortly")
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        submitted = time.time()
+        try:
+            return self.executor.submit(fn, *args), submitted
+        except BaseException:
+            self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _record(self, submitted: float, started: float) -> None:
+        finished = time.time()
+        with self._lock:
+            self.completed += 1
+            wait = max(started - submitted, 0.0)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.run_total += finished - started
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Concurrency and queue-wait counters"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_avg_ms": self.wait_total / self.completed * 1000 if self.completed else 0.0,
+                "queue_wait_max_ms": self.wait_max * 1000,
+                "run_avg_ms": self.run_total / self.completed * 1000 if self.completed else 0.0,
+            }
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    """Process-wide password hasher"""
+    return PasswordHasher(
+        workers=settings.PASSWORD_HASH_WORKERS,
+        max_pending=settings.PASSWORD_HASH_MAX_PENDING
+    )
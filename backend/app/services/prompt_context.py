@@ -0,0 +1,143 @@
+from collections import OrderedDict, deque
+from decimal import Decimal
+from functools import lru_cache
+from uuid import UUID
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.repositories.expense_repository import ExpenseRepository
+from app.services.category_cache import get_category_cache
+
+settings = get_settings()
+
+
+class PromptContext:
+    """
+    Ready-to-use prompt blocks for one user: the category list and the most
+    recent categorized expenses. Text blocks are rebuilt only when they change.
+    `versions` are the CategoryCache.versions() the category list was read at.
+    """
+
+    def __init__(
+        self,
+        categories: list[tuple[UUID, str, str | None]],
+        examples: list[tuple[UUID, str, Decimal, UUID]],
+        max_examples: int,
+        versions: tuple[int, int] = (0, 0)
+    ):
+        self.versions = versions
+        self.categories = categories
+        self.category_names = {category_id: name for category_id, name, _ in categories}
+        self.examples: deque[tuple[UUID, str, Decimal, UUID]] = deque(examples, maxlen=max_examples)
+        self.categories_text = "\n".join(
+            f"- {name}: {description or 'No description'}" for _, name, description in categories
+        )
+        self._examples_text: str | None = None
+
+    @property
+    def examples_text(self) -> str:
+        if self._examples_text is None:
+            lines = [
+                f"- \"{description}\" (${float(amount):.2f}) → {self.category_names[category_id]}"
+                for _, description, amount, category_id in self.examples
+                if category_id in self.category_names
+            ]
+            self._examples_text = "\n".join(lines)
+        return self._examples_text
+
+    def match_category(self, name: str) -> UUID | None:
+        """Find a category by (case-insensitive) name"""
+        name = name.strip().lower()
+        for category_id, category_name, _ in self.categories:
+            if category_name.lower() == name:
+                return category_id
+        return None
+
+    def add_example(self, expense_id: UUID, description: str, amount: Decimal, category_id: UUID) -> bool:
+        """Prepend a newly categorized expense. Returns False if the category is unknown."""
+        if category_id not in self.category_names:
+            return False
+        self.examples.appendleft((expense_id, description, amount, category_id))
+        self._examples_text = None
+        return True
+
+    def has_example(self, expense_id: UUID) -> bool:
+        return any(example[0] == expense_id for example in self.examples)
+
+
+class PromptContextStore:
+    """
+    Per-user PromptContext cache (LRU), built with two narrow queries on first use
+    and updated incrementally on expense and category writes.
+    A context is rebuilt when the user's category versions change, so categories
+    changed by another worker are never offered to the model.
+    """
+
+    def __init__(self, max_users: int = 1000, max_examples: int = 20):
+        self.max_users = max_users
+        self.max_examples = max_examples
+        self._contexts: OrderedDict[UUID, PromptContext] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: UUID) -> PromptContext:
+        """Get the user's prompt context, building it if needed"""
+        # Versions before categories: a concurrent change then at worst causes an extra rebuild
+        versions = get_category_cache().versions(db, user_id)
+        with self._lock:
+            context = self._contexts.get(user_id)
+            if context is not None and context.versions == versions:
+                self._contexts.move_to_end(user_id)
+                return context
+
+        categories = [
+            (category.id, category.name, category.description)
+            for category in get_category_cache().get_all(db, user_id)[:100]
+        ]
+        examples = ExpenseRepository.get_training_examples(db, user_id, limit=self.max_examples)
+        context = PromptContext(categories, examples, self.max_examples, versions)
+
+        with self._lock:
+            # Another thread may have built it meanwhile
+            current = self._contexts.get(user_id)
+            if current is not None and current.versions == versions:
+                context = current
+            self._contexts[user_id] = context
+            self._contexts.move_to_end(user_id)
+            while len(self._contexts) > self.max_users:
+                self._contexts.popitem(last=False)
+        return context
+
+    def add_example(self, user_id: UUID, expense_id: UUID, description: str, amount: Decimal, category_id: UUID) -> None:
+        """Record a newly categorized expense. No-op if the user's context isn't loaded."""
+        with self._lock:
+            context = self._contexts.get(user_id)
+            if context is not None and not context.add_example(expense_id, description, amount, category_id):
+                self._contexts.pop(user_id, None)
+
+    def expense_changed(self, user_id: UUID, expense_id: UUID) -> None:
+        """Drop the user's context if a changed or deleted expense is one of its examples"""
+        with self._lock:
+            context = self._contexts.get(user_id)
+            if context is not None and context.has_example(expense_id):
+                self._contexts.pop(user_id, None)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop a user's context (e.g. after their categories change)"""
+        with self._lock:
+            self._contexts.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop every context (e.g. after a default category changes)"""
+        with self._lock:
+            self._contexts.clear()
+
+
+@lru_cache()
+def get_prompt_context_store() -> PromptContextStore:
+    """Process-wide prompt context store"""
+    return PromptContextStore(
+        max_users=settings.AI_PROMPT_CONTEXT_MAX_USERS,
+        max_examples=settings.AI_PROMPT_EXAMPLES
+    )
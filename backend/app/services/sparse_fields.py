@@ -0,0 +1,23 @@
+from app.schemas.category import Category
+from app.schemas.expense import Expense, ExpenseCompact
+
+# Field names accepted by fields= on each read
+EXPENSE_FIELDS = tuple(Expense.model_fields)
+COMPACT_EXPENSE_FIELDS = tuple(ExpenseCompact.model_fields)
+CATEGORY_FIELDS = tuple(Category.model_fields)
+
+
+def parse_fields(fields: str | None, allowed: tuple[str, ...]) -> list[str] | None:
+    """
+    Parse a comma-separated fields= parameter into an ordered list of field names,
+    always starting with id. Returns None when no fields were requested.
+    Raises ValueError on unknown fields.
+    """
+    if fields is None:
+        return None
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return ["id"] + [name for name in dict.fromkeys(names) if name != "id"]
@@ -1,38 +1,60 @@
+from contextlib import contextmanager
+from typing import Iterator
 from uuid import UUID
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from app.database import DatabaseRunner
 from app.repositories.user_repository import UserRepository
+from app.services.auth_cache import get_auth_cache
+from app.services.password_hasher import get_password_hasher
 from app.schemas.user import UserCreate, UserUpdate
 from app.models.user import User
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+class UserNotFoundError(LookupError):
+    """Raised when a write is made for a user that no longer exists"""
 
 
 class UserService:
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash a password"""
-        return pwd_context.hash(password)
+        """
+        Hash a password (in the bcrypt worker pool).
+        Raises PasswordHasherBusyError if the pool is saturated.
+        """
+        return get_password_hasher().hash(password)
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash"""
-        return pwd_context.verify(plain_password, hashed_password)
+        """
+        Verify a password against its hash (in the bcrypt worker pool).
+        Raises PasswordHasherBusyError if the pool is saturated.
+        """
+        return get_password_hasher().verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """Like hash_password, awaiting the bcrypt worker (for async handlers)"""
+        return await get_password_hasher().ahash(password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Like verify_password, awaiting the bcrypt worker (for async handlers)"""
+        return await get_password_hasher().averify(plain_password, hashed_password)
 
     @staticmethod
-    def create_user(db: Session, user: UserCreate) -> User:
+    def create_user(db: Session, user: UserCreate, hashed_password: str | None = None) -> User:
         """
         Create a new user.
+        hashed_password is the hash of user.password if the caller already computed it.
         Raises ValueError if email already exists.
         """
-        # Check if user already exists
-        existing_user = UserRepository.get_by_email(db, user.email)
-        if existing_user:
+        if hashed_password is None:
+            hashed_password = UserService.hash_password(user.password)
+        db_user = UserRepository.create(db, user, hashed_password)
+        if db_user is None:
             raise ValueError("Email already registered")
-
-        hashed_password = UserService.hash_password(user.password)
-        return UserRepository.create(db, user, hashed_password)
+        return db_user
 
     @staticmethod
     def get_user(db: Session, user_id: UUID) -> User | None:
@@ -51,17 +73,46 @@ class UserService:
         if user_update.password:
             hashed_password = UserService.hash_password(user_update.password)
 
-        return UserRepository.update(db, user_id, user_update, hashed_password)
+        db_user = UserRepository.update(db, user_id, user_update, hashed_password)
+        get_auth_cache().invalidate_user(user_id)
+        return db_user
+
+    @staticmethod
+    def delete_user(db: Session, user_id: UUID) -> bool:
+        """Delete a user, rejecting their outstanding tokens"""
+        deleted = UserRepository.delete(db, user_id)
+        if deleted:
+            get_auth_cache().revoke_user(user_id)
+        return deleted
+
+    @staticmethod
+    @contextmanager
+    def existing_user(db: Session, user_id: UUID) -> Iterator[None]:
+        """
+        Wrap a write that references user_id (e.g. inserts rows they own).
+        Token-only auth doesn't see users deleted by another process, so their
+        writes fail the users foreign key: if the user is indeed gone, reject
+        their tokens here too and raise UserNotFoundError instead of the IntegrityError.
+        """
+        try:
+            yield
+        except IntegrityError:
+            db.rollback()
+            if UserRepository.get_by_id(db, user_id) is not None:
+                raise
+            get_auth_cache().revoke_user(user_id)
+            raise UserNotFoundError("User not found")
 
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> User | None:
+    async def authenticate_user(runner: DatabaseRunner, email: str, password: str) -> User | None:
         """
         Authenticate a user.
         Returns the user if credentials are valid, None otherwise.
+        Awaits bcrypt instead of blocking the handler on it.
         """
-        user = UserRepository.get_by_email(db, email)
+        user = await runner.run(UserRepository.get_by_email, email)
         if not user:
             return None
-        if not UserService.verify_password(password, user.hashed_password):
+        if not await UserService.verify_password_async(password, user.hashed_password):
             return None
         return user
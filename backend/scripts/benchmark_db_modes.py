@@ -0,0 +1,146 @@
+"""
+Compare request throughput of DATABASE_MODE=sync (psycopg2 on the threadpool)
+and DATABASE_MODE=async (asyncpg, async def routes).
+Run with: python -m scripts.benchmark_db_modes [--concurrency 500] [--requests 5000]
+
+For each mode a uvicorn server is started against the configured DATABASE_URL
+and hit with concurrent GET /api/v1/expenses/ requests from a single benchmark
+user (registered on first run and seeded with expenses through /expenses/batch).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+SEED_EXPENSES = 500
+BENCH_EMAIL = "benchmark-db-modes@spendly.dev"
+BENCH_PASSWORD = "benchmark-password"
+
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_MODE": mode}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env
+    )
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+async def get_token(client: httpx.AsyncClient) -> str:
+    """Log in as the benchmark user, registering and seeding it on first run"""
+    credentials = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    response = await client.post("/api/v1/auth/login", json=credentials)
+    if response.status_code == 200:
+        return response.json()["access_token"]
+
+    await client.post("/api/v1/users/register", json={**credentials, "full_name": "Benchmark"})
+    response = await client.post("/api/v1/auth/login", json=credentials)
+    response.raise_for_status()
+    token = response.json()["access_token"]
+
+    operations = [
+        {
+            "op": "create",
+            "id": str(uuid.uuid4()),
+            "data": {
+                "amount": f"{1 + i % 90}.50",
+                "description": f"Benchmark expense {i}",
+                "expense_date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                "payment_method": "card",
+            },
+        }
+        for i in range(SEED_EXPENSES)
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(0, len(operations), 500):
+        response = await client.post("/api/v1/expenses/batch", json={"operations": operations[i:i + 500]}, headers=headers)
+        response.raise_for_status()
+    return token
+
+
+async def run_load(client: httpx.AsyncClient, token: str, total: int, concurrency: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get("/api/v1/expenses/?limit=20", headers=headers)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def benchmark(mode: str, port: int, total: int, concurrency: int) -> dict:
+    server = start_server(mode, port)
+    try:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120.0) as client:
+            await wait_until_healthy(client)
+            token = await get_token(client)
+            # Warm up connection pools and caches
+            await run_load(client, token, min(total, concurrency), concurrency)
+            return await run_load(client, token, total, concurrency)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent\n")
+    for mode in ("sync", "async"):
+        result = asyncio.run(benchmark(mode, args.port, args.requests, args.concurrency))
+        print(
+            f"{mode:>5}: {result['requests_per_second']:8.1f} req/s   "
+            f"p50 {result['p50_ms']:7.1f} ms   p99 {result['p99_ms']:7.1f} ms   "
+            f"errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
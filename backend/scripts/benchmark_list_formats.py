@@ -0,0 +1,109 @@
+"""
+Compare payload size and serialization time of the full expense list format
+(nested category objects, Pydantic response_model + JSONResponse) with the
+compact format (category IDs, side-loaded categories, ORJSONResponse).
+Run with: python -m scripts.benchmark_list_formats [--iterations 200]
+
+No database is needed: pages are built from in-memory Expense/Category rows
+and serialized through FastAPI's own serialize_response, exactly like
+GET /api/v1/expenses/ does, so only the serialization cost is measured.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models import Category, Expense
+from app.responses import ORJSONResponse
+from app.schemas.category import Category as CategorySchema
+from app.schemas.expense import ExpenseList
+from app.services.expense_service import ExpenseService
+
+CATEGORY_COUNT = 10
+
+
+def make_rows(page_size: int) -> tuple[list[Expense], list[Category]]:
+    now = datetime.now(timezone.utc)
+    categories = [
+        Category(
+            id=uuid.uuid4(), name=f"Category {i}", description=f"Benchmark category {i}",
+            color="#4CAF50", icon="tag", is_default=True, created_at=now
+        )
+        for i in range(CATEGORY_COUNT)
+    ]
+    expenses = []
+    for i in range(page_size):
+        category = categories[i % CATEGORY_COUNT]
+        expenses.append(Expense(
+            id=uuid.uuid4(), user_id=uuid.uuid4(), amount=Decimal(f"{1 + i % 90}.50"),
+            description=f"Benchmark expense {i}", expense_date=date(2025, 1, 1) + timedelta(days=i),
+            payment_method="card", notes=None, category_id=category.id, category=category,
+            ai_suggested_category_id=category.id, ai_suggested_category=category,
+            ai_confidence_score=0.92, ai_status="completed", created_at=now, updated_at=now
+        ))
+    return expenses, categories
+
+
+async def full_body(field, expenses: list[Expense]) -> bytes:
+    page = ExpenseList(items=expenses, total=len(expenses), page=1, page_size=len(expenses), total_pages=1)
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+def compact_body(expenses: list[Expense], categories: list[CategorySchema]) -> bytes:
+    body = ExpenseService.compact_body(expenses, categories)
+    body.update(total=len(expenses), page=1, page_size=len(expenses), total_pages=1)
+    return ORJSONResponse(body).body
+
+
+async def benchmark(page_size: int, iterations: int) -> dict:
+    expenses, categories = make_rows(page_size)
+    # The compact path reads categories from the category cache, already validated
+    cached_categories = [CategorySchema.model_validate(category) for category in categories]
+    field = create_model_field(name="Response_list_expenses", type_=ExpenseList, mode="serialization")
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        full = await full_body(field, expenses)
+    full_seconds = (time.perf_counter() - started) / iterations
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        compact = compact_body(expenses, cached_categories)
+    compact_seconds = (time.perf_counter() - started) / iterations
+
+    return {
+        "full_bytes": len(full),
+        "compact_bytes": len(compact),
+        "full_ms": full_seconds * 1000,
+        "compact_ms": compact_seconds * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 100])
+    args = parser.parse_args()
+
+    print(f"{CATEGORY_COUNT} categories, {args.iterations} iterations per page\n")
+    for page_size in args.page_sizes:
+        result = asyncio.run(benchmark(page_size, args.iterations))
+        print(
+            f"{page_size:>4} items: "
+            f"full {result['full_bytes']:>7} B {result['full_ms']:7.2f} ms   "
+            f"compact {result['compact_bytes']:>7} B {result['compact_ms']:7.2f} ms   "
+            f"({result['compact_bytes'] / result['full_bytes']:.0%} size, "
+            f"{result['full_ms'] / result['compact_ms']:.1f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
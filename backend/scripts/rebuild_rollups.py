@@ -0,0 +1,62 @@
+"""
+Recompute the monthly spending rollups from expenses and verify them.
+Run with: python -m scripts.rebuild_rollups [--user-id UUID] [--verify-only]
+
+Without --verify-only the rollups are rebuilt first; either way they are then
+compared bucket by bucket against a fresh aggregation of expenses, and the
+script exits with status 1 if any bucket differs.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from uuid import UUID
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.repositories.rollup_repository import RollupRepository
+
+MAX_REPORTED = 20
+
+
+def verify(db: Session, user_id: UUID | None) -> bool:
+    """Compare the rollups with the expenses; prints differing buckets"""
+    mismatches = RollupRepository.find_mismatches(db, user_id)
+    if not mismatches:
+        print("✓ Rollups match expenses")
+        return True
+
+    print(f"✗ {len(mismatches)} rollup buckets differ from expenses:")
+    for row in mismatches[:MAX_REPORTED]:
+        print(
+            f"  user {row.user_id} {row.month:%Y-%m} category {row.category_id} {row.payment_method}: "
+            f"stored {row.stored_total}/{row.stored_count}, expected {row.expected_total}/{row.expected_count}"
+        )
+    if len(mismatches) > MAX_REPORTED:
+        print(f"  ... and {len(mismatches) - MAX_REPORTED} more")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=UUID, help="Only this user's rollups (default: all users)")
+    parser.add_argument("--verify-only", action="store_true", help="Compare without rebuilding")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.verify_only:
+            written = RollupRepository.rebuild(db, args.user_id)
+            print(f"✓ Rebuilt {written} rollup buckets")
+        ok = verify(db, args.user_id)
+    finally:
+        db.close()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
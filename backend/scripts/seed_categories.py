@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine, Base
 from app.models.category import Category
+from app.repositories.category_repository import CategoryRepository
 
 # Default categories for expense tracking
 DEFAULT_CATEGORIES = [
@@ -103,6 +104,8 @@ def seed_categories(db: Session):
         )
         db.add(category)
 
+    # Let running API workers reload their cached default categories
+    CategoryRepository.bump_version(db, None)
     db.commit()
     print(f"✓ Created {len(DEFAULT_CATEGORIES)} default categories")
 
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.schemas.user import UserCreate
+from app.services.user_service import UserService
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "ok"},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+}
+
+
+class FakeCompletionServer:
+    """
+    Local stand-in for the OpenAI chat completions endpoint.
+    Each request takes the next scripted response ("ok", "error" for a 500,
+    "bad_request" for a 400, or "slow" to answer after `slow_seconds`);
+    once the script runs out, the last response repeats.
+    """
+
+    def __init__(self):
+        self.script = ["ok"]
+        self.slow_seconds = 1.0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def respond(self, *script: str) -> None:
+        """Set the responses for the next requests"""
+        with self._lock:
+            self.script = list(script)
+            self.requests = 0
+
+    def _next(self) -> str:
+        with self._lock:
+            self.requests += 1
+            if len(self.script) > 1:
+                return self.script.pop(0)
+            return self.script[0]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                action = server._next()
+                if action == "slow":
+                    time.sleep(server.slow_seconds)
+                    action = "ok"
+
+                if action == "ok":
+                    self._send(200, COMPLETION)
+                elif action == "error":
+                    # Keep the client's retry backoff short
+                    self._send(500, {"error": {"message": "boom", "type": "server_error"}}, {"retry-after-ms": "1"})
+                else:
+                    self._send(400, {"error": {"message": "bad request", "type": "invalid_request_error"}})
+
+            def _send(self, status: int, body: dict, headers: dict | None = None):
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    for name, value in (headers or {}).items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client timed out and went away
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def completion_server():
+    """A running FakeCompletionServer"""
+    server = FakeCompletionServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """Engine on TEST_DATABASE_URL (a migrated Postgres database); skips the test if it isn't set"""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_engine):
+    """
+    A session inside a transaction that is rolled back after the test.
+    Commits made through it only release savepoints, so nothing outlives the test.
+    """
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create users with unique emails in the test's transaction"""
+    def make(name: str = "test-user"):
+        # A ready-made hash: the register route hashes before it touches the database
+        return UserService.create_user(
+            db,
+            UserCreate(email=f"{name}-{uuid.uuid4().hex[:8]}@example.com", password="test-password", full_name="Test User"),
+            hashed_password="not-a-real-hash"
+        )
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()
@@ -0,0 +1,141 @@
+import threading
+import time
+
+import openai
+import pytest
+
+from app.services.ai_gateway import AIGateway, AIProviderError, CircuitBreaker
+
+MESSAGES = [{"role": "user", "content": "Coffee at Starbucks"}]
+
+
+def make_gateway(server, timeout: float = 2.0, max_retries: int = 2, failure_threshold: int = 5, reset_timeout: float = 30.0) -> AIGateway:
+    return AIGateway(
+        api_key="test-key",
+        base_url=server.base_url,
+        timeout=timeout,
+        connect_timeout=1.0,
+        max_retries=max_retries,
+        breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+    )
+
+
+def test_complete_returns_text_and_usage(completion_server):
+    gateway = make_gateway(completion_server)
+
+    text, usage = gateway.complete_with_usage(MESSAGES)
+
+    assert text == "ok"
+    assert usage == {"prompt_tokens": 3, "completion_tokens": 1}
+    assert completion_server.requests == 1
+    assert gateway.breaker.state == "closed"
+
+
+def test_timeout_raises_after_bounded_retries(completion_server):
+    completion_server.respond("slow")
+    completion_server.slow_seconds = 1.0
+    gateway = make_gateway(completion_server, timeout=0.2, max_retries=1)
+
+    started = time.monotonic()
+    with pytest.raises(AIProviderError):
+        gateway.complete(MESSAGES)
+
+    assert completion_server.requests == 2
+    # Two 0.2s attempts plus one short backoff, never the server's full delay
+    assert time.monotonic() - started < 2.0
+
+
+def test_server_errors_are_retried_a_bounded_number_of_times(completion_server):
+    completion_server.respond("error")
+    gateway = make_gateway(completion_server, max_retries=2)
+
+    with pytest.raises(AIProviderError):
+        gateway.complete(MESSAGES)
+
+    assert completion_server.requests == 3
+
+
+def test_retry_recovers_from_a_transient_error(completion_server):
+    completion_server.respond("error", "ok")
+    gateway = make_gateway(completion_server, max_retries=2)
+
+    assert gateway.complete(MESSAGES) == "ok"
+    assert completion_server.requests == 2
+    assert gateway.breaker.state == "closed"
+
+
+def test_client_errors_do_not_open_the_circuit(completion_server):
+    completion_server.respond("bad_request")
+    gateway = make_gateway(completion_server, failure_threshold=1)
+
+    with pytest.raises(openai.BadRequestError):
+        gateway.complete(MESSAGES)
+
+    assert gateway.breaker.state == "closed"
+
+
+def test_open_circuit_fails_fast(completion_server):
+    completion_server.respond("error")
+    gateway = make_gateway(completion_server, max_retries=0, failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(AIProviderError):
+            gateway.complete(MESSAGES)
+    assert gateway.breaker.state == "open"
+
+    with pytest.raises(AIProviderError, match="circuit is open"):
+        gateway.complete(MESSAGES)
+    # The rejected call never reached the provider
+    assert completion_server.requests == 2
+
+
+def test_half_open_trial_success_closes_the_circuit(completion_server):
+    completion_server.respond("error")
+    gateway = make_gateway(completion_server, max_retries=0, failure_threshold=1, reset_timeout=0.1)
+
+    with pytest.raises(AIProviderError):
+        gateway.complete(MESSAGES)
+    assert gateway.breaker.state == "open"
+
+    time.sleep(0.15)
+    assert gateway.breaker.state == "half_open"
+    completion_server.respond("ok")
+
+    assert gateway.complete(MESSAGES) == "ok"
+    assert gateway.breaker.state == "closed"
+
+
+def test_half_open_trial_failure_reopens_the_circuit(completion_server):
+    completion_server.respond("error")
+    gateway = make_gateway(completion_server, max_retries=0, failure_threshold=1, reset_timeout=0.1)
+
+    with pytest.raises(AIProviderError):
+        gateway.complete(MESSAGES)
+    time.sleep(0.15)
+    assert gateway.breaker.state == "half_open"
+
+    with pytest.raises(AIProviderError):
+        gateway.complete(MESSAGES)
+    assert gateway.breaker.state == "open"
+    assert completion_server.requests == 2
+
+
+def test_half_open_lets_a_single_trial_through(completion_server):
+    completion_server.respond("error")
+    gateway = make_gateway(completion_server, max_retries=0, failure_threshold=1, reset_timeout=0.1)
+    with pytest.raises(AIProviderError):
+        gateway.complete(MESSAGES)
+    time.sleep(0.15)
+
+    # While the trial call is in flight, other callers are rejected
+    completion_server.respond("slow")
+    completion_server.slow_seconds = 0.3
+    trial = threading.Thread(target=gateway.complete, args=(MESSAGES,))
+    trial.start()
+    time.sleep(0.1)
+    with pytest.raises(AIProviderError, match="circuit is open"):
+        gateway.complete(MESSAGES)
+    trial.join()
+
+    assert completion_server.requests == 1
+    assert gateway.breaker.state == "closed"
@@ -0,0 +1,121 @@
+"""ETag / 304 on list reads against a real database (needs TEST_DATABASE_URL, see the db fixture)"""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select, update
+
+from app.database import DatabaseRunner, get_db_runner, settings
+from app.main import app
+from app.models.user import User
+from app.schemas.category import CategoryCreate
+from app.schemas.expense import ExpenseCreate
+from app.services.auth_service import AuthService
+from app.services.category_service import CategoryService
+from app.services.expense_service import ExpenseService
+
+EXPENSES = "/api/v1/expenses/"
+
+
+class SessionRunner(DatabaseRunner):
+    """Runs the request's calls in the test's session (sync mode), leaving it open"""
+
+    def __init__(self, db):
+        super().__init__()
+        self._db = db
+
+    async def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_MODE", "sync")
+    app.dependency_overrides[get_db_runner] = lambda: SessionRunner(db)
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db_runner)
+
+
+def auth(user) -> dict:
+    return {"Authorization": f"Bearer {AuthService.create_user_token(user.id)['access_token']}"}
+
+
+def add_expense(db, user) -> None:
+    ExpenseService.create_expense(db, ExpenseCreate(
+        amount=Decimal("9.99"), description="ETag check", expense_date=date(2025, 3, 14), payment_method="card"
+    ), user.id)
+
+
+def etag(client, user) -> str:
+    response = client.get(EXPENSES, headers=auth(user))
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    return response.headers["ETag"]
+
+
+def test_own_write_changes_the_etag(db, client, user):
+    before = etag(client, user)
+    add_expense(db, user)
+
+    assert etag(client, user) != before
+
+
+def test_another_users_write_keeps_the_etag(db, client, user, make_user):
+    before = etag(client, user)
+    add_expense(db, make_user("other"))
+
+    assert etag(client, user) == before
+
+
+def test_default_category_change_changes_the_etag(db, client, user):
+    before = etag(client, user)
+    CategoryService.create_category(db, CategoryCreate(name="ETag default", color="#95A5A6", icon="tag"))
+
+    assert etag(client, user) != before
+
+
+def test_matching_if_none_match_skips_the_route(db, client, user):
+    add_expense(db, user)
+    current = etag(client, user)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    bind = db.connection()
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        response = client.get(EXPENSES, headers={**auth(user), "If-None-Match": current})
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == current
+    assert response.content == b""
+    # Only the version lookup ran, never the list query
+    assert len(statements) == 1, statements
+    assert "expenses" not in statements[0]
+
+
+def test_stale_if_none_match_gets_the_list(db, client, user):
+    stale = etag(client, user)
+    add_expense(db, user)
+
+    response = client.get(EXPENSES, headers={**auth(user), "If-None-Match": stale})
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+
+
+def test_version_bump_keeps_updated_at(db, user):
+    long_ago = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    db.execute(update(User).where(User.id == user.id).values(updated_at=long_ago))
+    version = db.scalar(select(User.data_version).where(User.id == user.id))
+
+    add_expense(db, user)
+
+    row = db.execute(select(User.data_version, User.updated_at).where(User.id == user.id)).one()
+    assert row.data_version > version
+    assert row.updated_at == long_ago
@@ -0,0 +1,117 @@
+"""ExpenseService.apply_batch against a real database (needs TEST_DATABASE_URL, see the db fixture)"""
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.expense import Expense
+from app.repositories.rollup_repository import RollupRepository
+from app.schemas.expense import ExpenseBatchCreate, ExpenseBatchDelete, ExpenseBatchUpdate, ExpenseCreate, ExpenseUpdate
+from app.services.expense_service import ExpenseService
+
+
+def create(expense_id: uuid.UUID | None = None, **overrides) -> ExpenseBatchCreate:
+    data = {"amount": Decimal("10.00"), "description": "Batch", "expense_date": date(2025, 3, 14), "payment_method": "card"}
+    return ExpenseBatchCreate(op="create", id=expense_id, data=ExpenseCreate(**{**data, **overrides}))
+
+
+def update(expense_id: uuid.UUID, **fields) -> ExpenseBatchUpdate:
+    return ExpenseBatchUpdate(op="update", id=expense_id, data=ExpenseUpdate(**fields))
+
+
+def delete(expense_id: uuid.UUID) -> ExpenseBatchDelete:
+    return ExpenseBatchDelete(op="delete", id=expense_id)
+
+
+def user_expenses(db, user_id) -> dict[uuid.UUID, Expense]:
+    return {expense.id: expense for expense in db.scalars(select(Expense).where(Expense.user_id == user_id))}
+
+
+def statuses(results: list[dict]) -> list[str]:
+    return [result["status"] for result in results]
+
+
+def test_mixed_batch_keeps_rollups_exact(db, user):
+    kept, moved, dropped = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    ExpenseService.apply_batch(db, user.id, [create(kept), create(moved), create(dropped)])
+
+    results = ExpenseService.apply_batch(db, user.id, [
+        create(amount=Decimal("3.00"), payment_method="cash"),
+        update(kept, amount=Decimal("25.00")),
+        update(moved, expense_date=date(2025, 4, 1)),
+        update(moved, payment_method="cash"),
+        delete(dropped),
+        update(uuid.uuid4(), amount=Decimal("1.00")),
+    ])
+
+    assert statuses(results) == ["created", "updated", "updated", "updated", "deleted", "not_found"]
+    expenses = user_expenses(db, user.id)
+    assert expenses[kept].amount == Decimal("25.00")
+    assert (expenses[moved].expense_date, expenses[moved].payment_method) == (date(2025, 4, 1), "cash")
+    assert dropped not in expenses
+    assert RollupRepository.find_mismatches(db, user.id) == []
+
+
+def test_operations_on_one_expense_can_be_create_update_delete(db, user):
+    expense_id = uuid.uuid4()
+
+    results = ExpenseService.apply_batch(db, user.id, [
+        create(expense_id), update(expense_id, amount=Decimal("2.00")), delete(expense_id)
+    ])
+
+    assert statuses(results) == ["created", "updated", "deleted"]
+    assert user_expenses(db, user.id) == {}
+    assert RollupRepository.find_mismatches(db, user.id) == []
+
+
+@pytest.mark.parametrize("operations", [
+    lambda expense_id: [delete(expense_id), update(expense_id, amount=Decimal("2.00"))],
+    lambda expense_id: [update(expense_id, amount=Decimal("2.00")), create(expense_id)],
+    lambda expense_id: [delete(expense_id), delete(expense_id)],
+])
+def test_out_of_order_operations_reject_the_whole_batch(db, user, operations):
+    expense_id = uuid.uuid4()
+    ExpenseService.apply_batch(db, user.id, [create(expense_id)])
+
+    with pytest.raises(ValueError, match="can't follow"):
+        ExpenseService.apply_batch(db, user.id, [create(amount=Decimal("5.00"))] + operations(expense_id))
+
+    assert list(user_expenses(db, user.id)) == [expense_id]
+
+
+def test_replayed_batch_is_idempotent(db, user):
+    first, second = uuid.uuid4(), uuid.uuid4()
+    batch = [create(first), create(second, amount=Decimal("4.50")), update(first, description="Renamed")]
+
+    assert statuses(ExpenseService.apply_batch(db, user.id, batch)) == ["created", "created", "updated"]
+    assert statuses(ExpenseService.apply_batch(db, user.id, batch)) == ["exists", "exists", "updated"]
+
+    expenses = user_expenses(db, user.id)
+    assert sorted(expenses) == sorted([first, second])
+    assert expenses[first].description == "Renamed"
+    assert RollupRepository.find_mismatches(db, user.id) == []
+
+
+def test_create_cannot_reuse_another_users_expense_id(db, user, make_user):
+    other = make_user("other")
+    expense_id = uuid.uuid4()
+    ExpenseService.apply_batch(db, other.id, [create(expense_id)])
+
+    with pytest.raises(ValueError, match="no changes were applied"):
+        ExpenseService.apply_batch(db, user.id, [create(), create(expense_id)])
+
+    assert user_expenses(db, user.id) == {}
+    assert user_expenses(db, other.id)[expense_id].user_id == other.id
+
+
+def test_constraint_errors_are_reported_without_driver_details(db, user):
+    with pytest.raises(ValueError) as error:
+        ExpenseService.apply_batch(db, user.id, [create(category_id=uuid.uuid4())])
+
+    assert str(error.value) == (
+        "Batch rejected, no changes were applied: an operation violates a database constraint"
+    )
+    assert db.scalar(select(func.count()).select_from(Expense).where(Expense.user_id == user.id)) == 0
@@ -0,0 +1,65 @@
+import io
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.expense import Expense
+from app.repositories.rollup_repository import RollupRepository
+from app.services import import_service
+from app.services.import_service import ImportService, parse_amount
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("12.50", "12.50"),
+    ("-12,50", "-12.50"),
+    ("€ 9.99", "9.99"),
+    ("1,234.56", "1234.56"),
+    ("1.234,56", "1234.56"),
+    ("-1.234.567,89", "-1234567.89"),
+    ("1,234,567.89", "1234567.89"),
+    ("1,234", "1234"),
+    ("1.234", "1234"),
+    ("1.234.567", "1234567"),
+    ("0,125", "0.125"),
+    ("1,5", "1.5"),
+    ("1234", "1234"),
+])
+def test_parse_amount(raw, expected):
+    assert parse_amount(raw) == Decimal(expected)
+
+
+@pytest.mark.parametrize("raw", ["", "abc", "1-2"])
+def test_parse_amount_rejects_garbage(raw):
+    with pytest.raises(ValueError):
+        parse_amount(raw)
+
+
+def csv_statement(rows: int, tail: bytes = b"") -> io.BytesIO:
+    lines = [b"date,description,amount"] + [b"2025-03-%02d,Coffee,-3.50" % (i % 28 + 1) for i in range(rows)]
+    return io.BytesIO(b"\n".join(lines) + b"\n" + tail)
+
+
+def count_expenses(db, user_id) -> int:
+    return db.scalar(select(func.count()).select_from(Expense).where(Expense.user_id == user_id))
+
+
+def test_import_spans_several_batches(db, user, monkeypatch):
+    monkeypatch.setattr(import_service, "INSERT_BATCH_SIZE", 2)
+
+    report = ImportService.import_expenses(db, user.id, csv_statement(5), "csv", categorize=False)
+
+    assert report["imported"] == 5
+    assert count_expenses(db, user.id) == 5
+    assert RollupRepository.find_mismatches(db, user.id) == []
+
+
+def test_failed_import_saves_nothing(db, user, monkeypatch):
+    monkeypatch.setattr(import_service, "INSERT_BATCH_SIZE", 100)
+
+    # The file is decoded as it is read, so the bad byte is only hit after several batches
+    with pytest.raises(UnicodeDecodeError):
+        ImportService.import_expenses(db, user.id, csv_statement(1500, b"2025-03-30,Caf\xe9,-1.00\n"), "csv", categorize=False)
+
+    assert count_expenses(db, user.id) == 0
+    assert RollupRepository.find_mismatches(db, user.id) == []
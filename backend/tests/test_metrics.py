@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app, settings
+
+
+@pytest.fixture
+def client():
+    # Without the lifespan: /metrics only reads in-process stats
+    return TestClient(app)
+
+
+def test_metrics_is_disabled_by_default(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer anything"}).status_code == 404
+
+
+def test_metrics_needs_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-secret")
+
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 404
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer metrics-secret"})
+    assert response.status_code == 200
+    assert {"auth_cache", "password_hasher", "database_pools"} <= response.json().keys()
@@ -0,0 +1,236 @@
+"""
+The planner uses the expense and category indexes, on a seeded dataset
+(needs TEST_DATABASE_URL, see the db fixture).
+Synthetic users, categories and expenses are inserted once for the module,
+inside a transaction that is rolled back at the end.
+"""
+
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import combinations
+
+import pytest
+from sqlalchemy import Connection, event, insert, text
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.expense_rollup import ExpenseMonthlyRollup
+from app.models.user import User
+from app.repositories.category_repository import CategoryRepository
+from app.repositories.expense_repository import ExpenseRepository
+from app.repositories.rollup_repository import ROLLUP_KEY, RollupRepository
+from app.schemas.expense import ExpenseFilters
+
+SEED_USERS = 1000
+SEED_CATEGORIES_PER_USER = 3
+SEED_EXPENSES_PER_USER = 100
+PAYMENT_METHODS = ["card", "cash", "bank_transfer"]
+# Indexes leading with user_id that serve filtered listings; the planner picks
+# whichever is most selective for the combination, but never a sequential scan
+FILTER_INDEXES = {
+    "ix_expenses_user_id_expense_date_id",
+    "ix_expenses_user_id_category_id",
+    "ix_expenses_user_id_amount",
+    "ix_expenses_user_id_payment_method_expense_date",
+}
+MERCHANTS = ["Amazon", "Esselunga", "Trenitalia", "Netflix", "Ikea", "Coop", "Decathlon", "Zara"]
+TODAY = date.today()
+
+
+def seed_dataset(connection: Connection) -> tuple[uuid.UUID, list[uuid.UUID]]:
+    """Insert synthetic data and return (user_id, that user's category IDs) to query with"""
+    rng = random.Random(42)
+    users, categories, expenses = [], [], []
+
+    for i in range(SEED_USERS):
+        user_id = uuid.uuid4()
+        users.append({
+            "id": user_id,
+            "email": f"plan-check-{user_id}@example.com",
+            "hashed_password": "x",
+            "full_name": f"Plan Check {i}",
+        })
+        category_ids = [uuid.uuid4() for _ in range(SEED_CATEGORIES_PER_USER)]
+        for category_id in category_ids:
+            categories.append({
+                "id": category_id,
+                "user_id": user_id,
+                "name": f"Custom {category_id.hex[:6]}",
+                "color": "#95A5A6",
+                "icon": "tag",
+                "is_default": False,
+            })
+        for _ in range(SEED_EXPENSES_PER_USER):
+            expenses.append({
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "amount": rng.randint(100, 20000) / 100,
+                "description": f"{rng.choice(MERCHANTS)} order {rng.randint(1000, 9999)}",
+                "category_id": rng.choice(category_ids + [None]),
+                "expense_date": TODAY - timedelta(days=rng.randint(0, 730)),
+                "payment_method": rng.choice(PAYMENT_METHODS),
+            })
+
+    connection.execute(insert(User), users)
+    connection.execute(insert(Category), categories)
+    connection.execute(insert(Expense), expenses)
+    # Only the seeded users' buckets: the database may hold other (committed) data
+    connection.execute(insert(ExpenseMonthlyRollup).from_select(
+        [*ROLLUP_KEY, "total", "count"],
+        RollupRepository.aggregate_expenses().where(Expense.user_id.in_([user["id"] for user in users]))
+    ))
+    for table in ("users", "categories", "expenses", "expense_monthly_rollups"):
+        connection.execute(text(f"ANALYZE {table}"))
+
+    return users[0]["id"], [category["id"] for category in categories[:SEED_CATEGORIES_PER_USER]]
+
+
+@pytest.fixture(scope="module")
+def seeded(db_engine):
+    """(connection holding the seeded dataset, user_id, that user's category IDs)"""
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    user_id, category_ids = seed_dataset(connection)
+    yield connection, user_id, category_ids
+    transaction.rollback()
+    connection.close()
+
+
+def collect_index_names(plan: dict) -> set[str]:
+    """Walk an EXPLAIN (FORMAT JSON) plan tree and collect every index it scans"""
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= collect_index_names(child)
+    return names
+
+
+def explain_index_usage(db: Session, fn) -> set[str]:
+    """
+    Run fn(), capture every SELECT it sends to the database and
+    return the names of the indexes used by their query plans.
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    bind = db.connection()
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+
+    assert statements, "no SELECT was executed"
+    used = set()
+    for statement, parameters in statements:
+        plan = bind.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        used |= collect_index_names(plan[0]["Plan"])
+    return used
+
+
+# (name, fn(db, user_id, category_ids), indexes of which at least one must be used)
+CHECKS = [
+    (
+        "get_all",
+        lambda db, user_id, category_ids: ExpenseRepository.get_all(db, user_id, 0, 20),
+        {"ix_expenses_user_id_expense_date_id"},
+    ),
+    (
+        "get_all category filter",
+        lambda db, user_id, category_ids: ExpenseRepository.get_all(
+            db, user_id, 0, 20, ExpenseFilters(category_ids=category_ids[:1])
+        ),
+        {"ix_expenses_user_id_category_id"},
+    ),
+    (
+        "get_page",
+        lambda db, user_id, category_ids: ExpenseRepository.get_page(db, user_id, 20),
+        {"ix_expenses_user_id_expense_date_id"},
+    ),
+    (
+        "get_summary monthly from rollups",
+        lambda db, user_id, category_ids: ExpenseRepository.get_summary(db, user_id),
+        {"ux_expense_monthly_rollups_key"},
+    ),
+    (
+        "get_summary weekly",
+        lambda db, user_id, category_ids: ExpenseRepository.get_summary(db, user_id, granularity="week"),
+        {"ix_expenses_user_id_expense_date_id", "ix_expenses_user_id_category_id"},
+    ),
+    (
+        "CategoryRepository.get_all",
+        lambda db, user_id, category_ids: CategoryRepository.get_all(db, user_id),
+        {"ix_categories_user_id", "ix_categories_is_default"},
+    ),
+]
+
+# Every combination of listing filters, on both the offset and keyset listings
+FILTER_VALUES = {
+    "date range": lambda category_ids: {"date_from": TODAY - timedelta(days=90), "date_to": TODAY},
+    "amount range": lambda category_ids: {"min_amount": Decimal("20.00"), "max_amount": Decimal("80.00")},
+    "payment method": lambda category_ids: {"payment_methods": ["card", "cash"]},
+    "categories": lambda category_ids: {"category_ids": category_ids[:2]},
+    "uncategorized": lambda category_ids: {"uncategorized": True},
+}
+
+
+def combined_filters(names: tuple[str, ...], category_ids: list[uuid.UUID]) -> ExpenseFilters:
+    return ExpenseFilters(**{key: value for name in names for key, value in FILTER_VALUES[name](category_ids).items()})
+
+
+for size in range(1, len(FILTER_VALUES) + 1):
+    for names in combinations(FILTER_VALUES, size):
+        CHECKS += [
+            (
+                f"get_all {' + '.join(names)}",
+                lambda db, user_id, category_ids, names=names: ExpenseRepository.get_all(
+                    db, user_id, 0, 20, combined_filters(names, category_ids)
+                ),
+                FILTER_INDEXES,
+            ),
+            (
+                f"get_page {' + '.join(names)}",
+                lambda db, user_id, category_ids, names=names: ExpenseRepository.get_page(
+                    db, user_id, 20, None, combined_filters(names, category_ids)
+                ),
+                FILTER_INDEXES,
+            ),
+        ]
+
+
+@pytest.fixture
+def plan_db(seeded):
+    connection, user_id, category_ids = seeded
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    yield db, user_id, category_ids
+    db.close()
+
+
+@pytest.mark.parametrize("fn, expected", [(fn, expected) for _, fn, expected in CHECKS], ids=[name for name, _, _ in CHECKS])
+def test_query_uses_an_index(plan_db, fn, expected):
+    db, user_id, category_ids = plan_db
+
+    used = explain_index_usage(db, lambda: fn(db, user_id, category_ids))
+
+    assert used & expected, f"expected one of {sorted(expected)}, planner used {sorted(used) or 'no index'}"
+
+
+def test_search_uses_an_index(plan_db):
+    db, user_id, _ = plan_db
+    if db.scalar(text("SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'")) == 0:
+        pytest.skip("pg_trgm is not installed")
+
+    used = explain_index_usage(db, lambda: ExpenseRepository.search(db, user_id, "amazon"))
+
+    # Small accounts may be searched through the user's own index instead
+    assert used & {
+        "ix_expenses_search_vector", "ix_expenses_description_trgm", "ix_expenses_notes_trgm",
+        "ix_expenses_user_id_expense_date_id",
+    }, sorted(used)
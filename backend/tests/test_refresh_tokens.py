@@ -0,0 +1,92 @@
+"""Refresh token rotation against a real database (needs TEST_DATABASE_URL, see the db fixture)"""
+
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.repositories.refresh_token_repository import RefreshTokenRepository
+from app.services.auth_service import AuthService
+
+
+def test_refresh_rotates_the_token(db, user):
+    tokens = AuthService.create_user_tokens(db, user.id)
+
+    refreshed = AuthService.refresh_user_tokens(db, tokens["refresh_token"])
+
+    assert refreshed is not None
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+    assert AuthService.decode_token(refreshed["access_token"])["sub"] == str(user.id)
+    assert AuthService.refresh_user_tokens(db, refreshed["refresh_token"]) is not None
+
+
+def test_reusing_a_rotated_token_revokes_the_family(db, user):
+    tokens = AuthService.create_user_tokens(db, user.id)
+    other_device = AuthService.create_user_tokens(db, user.id)
+    refreshed = AuthService.refresh_user_tokens(db, tokens["refresh_token"])
+
+    # The old token was leaked: its reuse fails and also invalidates the live ones
+    assert AuthService.refresh_user_tokens(db, tokens["refresh_token"]) is None
+    assert AuthService.refresh_user_tokens(db, refreshed["refresh_token"]) is None
+    assert AuthService.refresh_user_tokens(db, other_device["refresh_token"]) is None
+
+
+def test_expired_token_is_rejected_without_revoking_others(db, user):
+    live = AuthService.create_user_tokens(db, user.id)
+    RefreshTokenRepository.create(
+        db, user.id, AuthService.hash_refresh_token("expired-token"), datetime.now(timezone.utc) - timedelta(minutes=1)
+    )
+
+    assert AuthService.refresh_user_tokens(db, "expired-token") is None
+    assert AuthService.refresh_user_tokens(db, live["refresh_token"]) is not None
+
+
+def test_unknown_token_is_rejected(db, user):
+    live = AuthService.create_user_tokens(db, user.id)
+
+    assert AuthService.refresh_user_tokens(db, "never-issued") is None
+    assert AuthService.refresh_user_tokens(db, live["refresh_token"]) is not None
+
+
+def test_logout_revokes_the_token(db, user):
+    tokens = AuthService.create_user_tokens(db, user.id)
+
+    assert AuthService.revoke_refresh_token(db, tokens["refresh_token"])
+    assert not AuthService.revoke_refresh_token(db, tokens["refresh_token"])
+    assert AuthService.refresh_user_tokens(db, tokens["refresh_token"]) is None
+
+
+def test_concurrent_refreshes_rotate_only_once(db_engine):
+    # Separate connections that commit, so the two refreshes really race
+    with Session(db_engine) as db:
+        user = User(email=f"refresh-race-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x", full_name="Race")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        refresh_token = AuthService.create_user_tokens(db, user_id)["refresh_token"]
+
+    barrier = threading.Barrier(2)
+    results = []
+
+    def refresh():
+        with Session(db_engine) as db:
+            barrier.wait()
+            results.append(AuthService.refresh_user_tokens(db, refresh_token))
+
+    try:
+        threads = [threading.Thread(target=refresh) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The loser presented a token that was just revoked, so it is treated as
+        # reuse; clients refresh single-flight to never do this themselves
+        assert sum(result is not None for result in results) == 1
+    finally:
+        with Session(db_engine) as db:
+            db.execute(delete(User).where(User.id == user_id))
+            db.commit()
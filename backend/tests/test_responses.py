@@ -0,0 +1,80 @@
+import asyncio
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import get_async_database_url
+from app.responses import ORJSONResponse
+from app.schemas.category import CategoryCreate
+from app.schemas.expense import ExpenseCreate
+from app.schemas.user import UserCreate
+from app.services.category_service import CategoryService
+from app.services.expense_service import ExpenseService
+from app.services.user_service import UserService
+
+FIELDS = ["id", "amount", "category_id", "category"]
+
+
+def render(content) -> dict:
+    return orjson.loads(ORJSONResponse(content).body)
+
+
+def test_decimals_and_uuids_are_strings():
+    expense_id = uuid.uuid4()
+
+    assert render({"id": expense_id, "amount": Decimal("12.50")}) == {"id": str(expense_id), "amount": "12.50"}
+
+
+def list_pages(db) -> tuple[list, dict, list]:
+    """Create an expense, then build its compact page and fields= items like the list route does"""
+    user = UserService.create_user(
+        db,
+        UserCreate(email=f"orjson-{uuid.uuid4().hex[:8]}@example.com", password="test-password", full_name="Test"),
+        hashed_password="not-a-real-hash"
+    )
+    category = CategoryService.create_category(db, CategoryCreate(name="Coffee", color="#95A5A6", icon="tag"), user.id)
+    ExpenseService.create_expense(db, ExpenseCreate(
+        amount=Decimal("3.20"), description="Espresso", expense_date=date(2025, 3, 14),
+        payment_method="card", category_id=category.id
+    ), user.id)
+
+    compact, _ = ExpenseService.list_expenses(db, user.id, 0, 20, None, False)
+    sparse, _ = ExpenseService.list_expenses(db, user.id, 0, 20, None, True, FIELDS)
+    return compact, ExpenseService.compact_page(db, user.id, compact), ExpenseService.sparse_items(sparse, FIELDS)
+
+
+def test_pages_from_asyncpg_rows_render(db_engine):
+    async def load():
+        engine = create_async_engine(get_async_database_url(db_engine.url.render_as_string(hide_password=False)))
+        try:
+            async with engine.connect() as connection:
+                transaction = await connection.begin()
+                session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+                try:
+                    return await session.run_sync(list_pages)
+                finally:
+                    await session.close()
+                    await transaction.rollback()
+        finally:
+            await engine.dispose()
+
+    expenses, compact, sparse = asyncio.run(load())
+    expense = expenses[0]
+    # asyncpg returns its own UUID subclass, which orjson doesn't encode by itself
+    assert type(expense.id) is not uuid.UUID
+
+    body = render(compact)
+    assert body["items"][0]["id"] == str(expense.id)
+    assert body["items"][0]["category_id"] == str(expense.category_id)
+    assert list(body["categories"]) == [str(expense.category_id)]
+
+    items = render({"items": sparse})["items"]
+    assert items == [{
+        "id": str(expense.id),
+        "amount": "3.20",
+        "category_id": str(expense.category_id),
+        "category": {**items[0]["category"], "id": str(expense.category_id)},
+    }]
@@ -0,0 +1,161 @@
+"""
+How many SQL statements each write endpoint's service call sends to the database.
+Each write is one INSERT/UPDATE/DELETE ... RETURNING with its bookkeeping (rollup
+buckets, category and data versions) in CTEs of the same statement. The one
+exception is deleting a category, which first locks it (see CategoryRepository.delete).
+Needs TEST_DATABASE_URL, see the db fixture.
+"""
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.repositories.expense_repository import ExpenseRepository
+from app.repositories.rollup_repository import RollupRepository
+from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.schemas.expense import Expense as ExpenseSchema, ExpenseCreate, ExpenseUpdate
+from app.schemas.user import UserUpdate
+from app.services.category_service import CategoryService
+from app.services.expense_service import ExpenseService
+from app.services.user_service import UserService
+
+TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE", "ROLLBACK")
+
+
+def run_counted(db, fn) -> tuple[object, list[str]]:
+    """Run fn() and return its result and the statements it executed (transaction control excluded)"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(TRANSACTION_CONTROL):
+            statements.append(" ".join(statement.split()))
+
+    bind = db.connection()
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        result = fn()
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+    return result, statements
+
+
+def expense_data(**overrides) -> ExpenseCreate:
+    data = {
+        "amount": Decimal("12.50"),
+        "description": "Write check",
+        "expense_date": date(2025, 3, 14),
+        "payment_method": "card",
+    }
+    return ExpenseCreate(**{**data, **overrides})
+
+
+@pytest.fixture
+def category(db, user):
+    return CategoryService.create_category(db, CategoryCreate(name="Write check", color="#95A5A6", icon="tag"), user.id)
+
+
+@pytest.fixture
+def expense(db, user, category):
+    return ExpenseService.create_expense(db, expense_data(category_id=category.id), user.id)
+
+
+def test_register(db, make_user):
+    _, statements = run_counted(db, make_user)
+    assert len(statements) == 1, statements
+
+
+def test_create_category(db, user):
+    _, statements = run_counted(db, lambda: CategoryService.create_category(
+        db, CategoryCreate(name="Groceries", color="#95A5A6", icon="tag"), user.id
+    ))
+    assert len(statements) == 1, statements
+
+
+def test_update_category(db, user, category):
+    updated, statements = run_counted(db, lambda: CategoryService.update_category(
+        db, category.id, CategoryUpdate(name="Renamed"), user.id
+    ))
+    assert updated.name == "Renamed"
+    assert len(statements) == 1, statements
+
+
+def test_delete_category_locks_it_first(db, user, category):
+    deleted, statements = run_counted(db, lambda: CategoryService.delete_category(db, category.id, user.id))
+    assert deleted
+    assert len(statements) == 2, statements
+    assert statements[0].endswith("FOR UPDATE")
+
+
+def test_create_expense(db, user, category):
+    def create():
+        created = ExpenseService.create_expense(db, expense_data(category_id=category.id), user.id)
+        # Serializing the response (categories included) must not load anything else
+        ExpenseSchema.model_validate(created)
+
+    _, statements = run_counted(db, create)
+    assert len(statements) == 1, statements
+
+
+def test_update_expense(db, user, expense):
+    def update():
+        updated = ExpenseService.update_expense(db, expense.id, user.id, ExpenseUpdate(amount=Decimal("20.00")))
+        ExpenseSchema.model_validate(updated)
+
+    _, statements = run_counted(db, update)
+    assert len(statements) == 1, statements
+
+
+def test_update_missing_expense(db, user):
+    updated, statements = run_counted(db, lambda: ExpenseService.update_expense(
+        db, uuid.uuid4(), user.id, ExpenseUpdate(amount=Decimal("1.00"))
+    ))
+    assert updated is None
+    assert len(statements) == 1, statements
+
+
+def test_delete_expense(db, user, expense):
+    deleted, statements = run_counted(db, lambda: ExpenseService.delete_expense(db, expense.id, user.id))
+    assert deleted
+    assert len(statements) == 1, statements
+
+
+def test_update_user(db, user):
+    _, statements = run_counted(db, lambda: UserService.update_user(db, user.id, UserUpdate(full_name="Write Check 2")))
+    assert len(statements) == 1, statements
+
+
+def test_delete_user(db, user):
+    _, statements = run_counted(db, lambda: UserService.delete_user(db, user.id))
+    assert len(statements) == 1, statements
+
+
+def test_single_statement_writes_keep_rollups_exact(db, user, category):
+    other = CategoryService.create_category(db, CategoryCreate(name="Other", color="#95A5A6", icon="tag"), user.id)
+    first = ExpenseService.create_expense(db, expense_data(category_id=category.id), user.id)
+    second = ExpenseService.create_expense(db, expense_data(amount=Decimal("7.25")), user.id)
+    third = ExpenseService.create_expense(db, expense_data(category_id=other.id, payment_method="cash"), user.id)
+    uncategorized = ExpenseService.create_expense(db, expense_data(amount=Decimal("4.00")), user.id)
+
+    # Within a bucket, across buckets, and a no-op for the rollups
+    ExpenseService.update_expense(db, first.id, user.id, ExpenseUpdate(amount=Decimal("30.00")))
+    ExpenseService.update_expense(db, second.id, user.id, ExpenseUpdate(category_id=category.id, expense_date=date(2025, 4, 2)))
+    ExpenseService.update_expense(db, third.id, user.id, ExpenseUpdate(notes="no rollup change"))
+    # A suggestion filling an empty category moves the expense out of the uncategorized bucket
+    ExpenseRepository.set_ai_categorization(db, uncategorized.id, user.id, "completed", other.id, 0.9)
+    ExpenseService.delete_expense(db, first.id, user.id)
+    CategoryService.delete_category(db, category.id, user.id)
+
+    assert RollupRepository.find_mismatches(db, user.id) == []
+
+
+def test_emptied_buckets_are_left_out_of_summaries(db, user, expense):
+    ExpenseService.delete_expense(db, expense.id, user.id)
+
+    summary = ExpenseRepository.get_summary(db, user.id, date(2025, 3, 1), date(2025, 3, 31))
+
+    assert summary["count"] == 0
+    assert summary["by_category"] == summary["by_payment_method"] == summary["by_period"] == []
+    assert RollupRepository.find_mismatches(db, user.id) == []
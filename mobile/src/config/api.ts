@@ -14,6 +14,8 @@ export const API_URL = __DEV__
 export const API_ENDPOINTS = {
   // Auth
   LOGIN: '/auth/login',
+  REFRESH: '/auth/refresh',
+  LOGOUT: '/auth/logout',
   REGISTER: '/users/register',
   ME: '/users/me',
 
@@ -23,5 +25,6 @@ export const API_ENDPOINTS = {
 
   // Expenses
   EXPENSES: '/expenses/',
+  EXPENSE_SUMMARY: '/expenses/summary',
   EXPENSE: (id: string) => `/expenses/${id}`,
 };
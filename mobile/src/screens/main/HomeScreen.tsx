@@ -5,13 +5,15 @@ import { LinearGradient } from 'expo-linear-gradient';
 import { PieChart } from 'react-native-chart-kit';
 import { useAuth } from '../../contexts/AuthContext';
 import apiService from '../../services/api';
-import { Expense } from '../../types';
+import { Expense, ExpenseSummary } from '../../types';
 
 const screenWidth = Dimensions.get('window').width;
 
 export default function HomeScreen({ navigation }: any) {
   const { user, signOut } = useAuth();
   const [expenses, setExpenses] = useState<Expense[]>([]);
+  const [summary, setSummary] = useState<ExpenseSummary | null>(null);
+  const [monthSummary, setMonthSummary] = useState<ExpenseSummary | null>(null);
   const [loading, setLoading] = useState(true);
 
   useFocusEffect(
@@ -22,8 +24,16 @@ export default function HomeScreen({ navigation }: any) {
 
   const loadExpenses = async () => {
     try {
-      const data = await apiService.getExpenses();
+      const now = new Date();
+      const monthStart = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, '0')}-01`;
+      const [data, allTime, thisMonth] = await Promise.all([
+        apiService.getExpenses(),
+        apiService.getExpenseSummary(),
+        apiService.getExpenseSummary({ date_from: monthStart }),
+      ]);
       setExpenses(data.items);
+      setSummary(allTime);
+      setMonthSummary(thisMonth);
     } catch (error) {
       console.error('Failed to load expenses:', error);
     } finally {
@@ -53,47 +63,26 @@ export default function HomeScreen({ navigation }: any) {
     );
   };
 
-  // Calculate statistics
+  // Statistics are aggregated server-side, so they cover the full history
   const stats = useMemo(() => {
-    const total = expenses.reduce((sum, exp) => sum + parseFloat(exp.amount.toString()), 0);
-    const thisMonth = expenses.filter(exp => {
-      const expDate = new Date(exp.expense_date);
-      const now = new Date();
-      return expDate.getMonth() === now.getMonth() && expDate.getFullYear() === now.getFullYear();
-    });
-    const monthTotal = thisMonth.reduce((sum, exp) => sum + parseFloat(exp.amount.toString()), 0);
-
-    // Category breakdown
-    const categoryMap: { [key: string]: { total: number; color: string; name: string } } = {};
-    thisMonth.forEach(exp => {
-      if (exp.category) {
-        if (!categoryMap[exp.category.id]) {
-          categoryMap[exp.category.id] = {
-            total: 0,
-            color: exp.category.color,
-            name: exp.category.name,
-          };
-        }
-        categoryMap[exp.category.id].total += parseFloat(exp.amount.toString());
-      }
-    });
-
-    const chartData = Object.entries(categoryMap).map(([id, data]) => ({
-      name: data.name,
-      amount: data.total,
-      color: data.color,
-      legendFontColor: '#7F7F7F',
-      legendFontSize: 12,
-    }));
+    const chartData = (monthSummary?.by_category ?? [])
+      .filter(cat => cat.category_id)
+      .map(cat => ({
+        name: cat.name ?? '',
+        amount: parseFloat(cat.total),
+        color: cat.color ?? '#95A5A6',
+        legendFontColor: '#7F7F7F',
+        legendFontSize: 12,
+      }));
 
     return {
-      total,
-      monthTotal,
-      count: expenses.length,
-      monthCount: thisMonth.length,
+      total: summary ? parseFloat(summary.total) : 0,
+      monthTotal: monthSummary ? parseFloat(monthSummary.total) : 0,
+      count: summary?.count ?? 0,
+      monthCount: monthSummary?.count ?? 0,
       chartData,
     };
-  }, [expenses]);
+  }, [summary, monthSummary]);
 
   if (loading) {
     return (
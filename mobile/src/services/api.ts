@@ -1,4 +1,4 @@
-import axios, { AxiosInstance } from 'axios';
+import axios, { AxiosInstance, InternalAxiosRequestConfig } from 'axios';
 import * as SecureStore from 'expo-secure-store';
 import { API_URL, API_ENDPOINTS } from '../config/api';
 import {
@@ -9,13 +9,16 @@ import {
   Category,
   Expense,
   ExpenseListResponse,
+  ExpenseSummary,
   CreateExpenseRequest,
 } from '../types';
 
 const TOKEN_KEY = 'auth_token';
+const REFRESH_TOKEN_KEY = 'refresh_token';
 
 class ApiService {
   private api: AxiosInstance;
+  private refreshing: Promise<string | null> | null = null;
 
   constructor() {
     this.api = axios.create({
@@ -41,6 +44,16 @@ class ApiService {
     this.api.interceptors.response.use(
       (response) => response,
       async (error) => {
+        const original = error.config as (InternalAxiosRequestConfig & { _retried?: boolean }) | undefined;
+        if (error.response?.status === 401 && original && !original._retried && !original.url?.startsWith('/auth/')) {
+          // Access token expired: get a new one with the refresh token instead of logging in again
+          original._retried = true;
+          const token = await this.refreshAccessToken();
+          if (token) {
+            original.headers.Authorization = `Bearer ${token}`;
+            return this.api(original);
+          }
+        }
         if (error.response?.status === 401) {
           // Token expired or invalid
           await this.clearToken();
@@ -61,12 +74,44 @@ class ApiService {
 
   async clearToken(): Promise<void> {
     await SecureStore.deleteItemAsync(TOKEN_KEY);
+    await SecureStore.deleteItemAsync(REFRESH_TOKEN_KEY);
+  }
+
+  private async saveTokens(data: AuthResponse): Promise<void> {
+    await this.saveToken(data.access_token);
+    if (data.refresh_token) {
+      await SecureStore.setItemAsync(REFRESH_TOKEN_KEY, data.refresh_token);
+    }
+  }
+
+  // Refresh tokens rotate on every use, so concurrent 401s share a single refresh call
+  private refreshAccessToken(): Promise<string | null> {
+    if (!this.refreshing) {
+      this.refreshing = (async () => {
+        const refreshToken = await SecureStore.getItemAsync(REFRESH_TOKEN_KEY);
+        if (!refreshToken) {
+          return null;
+        }
+        try {
+          const response = await this.api.post<AuthResponse>(API_ENDPOINTS.REFRESH, {
+            refresh_token: refreshToken,
+          });
+          await this.saveTokens(response.data);
+          return response.data.access_token;
+        } catch {
+          return null;
+        }
+      })().finally(() => {
+        this.refreshing = null;
+      });
+    }
+    return this.refreshing;
   }
 
   // Auth endpoints
   async login(data: LoginRequest): Promise<AuthResponse> {
     const response = await this.api.post<AuthResponse>(API_ENDPOINTS.LOGIN, data);
-    await this.saveToken(response.data.access_token);
+    await this.saveTokens(response.data);
     return response.data;
   }
 
@@ -81,6 +126,14 @@ class ApiService {
   }
 
   async logout(): Promise<void> {
+    const refreshToken = await SecureStore.getItemAsync(REFRESH_TOKEN_KEY);
+    if (refreshToken) {
+      try {
+        await this.api.post(API_ENDPOINTS.LOGOUT, { refresh_token: refreshToken });
+      } catch {
+        // Logging out locally still works if the server can't be reached
+      }
+    }
     await this.clearToken();
   }
 
@@ -113,6 +166,15 @@ class ApiService {
     return response.data;
   }
 
+  async getExpenseSummary(params: {
+    date_from?: string;
+    date_to?: string;
+    granularity?: 'day' | 'week' | 'month';
+  } = {}): Promise<ExpenseSummary> {
+    const response = await this.api.get<ExpenseSummary>(API_ENDPOINTS.EXPENSE_SUMMARY, { params });
+    return response.data;
+  }
+
   async createExpense(data: CreateExpenseRequest): Promise<Expense> {
     const response = await this.api.post<Expense>(API_ENDPOINTS.EXPENSES, data);
     return response.data;
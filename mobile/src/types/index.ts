@@ -28,6 +28,7 @@ export interface Expense {
   ai_suggested_category_id?: string;
   ai_suggested_category?: Category;
   ai_confidence_score?: number;
+  ai_status?: 'pending' | 'completed' | 'failed';
   created_at: string;
   updated_at: string;
 }
@@ -40,6 +41,37 @@ export interface ExpenseListResponse {
   total_pages: number;
 }
 
+export interface CategoryTotal {
+  category_id?: string;
+  name?: string;
+  color?: string;
+  total: string;
+  count: number;
+}
+
+export interface PaymentMethodTotal {
+  payment_method: string;
+  total: string;
+  count: number;
+}
+
+export interface PeriodTotal {
+  period_start: string;
+  total: string;
+  count: number;
+}
+
+export interface ExpenseSummary {
+  date_from?: string;
+  date_to?: string;
+  granularity: 'day' | 'week' | 'month';
+  total: string;
+  count: number;
+  by_category: CategoryTotal[];
+  by_payment_method: PaymentMethodTotal[];
+  by_period: PeriodTotal[];
+}
+
 export interface LoginRequest {
   email: string;
   password: string;
@@ -54,6 +86,7 @@ export interface RegisterRequest {
 export interface AuthResponse {
   access_token: string;
   token_type: string;
+  refresh_token?: string;
 }
 
 export interface CreateExpenseRequest {